@@ -0,0 +1,2 @@
+from Cython.Distutils.build_ext import build_ext
+from Cython.Distutils.extension import Extension
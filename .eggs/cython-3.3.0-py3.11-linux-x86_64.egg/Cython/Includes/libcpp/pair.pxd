@@ -0,0 +1 @@
+from .utility cimport pair
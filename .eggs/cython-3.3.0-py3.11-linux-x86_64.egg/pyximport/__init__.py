@@ -0,0 +1,4 @@
+from .pyximport import *
+
+# replicate docstring
+from .pyximport import __doc__
@@ -43,6 +43,7 @@ User API
 
    pca
    tica
+   tica_its
 
 **Clustering Algorithms**
 
@@ -76,6 +77,7 @@ Find here a documentation how to extract features from them.
 
    transform.PCA
    transform.TICA
+   transform.TICAImpliedTimescales
 
 **Clustering algorithms**
 
@@ -38,9 +38,11 @@ from pyemma.coordinates.data.frames_from_file import frames_from_file as _frames
 from pyemma.coordinates.transform.transformer import Transformer as _Transformer
 from pyemma.coordinates.transform.pca import PCA as _PCA
 from pyemma.coordinates.transform.tica import TICA as _TICA
+from pyemma.coordinates.transform.tica_its import TICAImpliedTimescales as _TICAImpliedTimescales
 # clustering
 from pyemma.coordinates.clustering.kmeans import KmeansClustering as _KmeansClustering
 from pyemma.coordinates.clustering.kmeans import MiniBatchKmeansClustering as _MiniBatchKmeansClustering
+from pyemma.coordinates.clustering.kmeans import StreamingKmeansClustering as _StreamingKmeansClustering
 from pyemma.coordinates.clustering.uniform_time import UniformTimeClustering as _UniformTimeClustering
 from pyemma.coordinates.clustering.regspace import RegularSpaceClustering as _RegularSpaceClustering
 from pyemma.coordinates.clustering.assign import AssignCenters as _AssignCenters
@@ -77,6 +79,7 @@ __all__ = ['featurizer',  # IO
            'save_trajs',
            'pca',  # transform
            'tica',
+           'tica_its',
            'cluster_regspace',  # cluster
            'cluster_kmeans',
            'cluster_mini_batch_kmeans',
@@ -361,7 +364,7 @@ def source(inp, features=None, top=None, chunk_size=None):
     return reader
 
 
-def pipeline(stages, run=True, stride=1, chunksize=100):
+def pipeline(stages, run=True, stride=1, chunksize=100, profile=False):
     r""" Data analysis pipeline.
 
     Constructs a data analysis :class:`Pipeline <pyemma.coordinates.pipelines.Pipeline>` and parametrizes it
@@ -393,6 +396,9 @@ def pipeline(stages, run=True, stride=1, chunksize=100):
         See also stride option in the output functions of the pipeline.
     chunksize : int, optiona, default = 100
         how many datapoints to process as a batch at one step
+    profile : bool, optional, default = False
+        If True, the time spent and the amount of data processed in each stage
+        is recorded. See :meth:`Pipeline.profiling_report <pyemma.coordinates.pipelines.Pipeline.profiling_report>`.
 
     Returns
     -------
@@ -436,7 +442,7 @@ def pipeline(stages, run=True, stride=1, chunksize=100):
 
     if not isinstance(stages, list):
         stages = [stages]
-    p = _Pipeline(stages, param_stride=stride, chunksize=chunksize)
+    p = _Pipeline(stages, param_stride=stride, chunksize=chunksize, profile=profile)
     if run:
         p.parametrize()
     return p
@@ -447,7 +453,8 @@ def discretizer(reader,
                 cluster=None,
                 run=True,
                 stride=1,
-                chunksize=100):
+                chunksize=100,
+                profile=False):
     r""" Specialized pipeline: From trajectories to clustering.
 
     Constructs a pipeline that consists of three stages:
@@ -485,6 +492,10 @@ def discretizer(reader,
     chunksize : int, optiona, default = 100
         how many datapoints to process as a batch at one step
 
+    profile : bool, optional, default = False
+        If True, the time spent and the amount of data processed in each stage
+        is recorded. See :meth:`Pipeline.profiling_report <pyemma.coordinates.pipelines.Pipeline.profiling_report>`.
+
     Returns
     -------
     pipe : a :class:`Pipeline <pyemma.coordinates.pipelines.Discretizer>` object
@@ -543,7 +554,7 @@ def discretizer(reader,
         _logger.warning('You did not specify a cluster algorithm.'
                         ' Defaulting to kmeans(k=100)')
         cluster = _KmeansClustering(n_clusters=100)
-    disc = _Discretizer(reader, transform, cluster, param_stride=stride)
+    disc = _Discretizer(reader, transform, cluster, param_stride=stride, profile=profile)
     if run:
         disc.parametrize()
     return disc
@@ -830,7 +841,7 @@ def _param_stage(previous_stage, this_stage, stride=1):
     return this_stage
 
 
-def pca(data=None, dim=2, var_cutoff=0.95, stride=1, mean=None):
+def pca(data=None, dim=2, var_cutoff=0.95, stride=1, mean=None, method='full', precision='double'):
     r""" Principal Component Analysis (PCA).
 
     PCA is a linear transformation method that finds coordinates of maximal
@@ -885,6 +896,22 @@ def pca(data=None, dim=2, var_cutoff=0.95, stride=1, mean=None):
         Optionally pass pre-calculated means to avoid their re-computation.
         The shape has to match the input dimension.
 
+    method : str, optional, default 'full'
+        'full' diagonalizes the full covariance matrix. 'randomized' only
+        computes the leading dim principal components by randomized subspace
+        iteration, without forming the covariance matrix, such that memory
+        scales linearly with the input dimension. Use this for very high
+        dimensional input. It requires a positive dim and a few passes over the
+        data.
+
+    precision : str, optional, default 'double'
+        'double' computes the covariance matrix of every chunk in double precision.
+        'mixed' keeps single precision input (eg. from a featurized trajectory)
+        in single precision for the products of every chunk and accumulates
+        them in double precision. The projection onto the components is then
+        computed in single precision as well. This is about twice as fast, but
+        less accurate for ill-conditioned data.
+
     Returns
     -------
     pca : a :class:`PCA<pyemma.coordinates.transform.PCA>` transformation object
@@ -967,12 +994,12 @@ def pca(data=None, dim=2, var_cutoff=0.95, stride=1, mean=None):
         indim = data.dimension()
         mean = _types.ensure_ndarray(mean, shape=(indim,), dtype=_np.float)
 
-    res = _PCA(dim=dim, var_cutoff=var_cutoff, mean=mean)
+    res = _PCA(dim=dim, var_cutoff=var_cutoff, mean=mean, method=method, precision=precision)
     return _param_stage(data, res, stride=stride)
 
 
 def tica(data=None, lag=10, dim=-1, var_cutoff=0.95, kinetic_map=True, stride=1,
-         force_eigenvalues_le_one=False, mean=None):
+         force_eigenvalues_le_one=False, mean=None, method='full', precision='double'):
     r""" Time-lagged independent component analysis (TICA).
 
     TICA is a linear transformation method. In contrast to PCA, which finds
@@ -1039,6 +1066,22 @@ def tica(data=None, lag=10, dim=-1, var_cutoff=0.95, kinetic_map=True, stride=1,
         Optionally pass pre-calculated means to avoid their re-computation.
         The shape has to match the input dimension.
 
+    method : str, optional, default 'full'
+        'full' estimates the full covariance matrices. 'randomized' estimates
+        TICA in the subspace of the leading principal components, which are
+        found by randomized PCA, without forming matrices of the size of the
+        input dimension, such that memory scales linearly with the input
+        dimension. Use this for very high dimensional input. It requires a
+        positive dim and does not support a given mean.
+
+    precision : str, optional, default 'double'
+        'double' computes the covariances of every chunk in double precision.
+        'mixed' keeps single precision input (eg. from a featurized trajectory)
+        in single precision for the products of every chunk and accumulates
+        them in double precision. The projection onto the components is then
+        computed in single precision as well. This is about twice as fast, but
+        less accurate for ill-conditioned data.
+
 
     Returns
     -------
@@ -1138,22 +1181,109 @@ def tica(data=None, lag=10, dim=-1, var_cutoff=0.95, kinetic_map=True, stride=1,
         indim = data.dimension()
         mean = _types.ensure_ndarray(mean, shape=(indim,), dtype=_np.float)
     res = _TICA(lag, dim=dim, var_cutoff=var_cutoff, kinetic_map=kinetic_map,
-                force_eigenvalues_le_one=force_eigenvalues_le_one, mean=mean)
+                force_eigenvalues_le_one=force_eigenvalues_le_one, mean=mean, method=method,
+                precision=precision)
     return _param_stage(data, res, stride=stride)
 
 
+def tica_its(data, lags, dim=-1, var_cutoff=0.95, kinetic_map=True, stride=1,
+             force_eigenvalues_le_one=False, nits=None, precision='double'):
+    r""" TICA at a series of lag times and its implied timescales.
+
+    Estimates :func:`tica` at all given lag times in a single pass over the
+    data, which is useful to choose the lag time. The covariance matrices of
+    all lag times are accumulated at once by keeping the last frames of every
+    trajectory in a sliding window, so that the data is read only once instead
+    of once per lag time.
+
+    Parameters
+    ----------
+    data : ndarray (T, d) or list of ndarray (T_i, d) or a reader created by
+        source function array with the data.
+
+    lags : array-like of int
+        the lag times, in multiples of the input time step.
+
+    dim, var_cutoff, kinetic_map, force_eigenvalues_le_one, precision :
+        see :func:`tica`.
+
+    stride : int, optional, default = 1
+        only take every n'th frame into account. All lag times need to be
+        multiples of the stride.
+
+    nits : int, optional
+        maximum number of implied timescales to be stored. None means the
+        number of timescales available at all lag times.
+
+    Returns
+    -------
+    its : a :class:`TICAImpliedTimescales <pyemma.coordinates.transform.TICAImpliedTimescales>` object
+        contains the :class:`TICA <pyemma.coordinates.transform.TICA>` objects
+        (models) and the implied timescales for all lag times.
+
+    Examples
+    --------
+
+    >>> import numpy as np
+    >>> from pyemma.coordinates import tica_its
+    >>> data = np.random.random((1000, 3))
+    >>> its = tica_its(data, lags=[1, 2, 5, 10])
+    >>> its.timescales.shape
+    (4, 3)
+
+    See also
+    --------
+    :func:`tica <pyemma.coordinates.tica>` : TICA at a single lag time
+
+    :func:`its <pyemma.msm.its>` : implied timescales of Markov models
+
+    """
+    res = _TICAImpliedTimescales(lags, dim=dim, var_cutoff=var_cutoff, kinetic_map=kinetic_map,
+                                 force_eigenvalues_le_one=force_eigenvalues_le_one, nits=nits,
+                                 precision=precision)
+    return res.estimate(_get_input_stage(data), stride=stride)
+
+
 # =========================================================================
 #
 # CLUSTERING ALGORITHMS
 #
 # =========================================================================
 
-def cluster_mini_batch_kmeans(data=None, k=100, max_iter=10, batch_size=0.2, metric='euclidean', init_strategy='kmeans++'):
+def cluster_mini_batch_kmeans(data=None, k=100, max_iter=10, batch_size=1000, metric='euclidean', init_strategy='kmeans++'):
     r"""k-means clustering with mini-batch strategy
 
-    Mini-batch k-means is an approximation to k-means which picks a randomly
-    selected subset of data points to be updated in each iteration. Usually
-    much faster than k-means but will likely deliver a less optimal result.
+    Mini-batch k-means is an online approximation to k-means [1]_. The data is
+    streamed in a few sequential passes and split into small mini-batches,
+    which move the centers with a learning rate per center. The data is not
+    held in memory. Usually much faster than k-means but will likely deliver
+    a less optimal result.
+
+    Parameters
+    ----------
+    data: ndarray (T, d) or list of ndarray (T_i, d) or a reader created by :func:`source`
+        input data, if available in memory
+
+    k: int
+        the number of cluster centers
+
+    max_iter : int
+        maximum number of passes over the data (after the initialization). The
+        iteration stops earlier, if the centers hardly move during a pass.
+
+    batch_size : int or float, default=1000
+        number of frames of a mini-batch. A float in (0, 1] is the fraction of
+        all frames.
+
+        .. versionchanged:: 2.1
+           The default changed from 0.2 (a fifth of all frames) to 1000 frames.
+
+    metric : str
+        metric to use during clustering ('euclidean', 'minRMSD')
+
+    init_strategy : str
+        determines if the initial cluster centers are chosen by 'kmeans++',
+        'kmeans||' or 'uniform' from a random sample of the data.
 
     Returns
     -------
@@ -1190,7 +1320,8 @@ def cluster_mini_batch_kmeans(data=None, k=100, max_iter=10, batch_size=0.2, met
 
 
 def cluster_kmeans(data=None, k=100, max_iter=10, tolerance=1e-5, stride=1,
-                   metric='euclidean', init_strategy='kmeans++', fixed_seed=False):
+                   metric='euclidean', init_strategy='kmeans++', fixed_seed=False,
+                   streaming=False, param_cache=None, algorithm='lloyd'):
     r"""k-means clustering
 
     If data is given, it performs a k-means clustering and then assigns the
@@ -1231,9 +1362,27 @@ def cluster_kmeans(data=None, k=100, max_iter=10, tolerance=1e-5, stride=1,
         metric to use during clustering ('euclidean', 'minRMSD')
     init_strategy : str
         determines if the initial cluster centers are chosen according to the kmeans++-algorithm
-        or drawn uniformly distributed from the provided data set
+        ('kmeans++'), the scalable kmeans++-algorithm ('kmeans||') or drawn uniformly distributed
+        from the provided data set ('uniform'). 'kmeans||' needs only a few (multithreaded) passes
+        over the data and is much faster than 'kmeans++' for large k.
     fixed_seed : bool
         if set to true, the random seed gets fixed resulting in deterministic behavior; default is false
+    streaming : bool, optional, default=False
+        if True, every iteration is a pass over the data, which is not held in
+        memory. Use this for data sets that do not fit into main memory. The
+        kmeans++ initialization is then performed on a random sample of the
+        data, see :class:`StreamingKmeansClustering <pyemma.coordinates.clustering.StreamingKmeansClustering>`.
+    param_cache : PassCache, optional, default=None
+        only with streaming=True: buffer for the input data, so that it is
+        not recomputed in every iteration, see :class:`PassCache <pyemma.coordinates.util.pass_cache.PassCache>`.
+    algorithm : str, optional, default='lloyd'
+        'lloyd' computes the distances of all frames to all centers in every
+        iteration. 'hamerly' and 'elkan' keep bounds of the distances between
+        the iterations and skip most distance computations by the triangle
+        inequality, which pays off for the minRMSD metric and for many
+        iterations. 'elkan' skips more computations than 'hamerly', but keeps
+        k bounds per frame in memory. Both iterate until no frame changes its
+        center (or max_iter is reached). Not available with streaming=True.
 
     Returns
     -------
@@ -1284,8 +1433,17 @@ def cluster_kmeans(data=None, k=100, max_iter=10, tolerance=1e-5, stride=1,
         Probability 1. University of California Press. pp. 281-297
 
     """
-    res = _KmeansClustering(n_clusters=k, max_iter=max_iter, metric=metric, tolerance=tolerance,
-                            init_strategy=init_strategy, fixed_seed=fixed_seed)
+    if streaming:
+        if algorithm != 'lloyd':
+            raise ValueError('streaming k-means only supports algorithm="lloyd"')
+        res = _StreamingKmeansClustering(n_clusters=k, max_iter=max_iter, metric=metric, tolerance=tolerance,
+                                         init_strategy=init_strategy, fixed_seed=fixed_seed,
+                                         param_cache=param_cache)
+    else:
+        if param_cache is not None:
+            raise ValueError('param_cache is only used with streaming=True')
+        res = _KmeansClustering(n_clusters=k, max_iter=max_iter, metric=metric, tolerance=tolerance,
+                                init_strategy=init_strategy, fixed_seed=fixed_seed, algorithm=algorithm)
     return _param_stage(data, res, stride=stride)
 
 
@@ -1426,7 +1584,7 @@ def cluster_regspace(data=None, dmin=-1, max_centers=1000, stride=1, metric='euc
 
 
 def assign_to_centers(data=None, centers=None, stride=1, return_dtrajs=True,
-                      metric='euclidean'):
+                      metric='euclidean', n_jobs=None):
     r"""Assigns data to the nearest cluster centers
 
     Creates a Voronoi partition with the given cluster centers. If given
@@ -1461,6 +1619,10 @@ def assign_to_centers(data=None, centers=None, stride=1, return_dtrajs=True,
     metric : str
         metric to use during clustering ('euclidean', 'minRMSD')
 
+    n_jobs : int or None, optional, default=None
+        number of threads used for the assignment. None means the OpenMP
+        default (the value of OMP_NUM_THREADS or the number of cores).
+
 
     Returns
     -------
@@ -1501,7 +1663,7 @@ def assign_to_centers(data=None, centers=None, stride=1, return_dtrajs=True,
     if centers is None:
         raise ValueError('You have to provide centers in form of a filename'
                          ' or NumPy array or a reader created by source function')
-    res = _AssignCenters(centers, metric=metric)
+    res = _AssignCenters(centers, metric=metric, n_jobs=n_jobs)
     parametrized_stage = _param_stage(data, res, stride=stride)
     if return_dtrajs and data is not None:
         return parametrized_stage.dtrajs
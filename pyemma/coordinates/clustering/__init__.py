@@ -29,6 +29,8 @@ clustering - Algorithms (:mod:`pyemma.coordinates.clustering`)
 
     AssignCenters
     KmeansClustering
+    MiniBatchKmeansClustering
+    StreamingKmeansClustering
     RegularSpaceClustering
     UniformTimeClustering
 """
@@ -36,5 +38,6 @@ clustering - Algorithms (:mod:`pyemma.coordinates.clustering`)
 from .assign import AssignCenters
 from .kmeans import KmeansClustering
 from .kmeans import MiniBatchKmeansClustering
+from .kmeans import StreamingKmeansClustering
 from .regspace import RegularSpaceClustering
 from .uniform_time import UniformTimeClustering
\ No newline at end of file
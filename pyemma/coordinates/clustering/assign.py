@@ -42,6 +42,10 @@ class AssignCenters(AbstractClustering):
     metric : str
         metric to use during clustering ('euclidean', 'minRMSD')
 
+    n_jobs : int or None, optional, default=None
+        number of threads used for the assignment. None means the OpenMP
+        default (the value of OMP_NUM_THREADS or the number of cores).
+
 
     Examples
     --------
@@ -56,8 +60,8 @@ class AssignCenters(AbstractClustering):
 
     """
 
-    def __init__(self, clustercenters, metric='euclidean'):
-        super(AssignCenters, self).__init__(metric=metric)
+    def __init__(self, clustercenters, metric='euclidean', n_jobs=None):
+        super(AssignCenters, self).__init__(metric=metric, n_jobs=n_jobs)
 
         if isinstance(clustercenters, six.string_types):
             from pyemma.coordinates.data import create_file_reader
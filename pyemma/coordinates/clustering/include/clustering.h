@@ -50,7 +50,12 @@ extern "C" {
 #define ASSIGN_ERR_NO_MEMORY 1
 #define ASSIGN_ERR_INVALID_METRIC 2
 
-static char ASSIGN_USAGE[] = "assign(chunk, centers, dtraj, metric)\n"\
+/* tile sizes of the euclidean nearest center search: the dot products of a tile of frames
+   with a tile of centers (256 x 512 floats) fit into the L2 cache */
+#define NEAREST_FRAME_BLOCK 256
+#define NEAREST_CENTER_BLOCK 512
+
+static char ASSIGN_USAGE[] = "assign(chunk, centers, dtraj, metric, n_threads=1)\n"\
 "Assigns frames in `chunk` to the closest cluster centers.\n"\
 "\n"\
 "Parameters\n"\
@@ -65,6 +70,9 @@ static char ASSIGN_USAGE[] = "assign(chunk, centers, dtraj, metric)\n"\
 "    where d is the metric that is specified with the argument `metric`.\n"\
 "metric : string\n"\
 "    (input) One of \"euclidean\" or \"minRMSD\" (case sensitive).\n"\
+"n_threads : int, optional, default=1\n"\
+"    (input) number of threads the frames are distributed to, if compiled\n"\
+"    with OpenMP support. Values <= 0 use the OpenMP default.\n"\
 "\n"\
 "Returns \n"\
 "-------\n"\
@@ -72,17 +80,45 @@ static char ASSIGN_USAGE[] = "assign(chunk, centers, dtraj, metric)\n"\
 "\n"\
 "Note\n"\
 "----\n"\
-"This function uses the minRMSD implementation of mdtraj.";
+"This function uses the minRMSD implementation of mdtraj. For the euclidean\n"\
+"metric, the closest centers are found by matrix products (BLAS sgemm of scipy,\n"\
+"if available). The GIL is released during the assignment.";
 
 // euclidean metric
 float euclidean_distance(float *SKP_restrict a, float *SKP_restrict b, size_t n, float *buffer_a, float *buffer_b);
 // minRMSD metric
 float minRMSD_distance(float *SKP_restrict a, float *SKP_restrict b, size_t n, float *SKP_restrict buffer_a, float *SKP_restrict buffer_b);
+// minRMSD metric of frames which have been centered already, given their traces
+float minRMSD_distance_precentered(float *SKP_restrict a, float *SKP_restrict b, size_t n, float trace_a, float trace_b);
+
+/* Frames are prepared for repeated distance computations by prepare_frames: for the minRMSD metric, the
+   frames are copied, centered and their traces are computed once, for the euclidean metric the frames are
+   used as they are and traces is NULL. The result has to be released by free_prepared_frames. */
+int prepare_frames(float *frames, Py_ssize_t N_frames, Py_ssize_t dim, int minrmsd,
+                   float **prepared, float **traces, int n_threads);
+// copies frames into centered (N_frames x dim), centers them and writes their traces
+void precenter_frames(float *frames, Py_ssize_t N_frames, Py_ssize_t dim, float *centered, float *traces,
+                      int n_threads);
+void free_prepared_frames(float *prepared, float *traces);
+
+// distance between frame i of a and frame j of b, both prepared by prepare_frames
+static inline float pair_distance(float *a, float *traces_a, Py_ssize_t i, float *b, float *traces_b, Py_ssize_t j,
+                                  Py_ssize_t dim)
+{
+    if(traces_a) return minRMSD_distance_precentered(&a[i*dim], &b[j*dim], dim, traces_a[i], traces_b[j]);
+    return euclidean_distance(&a[i*dim], &b[j*dim], dim, NULL, NULL);
+}
 
+// looks up the BLAS sgemm of scipy, has to be called with the GIL held
+void load_blas(void);
+// nearest centers (and optionally the squared distances to them) for the euclidean metric
+int nearest_centers_euclidean(float *chunk, Py_ssize_t N_frames, float *centers, Py_ssize_t N_centers, Py_ssize_t dim,
+                              npy_int32 *dtraj, float *mindist2, int n_threads);
 // assignment to cluster centers from python
 PyObject *assign(PyObject *self, PyObject *args);
-// assignment to cluster centers from c
-int c_assign(float *chunk, float *centers, npy_int32 *dtraj, char* metric, Py_ssize_t N_frames, Py_ssize_t N_centers, Py_ssize_t dim);
+// assignment to cluster centers from c, optionally with the squared distances to them
+int c_assign(float *chunk, float *centers, npy_int32 *dtraj, float *mindist2, char* metric,
+             Py_ssize_t N_frames, Py_ssize_t N_centers, Py_ssize_t dim, int n_threads);
 
 #ifdef __cplusplus
 }
@@ -25,6 +25,7 @@ Created on 18.02.2015
 from __future__ import absolute_import
 from pyemma.coordinates.transform.transformer import Transformer
 from pyemma.util.files import mkdir_p
+from pyemma.util.types import is_int
 from pyemma.util.discrete_trajectories import index_states, sample_indexes_by_state
 
 import numpy as np
@@ -41,9 +42,16 @@ class AbstractClustering(Transformer):
     provides a common interface for cluster algorithms.
     """
 
-    def __init__(self, metric='euclidean'):
+    # maximum dimension and minimum number of centers for which center_index='auto' uses a kd-tree
+    MAX_INDEX_DIMENSION = 10
+    MIN_INDEX_CENTERS = 256
+
+    def __init__(self, metric='euclidean', n_jobs=None):
         super(AbstractClustering, self).__init__()
         self.metric = metric
+        self.n_jobs = n_jobs
+        self.center_index = 'auto'
+        self._center_tree = None
         self._clustercenters = None
         self._previous_stride = -1
         self._dtrajs = []
@@ -55,6 +63,68 @@ class AbstractClustering(Transformer):
         """ Array containing the coordinates of the calculated cluster centers. """
         return self._clustercenters
 
+    @property
+    def n_jobs(self):
+        """ Number of threads used to assign data to the cluster centers. None means the OpenMP
+        default, which is the value of the environment variable OMP_NUM_THREADS or the number of cores.
+        """
+        return self._n_jobs
+
+    @n_jobs.setter
+    def n_jobs(self, value):
+        if value is not None and (not is_int(value) or value < 1):
+            raise ValueError('n_jobs has to be a positive integer or None, but was %s' % str(value))
+        self._n_jobs = value
+
+    @property
+    def _n_threads(self):
+        # thread count argument of the C extensions, where 0 means the OpenMP default
+        return 0 if self.n_jobs is None else self.n_jobs
+
+    @property
+    def center_index(self):
+        """ Spatial index over the cluster centers used to assign data to them.
+
+        * 'auto': a kd-tree if the metric is euclidean, the dimension is at most
+          :attr:`MAX_INDEX_DIMENSION` and there are at least :attr:`MIN_INDEX_CENTERS` centers.
+          Otherwise every frame is compared with every center.
+        * 'kdtree': a kd-tree whenever the metric is euclidean.
+        * None: every frame is compared with every center.
+
+        The kd-tree finds the exact nearest centers (in double precision) in a time which
+        grows logarithmically with the number of centers in low dimensions.
+        """
+        return self._center_index
+
+    @center_index.setter
+    def center_index(self, value):
+        if value not in ('auto', 'kdtree', None):
+            raise ValueError("center_index has to be 'auto', 'kdtree' or None, but was %s" % str(value))
+        self._center_index = value
+
+    def _use_center_tree(self):
+        if self.metric != 'euclidean' or self.center_index is None:
+            return False
+        if self.center_index == 'kdtree':
+            return True
+        n_centers, dim = np.shape(self.clustercenters)
+        return dim <= self.MAX_INDEX_DIMENSION and n_centers >= self.MIN_INDEX_CENTERS
+
+    def _center_tree_query(self, X):
+        # the tree is rebuilt whenever the cluster centers have been replaced
+        centers = self.clustercenters
+        if self._center_tree is None or self._center_tree[0] is not centers:
+            from scipy.spatial import cKDTree
+            self._center_tree = (centers, cKDTree(np.asarray(centers, dtype=np.float32).astype(np.float64)))
+        tree = self._center_tree[1]
+        workers = -1 if self.n_jobs is None else self.n_jobs
+        try:
+            _, dtraj = tree.query(X, k=1, workers=workers)
+        except TypeError:
+            # scipy < 1.6
+            _, dtraj = tree.query(X, k=1, n_jobs=workers)
+        return dtraj
+
     @property
     def overwrite_dtrajs(self):
         """
@@ -123,11 +193,22 @@ class AbstractClustering(Transformer):
 
         return sample_indexes_by_state(self._index_states[clusters], nsample, replace=replace)
 
+    def partial_fit(self, X, stride=1):
+        # discrete trajectories of previously seen data are not valid anymore
+        self._dtrajs = []
+        self._index_states = []
+        return super(AbstractClustering, self).partial_fit(X, stride=stride)
+
+    partial_fit.__doc__ = Transformer.partial_fit.__doc__
+
     def _transform_array(self, X):
         """get closest index of point in :attr:`clustercenters` to x."""
-        dtraj = np.empty(X.shape[0], dtype=self.output_type())
-        regspatial.assign(X.astype(np.float32, order='C', copy=False),
-                          self.clustercenters, dtraj, self.metric)
+        if self._use_center_tree():
+            dtraj = self._center_tree_query(X.astype(np.float32, copy=False)).astype(self.output_type())
+        else:
+            dtraj = np.empty(X.shape[0], dtype=self.output_type())
+            regspatial.assign(X.astype(np.float32, order='C', copy=False),
+                              self.clustercenters, dtraj, self.metric, self._n_threads)
         res = dtraj[:, None]  # always return a column vector in this function
         return res
 
@@ -33,17 +33,44 @@ import numpy as np
 from . import kmeans_clustering
 
 from pyemma.util.annotators import doc_inherit
+from pyemma.util.types import is_int
 from pyemma.coordinates.clustering.interface import AbstractClustering
 from six.moves import range
 
-__all__ = ['KmeansClustering']
+__all__ = ['KmeansClustering', 'MiniBatchKmeansClustering', 'StreamingKmeansClustering']
+
+
+def _sample_without_replacement(random_state, n, k):
+    r""" sorted random subset of k of the numbers 0...n-1, drawn without an array of size n if k << n """
+    if 4 * k > n:
+        return np.sort(random_state.permutation(n)[:k])
+    sample = np.unique(random_state.randint(0, n, size=k))
+    while len(sample) < k:
+        sample = np.unique(np.concatenate((sample, random_state.randint(0, n, size=k - len(sample)))))
+    return sample
+
+
+def _update_centers_online(centers, center_buffer, counts, X, metric, n_threads):
+    r""" Moves every center to the mean of all frames assigned to it so far (MacQueen's update, ie. a learning
+    rate of one over the number of frames of the center). The frames are assigned to center_buffer, the float32
+    copy of the centers. centers (float64), center_buffer and counts are updated in place. """
+    sums = np.zeros_like(centers)
+    n = np.zeros(len(centers), dtype=np.int64)
+    kmeans_clustering.accumulate(X, center_buffer, metric, sums, n, n_threads)
+    counts += n
+    nz = n > 0
+    centers[nz] += (sums[nz] - n[nz, None] * centers[nz]) / counts[nz, None]
+    center_buffer[nz] = centers[nz]
 
 
 class KmeansClustering(AbstractClustering):
     r"""k-means clustering"""
 
+    ALGORITHMS = ('lloyd', 'hamerly', 'elkan')
+
     def __init__(self, n_clusters, max_iter=5, metric='euclidean',
-                 tolerance=1e-5, init_strategy='kmeans++', fixed_seed=False, oom_strategy='memmap'):
+                 tolerance=1e-5, init_strategy='kmeans++', fixed_seed=False, oom_strategy='memmap',
+                 algorithm='lloyd'):
         r"""Kmeans clustering
 
         Parameters
@@ -64,8 +91,11 @@ class KmeansClustering(AbstractClustering):
             metric to use during clustering ('euclidean', 'minRMSD')
 
         init_strategy : string
-            can be either 'kmeans++' or 'uniform', determining how the initial
-            cluster centers are being chosen
+            can be either 'kmeans++', 'kmeans||' or 'uniform', determining how
+            the initial cluster centers are being chosen. 'kmeans||' (scalable
+            kmeans++) samples candidates in a few multithreaded passes over the
+            data and reduces them to n_clusters centers by kmeans++ on the
+            candidates. It is much faster than 'kmeans++' for many centers.
             
         fixed_seed : bool
             if True, the seed gets set to 42
@@ -78,7 +108,26 @@ class KmeansClustering(AbstractClustering):
                 mapped file is created and written to
             * 'raise': raise OutOfMemory exception.
 
+        algorithm : string, default='lloyd'
+            how the k-means iterations are performed.
+
+            * 'lloyd': every iteration computes the distances of all frames to
+                all centers.
+            * 'hamerly': keeps an upper bound of the distance of every frame to
+                its center and a lower bound of the distance to the second
+                closest center. By the triangle inequality, the distances of most
+                frames do not have to be recomputed. Needs little extra memory.
+            * 'elkan': like 'hamerly', but with a lower bound of the distance to
+                every center, which skips more distance computations. Needs
+                memory for n_clusters bounds per frame.
+
+            With 'hamerly' and 'elkan', the iteration stops when no frame changes
+            its center anymore (tolerance is not used). The resulting centers are
+            those of 'lloyd' run to convergence.
+
         """
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError('algorithm has to be one of %s, but was "%s"' % (', '.join(self.ALGORITHMS), algorithm))
         super(KmeansClustering, self).__init__(metric=metric)
         self.n_clusters = n_clusters
         self.max_iter = max_iter
@@ -89,14 +138,23 @@ class KmeansClustering(AbstractClustering):
         self._oom_strategy = oom_strategy
         self._custom_param_progress_handling = True
         self._fixed_seed = fixed_seed
+        # number of data points assigned to each center (weights for partial_fit)
+        self._center_counts = None
+        self._algorithm = algorithm
+        # per frame assignments and distance bounds of the 'hamerly' and 'elkan' iterations
+        self._bounds = None
 
     def _param_init(self):
         self._prev_cost = 0
+        self._bounds = None
+        self._center_counts = None
         self._cluster_centers_iter = []
         self._init_centers_indices = {}
         self._t_total = 0
         if self._init_strategy == 'kmeans++':
             self._progress_register(self.n_clusters, description="initialize kmeans++ centers", stage=0)
+        elif self._init_strategy == 'kmeans||':
+            self._progress_register(1, description="initialize kmeans|| centers", stage=0)
         self._progress_register(self.max_iter, description="kmeans iterations", stage=1)
         traj_lengths = self.trajectory_lengths(stride=self._param_with_stride)
         total_length = sum(traj_lengths)
@@ -132,6 +190,7 @@ class KmeansClustering(AbstractClustering):
     def _param_finish(self):
         self._clustercenters = np.array(self._cluster_centers_iter)
         del self._cluster_centers_iter
+        self._bounds = None
 
         fh = None
         if isinstance(self._in_memory_chunks, np.memmap):
@@ -143,10 +202,28 @@ class KmeansClustering(AbstractClustering):
         if self._init_strategy == 'uniform':
             del self._centers_iter_list
             del self._init_centers_indices
-        if self._init_strategy == 'kmeans++':
+        if self._init_strategy in ('kmeans++', 'kmeans||'):
             self._progress_force_finish(0)
         self._progress_force_finish(1)
 
+    def _partial_fit(self, data_producer, stride=1):
+        if self._clustercenters is None or self._center_counts is None:
+            # no centers yet, so run the full k-means on the given data
+            self.data_producer = data_producer
+            self.parametrize(stride=stride)
+            return
+
+        # Online update (MacQueen): each center is the mean of all data points assigned to it
+        # at the time of their assignment.
+        centers = self._clustercenters.astype(np.float64)
+        center_buffer = np.array(self._clustercenters, dtype=np.float32, order='C')
+        counts = self._center_counts.astype(np.int64)
+        for _, X in data_producer.iterator(stride=stride):
+            X = np.require(X, dtype=np.float32, requirements='C')
+            _update_centers_online(centers, center_buffer, counts, X, self.metric, self._n_threads)
+        self._clustercenters = center_buffer
+        self._center_counts = counts
+
     def kmeanspp_center_assigned(self):
         self._progress_update(1, stage=0)
 
@@ -167,20 +244,12 @@ class KmeansClustering(AbstractClustering):
                 converged_in_max_iter = False
                 while it < self.max_iter:
                     # self._logger.info("step %i" % (it + 1))
-                    old_centers = self._cluster_centers_iter
-                    self._cluster_centers_iter = kmeans_clustering.cluster(self._in_memory_chunks,
-                                                                      self._cluster_centers_iter, self.metric)
-                    self._cluster_centers_iter = [row for row in self._cluster_centers_iter]
-
-                    cost = kmeans_clustering.cost_function(self._in_memory_chunks,
-                                                           self._cluster_centers_iter,
-                                                           self.metric,
-                                                           self.n_clusters)
-                    rel_change = np.abs(cost - self._prev_cost) / cost
-                    self._prev_cost = cost
-
-                    #if np.allclose(old_centers, self._cluster_centers, rtol=self._tolerance):
-                    if rel_change <= self._tolerance:
+                    if self._algorithm == 'lloyd':
+                        converged = self._lloyd_step() <= self._tolerance
+                    else:
+                        converged = self._bounded_step()
+
+                    if converged:
                         converged_in_max_iter = True
                         self._logger.info("Cluster centers converged after %i steps."
                                           % (it + 1))
@@ -199,6 +268,48 @@ class KmeansClustering(AbstractClustering):
                 return True
         return True
 
+    def _lloyd_step(self):
+        r""" Performs one Lloyd iteration on the collected data.
+
+        Returns
+        -------
+        rel_change : float
+            relative change of the k-means cost with respect to the previous iteration. The cost
+            (sum of squared distances of the frames to their closest centers) is computed in the
+            same sweep over the data as the new centers.
+        """
+        new_centers, cost, counts = kmeans_clustering.cluster(self._in_memory_chunks, self._cluster_centers_iter,
+                                                              self.metric, self._n_threads)
+        self._cluster_centers_iter = [row for row in new_centers]
+        # weight of the centers for subsequent calls of partial_fit
+        self._center_counts = counts
+        rel_change = 0.0 if cost == 0 else np.abs(cost - self._prev_cost) / cost
+        self._prev_cost = cost
+        return rel_change
+
+    def _bounded_step(self):
+        r""" Performs one iteration of Hamerly's or Elkan's algorithm on the collected data.
+
+        Returns
+        -------
+        converged : bool
+            True, if no frame has changed its center.
+        """
+        if self._bounds is None:
+            n = len(self._in_memory_chunks)
+            k = len(self._cluster_centers_iter)
+            # negative labels let the first iteration compute all distances
+            self._bounds = (np.full(n, -1, dtype=np.int32), np.empty(n, dtype=np.float32),
+                            np.empty((n, k) if self._algorithm == 'elkan' else n, dtype=np.float32))
+        labels, upper, lower = self._bounds
+        new_centers, n_changed, counts = kmeans_clustering.cluster_bounded(self._in_memory_chunks,
+                                                                           self._cluster_centers_iter, self.metric,
+                                                                           self._algorithm, labels, upper, lower,
+                                                                           self._n_threads)
+        self._cluster_centers_iter = [row for row in new_centers]
+        self._center_counts = counts
+        return n_changed == 0
+
     def _initialize_centers(self, X, itraj, t, last_chunk, ipass):
         if ipass == 0:
             if self._init_strategy == 'uniform':
@@ -206,12 +317,22 @@ class KmeansClustering(AbstractClustering):
                     for l in range(len(X)):
                         if len(self._cluster_centers_iter) < self.n_clusters and t + l in self._init_centers_indices[itraj]:
                             self._cluster_centers_iter.append(X[l].astype(np.float32, order='C'))
-            elif last_chunk and self._init_strategy == 'kmeans++':
-                kmeans_clustering.set_callback(self.kmeanspp_center_assigned)
-                cc = kmeans_clustering.init_centers(self._in_memory_chunks,
-                                                    self.metric, self.n_clusters, not self._fixed_seed)
+            elif last_chunk and self._init_strategy in ('kmeans++', 'kmeans||'):
+                cc = self._choose_initial_centers(self._in_memory_chunks)
                 self._cluster_centers_iter = [c for c in cc]
 
+    def _choose_initial_centers(self, data):
+        r""" chooses n_clusters initial centers from the given frames by kmeans++ or k-means|| """
+        if self._init_strategy == 'kmeans||':
+            seed = 42 if self._fixed_seed else np.random.randint(2 ** 31)
+            centers = kmeans_clustering.init_centers_parallel(data, self.metric, self.n_clusters, seed,
+                                                              self._n_threads)
+            self._progress_update(1, stage=0)
+        else:
+            kmeans_clustering.set_callback(self.kmeanspp_center_assigned)
+            centers = kmeans_clustering.init_centers(data, self.metric, self.n_clusters, not self._fixed_seed)
+        return centers
+
     def _collect_data(self, X, first_chunk, stride):
         # beginning - compute
         if first_chunk:
@@ -228,81 +349,285 @@ class KmeansClustering(AbstractClustering):
         self._t_total += len(X)
 
 
-class MiniBatchKmeansClustering(KmeansClustering):
-    r"""Mini-batch k-means clustering"""
+class StreamingKmeansClustering(KmeansClustering):
+    r"""k-means clustering in passes over the data, without holding it in memory"""
 
-    def __init__(self, n_clusters, max_iter=5, metric='euclidean', tolerance=1e-5, init_strategy='kmeans++',
-                 batch_size=0.2, oom_strategy='memmap'):
-        super(MiniBatchKmeansClustering, self).__init__(n_clusters, max_iter, metric, tolerance, init_strategy, False,
-                                                        oom_strategy)
-        self._batch_size = batch_size
-        if self._batch_size > 1:
-            raise ValueError("batch_size should be less or equal to 1, but was %s" % batch_size)
+    def __init__(self, n_clusters, max_iter=10, metric='euclidean', tolerance=1e-5, init_strategy='kmeans++',
+                 fixed_seed=False, init_sample_size=None, param_cache=None):
+        r"""Streaming k-means clustering
 
-    def _init_in_memory_chunks(self, size):
-        return super(MiniBatchKmeansClustering, self)._init_in_memory_chunks(self._n_samples)
-
-    def _draw_mini_batch_sample(self):
-        offset = 0
-        for idx, traj_len in enumerate(self._traj_lengths):
-            self._random_access_stride[offset:offset + self._n_samples_traj[idx], 0] = idx * np.ones(
-                self._n_samples_traj[idx], dtype=int)
-            self._random_access_stride[offset:offset + self._n_samples_traj[idx], 1] = np.sort(
-                random.sample(list(range(traj_len)), self._n_samples_traj[idx])).T
-            offset += self._n_samples_traj[idx]
-        return self._random_access_stride
+        Every Lloyd iteration is one pass over the output of the data producer,
+        in which the chunks are assigned to the current centers and the sums and
+        counts of the frames of every center are accumulated. Only the centers
+        are kept in memory, so the size of the data is not limited by the main
+        memory. The initial centers are chosen in an additional first pass from
+        a random sample of frames.
+
+        Parameters
+        ----------
+        n_clusters : int
+            amount of cluster centers
+
+        max_iter : int
+            maximum number of iterations (passes over the data after the initialization).
+
+        metric : str
+            metric to use during clustering ('euclidean', 'minRMSD')
+
+        tolerance : float
+            stop iteration when the relative change in the cost function
+
+            ..1:                C(S) = \sum_{i=1}^{k} \sum_{\mathbf x \in S_i} \left\| \mathbf x - \boldsymbol\mu_i \right\|^2
+
+            is smaller than tolerance.
+
+        init_strategy : string
+            can be either 'kmeans++', 'kmeans||' or 'uniform'. With 'kmeans++'
+            ('kmeans||'), the initial centers are chosen by the kmeans++
+            (scalable kmeans++) algorithm from a random sample of the data, with
+            'uniform' they are drawn uniformly from the data.
+
+        fixed_seed : bool
+            if True, the seed gets set to 42
+
+        init_sample_size : int, optional, default=None
+            number of frames the kmeans++ (kmeans||) initialization is performed on. By
+            default 100 frames per cluster center.
+
+        param_cache : PassCache, optional, default=None
+            buffer for the output of the data producer, so that it is not
+            recomputed in every iteration (see :class:`PassCache
+            <pyemma.coordinates.util.pass_cache.PassCache>`). Useful if the
+            data producer is expensive, eg. a feature reader.
+
+        """
+        super(StreamingKmeansClustering, self).__init__(n_clusters, max_iter=max_iter, metric=metric,
+                                                        tolerance=tolerance, init_strategy=init_strategy,
+                                                        fixed_seed=fixed_seed)
+        self.init_sample_size = init_sample_size
+        self.param_cache = param_cache
+
+    def describe(self):
+        return "[Streaming Kmeans, k=%i]" % self.n_clusters
 
     def _param_init(self):
-        self._traj_lengths = self.trajectory_lengths(stride=self._param_with_stride)
-        self._total_length = sum(self._traj_lengths)
-        samples = int(math.ceil(self._total_length * self._batch_size))
-        self._n_samples = 0
-        self._n_samples_traj = {}
         self._prev_cost = 0
-        for idx, traj_len in enumerate(self._traj_lengths):
-            traj_samples = int(math.floor(traj_len / float(self._total_length) * samples))
-            self._n_samples_traj[idx] = traj_samples
-            self._n_samples += traj_samples
+        self._cluster_centers_iter = []
+        traj_lengths = self.trajectory_lengths(stride=self._param_with_stride)
+        total_length = sum(traj_lengths)
+        if total_length < self.n_clusters:
+            raise ValueError('can not find %i cluster centers in %i frames' % (self.n_clusters, total_length))
+        if self._init_strategy in ('kmeans++', 'kmeans||'):
+            if self._init_strategy == 'kmeans++':
+                self._progress_register(self.n_clusters, description="initialize kmeans++ centers", stage=0)
+            else:
+                self._progress_register(1, description="initialize kmeans|| centers", stage=0)
+            n_samples = 100 * self.n_clusters if self.init_sample_size is None else self.init_sample_size
+            n_samples = min(max(n_samples, self.n_clusters), total_length)
+        else:
+            n_samples = self.n_clusters
+        self._progress_register(self.max_iter, description="kmeans iterations", stage=1)
 
-        self._random_access_stride = np.empty(shape=(self._n_samples, 2), dtype=int)
+        # random frames of every trajectory, in proportion to its length, to draw the initial centers from
+        random_state = np.random.RandomState(42 if self._fixed_seed else None)
+        exact = np.asarray(traj_lengths, dtype=float) / total_length * n_samples
+        counts = np.floor(exact).astype(int)
+        # distribute the remaining frames by the largest remainders
+        missing = n_samples - counts.sum()
+        counts[np.argsort(counts - exact)[:missing]] += 1
+        self._init_sample_indices = [_sample_without_replacement(random_state, l, n)
+                                     for l, n in zip(traj_lengths, counts)]
+        self._init_sample = []
 
-        super(MiniBatchKmeansClustering, self)._param_init()
+    def _param_add_data(self, X, itraj, t, first_chunk, last_chunk_in_traj, last_chunk, ipass, Y=None, stride=1):
+        if ipass == 0:
+            # collect the sample of frames for the initialization
+            indices = self._init_sample_indices[itraj]
+            selected = indices[(indices >= t) & (indices < t + len(X))] - t
+            if len(selected) > 0:
+                self._init_sample.append(np.asarray(X[selected], dtype=np.float32))
+            if last_chunk:
+                self._init_centers()
+            return False
 
-        # Drawing mini batch sample on initialization such that sampled data is available upon the first call of
-        # _param_add_data. Returning the below 2-tuple ensures that this is happening.
-        return 0, self._draw_mini_batch_sample()
+        if first_chunk:
+            dim = self._clustercenters.shape[1]
+            self._sums = np.zeros((self.n_clusters, dim))
+            self._counts = np.zeros(self.n_clusters, dtype=np.int64)
+            self._cost = 0.0
+            self._centers_list = [c for c in self._clustercenters]
+
+        # accumulate the frames of every center and the cost of the current centers
+        X = np.require(X, dtype=np.float32, requirements='C')
+        self._cost += kmeans_clustering.accumulate(X, self._centers_list, self.metric, self._sums, self._counts,
+                                                   self._n_threads)
+
+        if last_chunk:
+            return self._lloyd_update(ipass)
+        return False
+
+    def _init_centers(self):
+        sample = np.concatenate(self._init_sample)
+        del self._init_sample, self._init_sample_indices
+        if self._init_strategy in ('kmeans++', 'kmeans||'):
+            centers = self._choose_initial_centers(np.ascontiguousarray(sample))
+        else:
+            centers = sample
+        self._clustercenters = np.array(centers, dtype=np.float32)
+
+    def _lloyd_update(self, ipass):
+        # move the centers to the means of their frames, centers without frames stay where they are
+        old_centers = self._clustercenters
+        centers = old_centers.astype(np.float64)
+        nz = self._counts > 0
+        centers[nz] = self._sums[nz] / self._counts[nz, None]
+        self._clustercenters = centers.astype(np.float32)
+        self._center_counts = self._counts
+        del self._sums, self._counts, self._centers_list
+
+        cost = self._cost
+        converged = cost == 0 or np.abs(cost - self._prev_cost) / cost <= self._tolerance
+        self._prev_cost = cost
+        if converged:
+            self._logger.info("Cluster centers converged after %i steps." % ipass)
+            return True
+        self._progress_update(1, stage=1)
+        if ipass >= self.max_iter:
+            self._logger.info("Algorithm did not reach convergence criterion"
+                              " of %g in %i iterations. Consider increasing max_iter."
+                              % (self._tolerance, self.max_iter))
+            return True
+        return False
+
+    def _param_finish(self):
+        if self._init_strategy in ('kmeans++', 'kmeans||'):
+            self._progress_force_finish(0)
+        self._progress_force_finish(1)
+
+
+class MiniBatchKmeansClustering(StreamingKmeansClustering):
+    r"""Mini-batch k-means clustering"""
+
+    def __init__(self, n_clusters, max_iter=5, metric='euclidean', tolerance=1e-5, init_strategy='kmeans++',
+                 batch_size=1000, oom_strategy='memmap', fixed_seed=False, init_sample_size=None, param_cache=None):
+        r"""Mini-batch k-means clustering
+
+        Online k-means with a learning rate per cluster center (Sculley [1]_).
+        The initial centers are chosen in a first pass from a random sample of
+        frames, like in :class:`StreamingKmeansClustering`. Then the data is
+        streamed in sequential passes, and every chunk is split into
+        mini-batches. The frames of a mini-batch are assigned to the current
+        centers, and every center moves towards its frames with a learning rate
+        of one over the number of frames assigned to it so far. Only the centers
+        are kept in memory.
+
+        Parameters
+        ----------
+        n_clusters : int
+            amount of cluster centers
+
+        max_iter : int
+            maximum number of passes over the data (after the initialization).
+
+        metric : str
+            metric to use during clustering ('euclidean', 'minRMSD')
+
+        tolerance : float
+            stop when the mean squared movement of the centers during a pass is
+            smaller than tolerance times the variance of the data (estimated
+            from the initialization sample).
+
+        init_strategy : string
+            can be either 'kmeans++', 'kmeans||' or 'uniform', see
+            :class:`StreamingKmeansClustering`.
+
+        batch_size : int or float, default=1000
+            number of frames of a mini-batch. A float in (0, 1] is the fraction
+            of all frames. Mini-batches do not span several chunks, so they are
+            at most as large as a chunk.
+
+        oom_strategy : string
+            not used, the data is never held in memory.
+
+        fixed_seed : bool
+            if True, the seed gets set to 42
+
+        init_sample_size : int, optional, default=None
+            number of frames the initial centers are chosen from. By default
+            100 frames per cluster center.
+
+        param_cache : PassCache, optional, default=None
+            buffer for the output of the data producer, so that it is not
+            recomputed in every pass (see :class:`PassCache
+            <pyemma.coordinates.util.pass_cache.PassCache>`).
+
+        References
+        ----------
+        .. [1] D. Sculley. Web-scale k-means clustering. Proceedings of the 19th
+           international conference on World Wide Web, 1177-1178 (2010).
+
+        """
+        if not (is_int(batch_size) and batch_size >= 1) and not 0 < batch_size <= 1:
+            raise ValueError("batch_size has to be a positive number of frames or a fraction of the frames "
+                             "(less or equal to 1), but was %s" % batch_size)
+        super(MiniBatchKmeansClustering, self).__init__(n_clusters, max_iter=max_iter, metric=metric,
+                                                        tolerance=tolerance, init_strategy=init_strategy,
+                                                        fixed_seed=fixed_seed, init_sample_size=init_sample_size,
+                                                        param_cache=param_cache)
+        self._batch_size = batch_size
+
+    def describe(self):
+        return "[Mini-batch Kmeans, k=%i]" % self.n_clusters
+
+    def _param_init(self):
+        super(MiniBatchKmeansClustering, self)._param_init()
+        if is_int(self._batch_size):
+            self._batch_frames = int(self._batch_size)
+        else:
+            total_length = sum(self.trajectory_lengths(stride=self._param_with_stride))
+            self._batch_frames = max(1, int(math.ceil(total_length * self._batch_size)))
+
+    def _init_centers(self):
+        # the scale of the center movements, which the tolerance refers to
+        sample = np.concatenate(self._init_sample)
+        self._variance = np.mean(np.var(sample, axis=0, dtype=np.float64))
+        super(MiniBatchKmeansClustering, self)._init_centers()
+        self._centers = self._clustercenters.astype(np.float64)
+        # the batches are assigned to a float32 copy of the centers, which is updated in place
+        self._center_buffer = self._clustercenters.copy()
+        self._center_counts = np.zeros(self.n_clusters, dtype=np.int64)
 
-    # @profile
     def _param_add_data(self, X, itraj, t, first_chunk, last_chunk_in_traj, last_chunk, ipass, Y=None, stride=1):
-        # collect data
-        self._collect_data(X, first_chunk, stride)
-        # initialize cluster centers
-        self._initialize_centers(X, itraj, t, last_chunk, ipass)
-        converged_in_max_iter = False
+        if ipass == 0:
+            # sample the initial centers
+            return super(MiniBatchKmeansClustering, self)._param_add_data(X, itraj, t, first_chunk,
+                                                                          last_chunk_in_traj, last_chunk, ipass,
+                                                                          Y=Y, stride=stride)
+        if first_chunk:
+            self._pass_start = self._centers.copy()
+
+        X = np.require(X, dtype=np.float32, requirements='C')
+        for start in range(0, len(X), self._batch_frames):
+            _update_centers_online(self._centers, self._center_buffer, self._center_counts,
+                                   X[start:start + self._batch_frames], self.metric, self._n_threads)
 
         if last_chunk:
-            self._cluster_centers_iter = kmeans_clustering.cluster(self._in_memory_chunks,
-                                                              self._cluster_centers_iter, self.metric)
-            self._cluster_centers_iter = [row for row in self._cluster_centers_iter]
-
-            cost = kmeans_clustering.cost_function(self._in_memory_chunks, self._cluster_centers_iter, self.metric,
-                                                   self.n_clusters)
-            rel_change = np.abs(cost - self._prev_cost) / cost
-            self._prev_cost = cost
-            self._cluster_centers = np.array(self._cluster_centers_iter)
-
-            if rel_change <= self._tolerance:
-                converged_in_max_iter = True
-                self._logger.info("Cluster centers converged after %i steps." % (ipass + 1))
-                self._progress_force_finish(stage=1)
-            else:
-                self._progress_update(1, stage=1)
-            if converged_in_max_iter or ipass + 1 >= self.max_iter:
-                if not converged_in_max_iter:
-                    self._logger.info("Algorithm did not reach convergence criterion"
-                                      " of %g in %i iterations. Consider increasing max_iter."
-                                      % (self._tolerance, self.max_iter))
+            # the centers are published once per pass, the tree over the previous ones is outdated
+            self._clustercenters = self._center_buffer.copy()
+            self._center_tree = None
+            movement = np.mean(np.sum((self._centers - self._pass_start) ** 2, axis=1))
+            del self._pass_start
+            if movement <= self._tolerance * self._variance:
+                self._logger.info("Cluster centers converged after %i passes." % ipass)
                 return True
-            return False, 0, self._draw_mini_batch_sample()
-        else:
-            return False
\ No newline at end of file
+            self._progress_update(1, stage=1)
+            if ipass >= self.max_iter:
+                self._logger.info("Algorithm did not reach convergence criterion"
+                                  " of %g in %i iterations. Consider increasing max_iter."
+                                  % (self._tolerance, self.max_iter))
+                return True
+        return False
+
+    def _param_finish(self):
+        del self._centers, self._center_buffer, self._variance
+        super(MiniBatchKmeansClustering, self)._param_finish()
@@ -52,6 +52,12 @@ class RegularSpaceClustering(AbstractClustering):
         every center, it also becomes a center. In the second pass, a Voronoi
         discretization with the computed centers is used to partition the data.
 
+        A frame is not compared to all centers found so far: the centers are
+        indexed by a grid of cells of width dmin (euclidean metric in up to four
+        dimensions) or by their distance to the first center, which by the
+        triangle inequality bounds their distance to the frame (otherwise). The
+        same index is used to assign data to many centers (center_index='auto').
+
 
         Parameters
         ----------
@@ -76,9 +82,11 @@ class RegularSpaceClustering(AbstractClustering):
         super(RegularSpaceClustering, self).__init__(metric=metric)
 
         self._dmin = dmin
-        # temporary list to store cluster centers
-        self.__clustercenters = []
+        # state of the clustering (found centers and the index over them), kept for all chunks of a pass
+        self.__clustering = None
         self._max_centers = max_centers
+        # index over the cluster centers for the assignment, with the centers and parameters it was built for
+        self._regspace_index = None
 
     @doc_inherit
     def describe(self):
@@ -113,6 +121,25 @@ class RegularSpaceClustering(AbstractClustering):
         self._max_centers = int(value)
         self._parametrized = False
 
+    def _param_init(self):
+        self.__clustering = None
+
+    def _start_clustering(self, centers):
+        self.__clustering = regspatial.start_clustering(np.array(centers, dtype=np.float32, order='C', ndmin=2),
+                                                        self._dmin, self.metric, self._max_centers)
+
+    def _cluster(self, X):
+        r""" adds the new centers found in X to the clustering """
+        X = X.astype(np.float32, order='C', copy=False)
+        if self.__clustering is None:
+            self._start_clustering(np.empty((0, X.shape[1]), dtype=np.float32))
+        regspatial.cluster(X, self.__clustering)
+
+    def _found_centers(self):
+        if self.__clustering is None:
+            return np.array([])
+        return regspatial.clustering_centers(self.__clustering)
+
     def _param_add_data(self, X, itraj, t, first_chunk, last_chunk_in_traj,
                         last_chunk, ipass, Y=None, stride=1):
         """
@@ -122,9 +149,7 @@ class RegularSpaceClustering(AbstractClustering):
          3. add new centroid, if min(distance to all other clustercenters) >= dmin
         """
         try:
-            regspatial.cluster(X.astype(np.float32, order='C', copy=False),
-                               self.__clustercenters, self._dmin,
-                               self.metric, self._max_centers)
+            self._cluster(X)
             # finished regularly
             if last_chunk:
                 return True  # finished!
@@ -135,18 +160,70 @@ class RegularSpaceClustering(AbstractClustering):
             self._logger.warning(msg)
             warnings.warn(msg)
             # finished anyway, because we have no more space for clusters. Rest of trajectory has no effect
-            self._clustercenters = np.array(self.__clustercenters)
+            self._clustercenters = self._found_centers()
             self.n_clusters = self.clustercenters.shape[0]
             # TODO: pass amount of processed data
             raise NotConvergedWarning
 
         return False
 
+    def _partial_fit(self, data_producer, stride=1):
+        # new centers are added to the already existing ones
+        if self._clustercenters is not None:
+            self._start_clustering(self._clustercenters)
+        else:
+            self._param_init()
+        for _, X in data_producer.iterator(stride=stride):
+            try:
+                self._cluster(X)
+            except RuntimeError:
+                msg = 'Maximum number of cluster centers reached.' \
+                      ' Consider increasing max_centers or choose' \
+                      ' a larger minimum distance, dmin.'
+                self._logger.warning(msg)
+                warnings.warn(msg)
+                break
+        self._param_finish()
+
+    def fit(self, X, **kwargs):
+        r"""Computes the cluster centers of the given data only.
+
+        In contrast to :func:`partial_fit`, previously found centers are discarded.
+        """
+        self._clustercenters = None
+        # a previous partial_fit leaves the estimator parametrized with the same data producer
+        self._parametrized = False
+        return super(RegularSpaceClustering, self).fit(X, **kwargs)
+
     def _param_finish(self):
-        self._clustercenters = np.array(self.__clustercenters)
+        self._clustercenters = self._found_centers()
         self.n_clusters = self.clustercenters.shape[0]
 
-        if len(self.__clustercenters) == 1:
+        if self.n_clusters == 1:
             self._logger.warning('Have found only one center according to '
                                  'minimum distance requirement of %f' % self.dmin)
-        del self.__clustercenters  # delete temporary
\ No newline at end of file
+        # delete temporary
+        self.__clustering = None
+
+    def _use_regspace_index(self):
+        return (self.center_index == 'auto' and self._dmin > 0
+                and np.shape(self.clustercenters)[0] >= self.MIN_INDEX_CENTERS)
+
+    def _regspace_index_of_centers(self):
+        # the index is rebuilt whenever the cluster centers, dmin or the metric have been replaced
+        centers = self.clustercenters
+        key = (self._dmin, self.metric)
+        if self._regspace_index is None or self._regspace_index[0] is not centers \
+                or self._regspace_index[1] != key:
+            index = regspatial.build_index(np.ascontiguousarray(centers, dtype=np.float32), self._dmin,
+                                           self.metric, self._n_threads)
+            self._regspace_index = (centers, key, index)
+        return self._regspace_index[2]
+
+    def _transform_array(self, X):
+        if not self._use_regspace_index():
+            return super(RegularSpaceClustering, self)._transform_array(X)
+        dtraj = np.empty(X.shape[0], dtype=self.output_type())
+        regspatial.assign_indexed(X.astype(np.float32, order='C', copy=False), self._regspace_index_of_centers(),
+                                  dtraj, self._n_threads)
+        return dtraj[:, None]
@@ -46,52 +46,257 @@ float minRMSD_distance(float *SKP_restrict a, float *SKP_restrict b, size_t n, f
     return sqrt(msd);
 }
 
-int c_assign(float *chunk, float *centers, npy_int32 *dtraj, char* metric, Py_ssize_t N_frames, Py_ssize_t N_centers, Py_ssize_t dim) {
+float minRMSD_distance_precentered(float *SKP_restrict a, float *SKP_restrict b, size_t n, float trace_a, float trace_b)
+{
+    return sqrt(msd_atom_major(n/3, n/3, a, b, trace_a, trace_b, 0, NULL));
+}
+
+void precenter_frames(float *frames, Py_ssize_t N_frames, Py_ssize_t dim, float *centered, float *traces,
+                      int n_threads)
+{
+    Py_ssize_t i;
+
+    memcpy(centered, frames, N_frames*dim*sizeof(float));
+#ifdef USE_OPENMP
+    if(n_threads <= 0) n_threads = omp_get_max_threads();
+    #pragma omp parallel for schedule(static) num_threads(n_threads)
+#endif
+    for(i = 0; i < N_frames; ++i) {
+        inplace_center_and_trace_atom_major(&centered[i*dim], &traces[i], 1, dim/3);
+    }
+}
+
+int prepare_frames(float *frames, Py_ssize_t N_frames, Py_ssize_t dim, int minrmsd,
+                   float **prepared, float **traces, int n_threads)
+{
+    float *centered, *t;
+
+    if(!minrmsd) {
+        *prepared = frames;
+        *traces = NULL;
+        return ASSIGN_SUCCESS;
+    }
+    /* at least one element, so that NULL always means out of memory */
+    centered = malloc((N_frames*dim + 1)*sizeof(float));
+    t = malloc((N_frames + 1)*sizeof(float));
+    if(!centered || !t) {
+        free(centered);
+        free(t);
+        return ASSIGN_ERR_NO_MEMORY;
+    }
+    precenter_frames(frames, N_frames, dim, centered, t, n_threads);
+    *prepared = centered;
+    *traces = t;
+    return ASSIGN_SUCCESS;
+}
+
+void free_prepared_frames(float *prepared, float *traces)
+{
+    /* for the euclidean metric, the frames have not been copied */
+    if(traces) {
+        free(prepared);
+        free(traces);
+    }
+}
+
+/* sgemm of the BLAS scipy is linked against, NULL if it is not available */
+typedef void (*sgemm_t)(char *transa, char *transb, int *m, int *n, int *k, float *alpha, float *a, int *lda,
+                        float *b, int *ldb, float *beta, float *c, int *ldc);
+static sgemm_t sgemm = NULL;
+
+void load_blas(void)
+{
+    static int loaded = 0;
+    PyObject *module, *capi, *capsule;
+
+    if(loaded) return;
+    loaded = 1;
+    /* scipy exports the BLAS functions it is linked against as capsules */
+    module = PyImport_ImportModule("scipy.linalg.cython_blas");
+    if(!module) { PyErr_Clear(); return; }
+    capi = PyObject_GetAttrString(module, "__pyx_capi__");
+    Py_DECREF(module);
+    if(!capi) { PyErr_Clear(); return; }
+    capsule = PyDict_GetItemString(capi, "sgemm"); /* ref:borr. */
+    if(capsule && PyCapsule_CheckExact(capsule)) {
+        sgemm = (sgemm_t) PyCapsule_GetPointer(capsule, PyCapsule_GetName(capsule));
+    }
+    Py_DECREF(capi);
+    if(!sgemm) PyErr_Clear();
+}
+
+/* D[i*n_centers + j] = frames[i] . centers[j] */
+static void dot_tile(float *frames, Py_ssize_t n_frames, float *centers, Py_ssize_t n_centers, Py_ssize_t dim, float *D)
+{
+    Py_ssize_t i, j, k;
+    float sum;
+
+    if(sgemm) {
+        /* in column major order, D^T = centers * frames^T */
+        int m = (int) n_centers, n = (int) n_frames, K = (int) dim;
+        float alpha = 1.0f, beta = 0.0f;
+        char transa = 'T', transb = 'N';
+        sgemm(&transa, &transb, &m, &n, &K, &alpha, centers, &K, frames, &K, &beta, D, &m);
+        return;
+    }
+    for(i = 0; i < n_frames; ++i) {
+        for(j = 0; j < n_centers; ++j) {
+            sum = 0.0f;
+            for(k = 0; k < dim; ++k) {
+                sum += frames[i*dim + k] * centers[j*dim + k];
+            }
+            D[i*n_centers + j] = sum;
+        }
+    }
+}
+
+int nearest_centers_euclidean(float *chunk, Py_ssize_t N_frames, float *centers, Py_ssize_t N_centers, Py_ssize_t dim,
+                              npy_int32 *dtraj, float *mindist2, int n_threads)
+{
     int ret;
-    float d, mindist;
-    size_t argmin;
-    float *buffer_a, *buffer_b;
-    float (*distance)(float*, float*, size_t, float*, float*);
+    Py_ssize_t i, j, n_blocks;
+    float *shift, *shifted_centers, *center_norms;
+    double sum;
 
-    buffer_a = NULL; buffer_b = NULL;
     ret = ASSIGN_SUCCESS;
+    shift = malloc(dim*sizeof(float));
+    shifted_centers = malloc(N_centers*dim*sizeof(float));
+    center_norms = malloc(N_centers*sizeof(float));
+    if(!shift || !shifted_centers || !center_norms) {
+        ret = ASSIGN_ERR_NO_MEMORY; goto error;
+    }
 
-    /* init metric */
-    if(strcmp(metric,"euclidean")==0) {
-        distance = euclidean_distance;
-    } else if(strcmp(metric,"minRMSD")==0) {
-        distance = minRMSD_distance;
-        buffer_a = malloc(dim*sizeof(float));
-        buffer_b = malloc(dim*sizeof(float));
-        if(!buffer_a || !buffer_b) {
-            ret = ASSIGN_ERR_NO_MEMORY; goto error;
+    /* Distances are evaluated as |x-c|^2 = |x|^2 - 2 x.c + |c|^2, which loses precision if the data is far
+       from the origin compared to the distances. So frames and centers are shifted by the mean center. */
+    for(j = 0; j < dim; ++j) {
+        sum = 0.0;
+        for(i = 0; i < N_centers; ++i) sum += centers[i*dim + j];
+        shift[j] = (float) (sum / N_centers);
+    }
+    for(i = 0; i < N_centers; ++i) {
+        sum = 0.0;
+        for(j = 0; j < dim; ++j) {
+            shifted_centers[i*dim + j] = centers[i*dim + j] - shift[j];
+            sum += shifted_centers[i*dim + j] * shifted_centers[i*dim + j];
         }
-    } else {
-        ret = ASSIGN_ERR_INVALID_METRIC;
-        goto error;
+        center_norms[i] = (float) sum;
     }
 
-    /* do the assignment */
+    n_blocks = (N_frames + NEAREST_FRAME_BLOCK - 1) / NEAREST_FRAME_BLOCK;
+#ifdef USE_OPENMP
+    if(n_threads <= 0) n_threads = omp_get_max_threads();
+    #pragma omp parallel num_threads(n_threads)
+#endif
     {
-        Py_ssize_t i,j;
-//        #pragma omp for private(j, argmin, mindist)
-        for(i = 0; i < N_frames; ++i) {
-			mindist = FLT_MAX;
-            argmin = -1;
-            for(j = 0; j < N_centers; ++j) {
-                d = distance(&chunk[i*dim], &centers[j*dim], dim, buffer_a, buffer_b);
-//				#pragma omp critical
-            	{
-                	if(d<mindist) { mindist = d; argmin = j; }
-            	}
+        Py_ssize_t b, c0, i, j, k, start, nb, kb;
+        float *frames, *D, d;
+        float best[NEAREST_FRAME_BLOCK];
+        npy_int32 argmin[NEAREST_FRAME_BLOCK];
+        int failed;
+
+        /* every thread works on its own tiles of frames and dot products */
+        frames = malloc(NEAREST_FRAME_BLOCK*dim*sizeof(float));
+        D = malloc(NEAREST_FRAME_BLOCK*NEAREST_CENTER_BLOCK*sizeof(float));
+        failed = !frames || !D;
+        if(failed) {
+#ifdef USE_OPENMP
+            #pragma omp atomic write
+#endif
+            ret = ASSIGN_ERR_NO_MEMORY;
+        }
+
+#ifdef USE_OPENMP
+        #pragma omp for schedule(static)
+#endif
+        for(b = 0; b < n_blocks; ++b) {
+            if(failed) continue;
+            start = b * NEAREST_FRAME_BLOCK;
+            nb = N_frames - start < NEAREST_FRAME_BLOCK ? N_frames - start : NEAREST_FRAME_BLOCK;
+            for(i = 0; i < nb; ++i) {
+                for(k = 0; k < dim; ++k) {
+                    frames[i*dim + k] = chunk[(start + i)*dim + k] - shift[k];
+                }
+                best[i] = FLT_MAX;
+                argmin[i] = -1;
             }
-            dtraj[i] = argmin;
+            /* |x|^2 is the same for all centers, so |c|^2 - 2 x.c is minimized */
+            for(c0 = 0; c0 < N_centers; c0 += NEAREST_CENTER_BLOCK) {
+                kb = N_centers - c0 < NEAREST_CENTER_BLOCK ? N_centers - c0 : NEAREST_CENTER_BLOCK;
+                dot_tile(frames, nb, &shifted_centers[c0*dim], kb, dim, D);
+                for(i = 0; i < nb; ++i) {
+                    for(j = 0; j < kb; ++j) {
+                        d = center_norms[c0 + j] - 2.0f * D[i*kb + j];
+                        if(d < best[i]) { best[i] = d; argmin[i] = (npy_int32) (c0 + j); }
+                    }
+                }
+            }
+            for(i = 0; i < nb; ++i) {
+                dtraj[start + i] = argmin[i];
+                if(mindist2) {
+                    d = 0.0f;
+                    for(k = 0; k < dim; ++k) d += frames[i*dim + k] * frames[i*dim + k];
+                    d += best[i];
+                    mindist2[start + i] = d > 0.0f ? d : 0.0f;
+                }
+            }
+        }
+
+        free(frames);
+        free(D);
+    }
+
+error:
+    free(shift);
+    free(shifted_centers);
+    free(center_norms);
+    return ret;
+}
+
+int c_assign(float *chunk, float *centers, npy_int32 *dtraj, float *mindist2, char* metric,
+             Py_ssize_t N_frames, Py_ssize_t N_centers, Py_ssize_t dim, int n_threads) {
+    int ret;
+    Py_ssize_t i;
+    float *frames, *frame_traces, *prepared_centers, *center_traces;
+
+    /* init metric */
+    if(strcmp(metric,"euclidean")==0) {
+        return nearest_centers_euclidean(chunk, N_frames, centers, N_centers, dim, dtraj, mindist2, n_threads);
+    } else if(strcmp(metric,"minRMSD")!=0) {
+        return ASSIGN_ERR_INVALID_METRIC;
+    }
+
+#ifdef USE_OPENMP
+    /* n_threads <= 0 means the OpenMP default (OMP_NUM_THREADS or the number of cores) */
+    if(n_threads <= 0) n_threads = omp_get_max_threads();
+#endif
+    /* frames and centers are centered once, so that only the QCP kernel is evaluated per pair */
+    prepared_centers = center_traces = NULL;
+    ret = prepare_frames(chunk, N_frames, dim, 1, &frames, &frame_traces, n_threads);
+    if(ret != ASSIGN_SUCCESS) return ret;
+    ret = prepare_frames(centers, N_centers, dim, 1, &prepared_centers, &center_traces, n_threads);
+    if(ret != ASSIGN_SUCCESS) goto error;
+
+#ifdef USE_OPENMP
+    #pragma omp parallel for schedule(static) num_threads(n_threads)
+#endif
+    for(i = 0; i < N_frames; ++i) {
+        Py_ssize_t j;
+        float d, mindist;
+        npy_int32 argmin;
+
+        mindist = FLT_MAX;
+        argmin = -1;
+        for(j = 0; j < N_centers; ++j) {
+            d = pair_distance(frames, frame_traces, i, prepared_centers, center_traces, j, dim);
+            if(d<mindist) { mindist = d; argmin = (npy_int32) j; }
         }
+        dtraj[i] = argmin;
+        if(mindist2) mindist2[i] = mindist*mindist;
     }
 
 error:
-    free(buffer_a);
-    free(buffer_b);
+    free_prepared_frames(frames, frame_traces);
+    free_prepared_frames(prepared_centers, center_traces);
     return ret;
 }
 
@@ -104,12 +309,14 @@ PyObject *assign(PyObject *self, PyObject *args) {
     float *centers;
     npy_int32 *dtraj;
     char *metric;
+    int n_threads, ret;
 
     py_centers = NULL; py_res = NULL;
-    np_chunk = NULL; np_dtraj = NULL;
+    np_chunk = NULL; np_dtraj = NULL; np_centers = NULL;
     centers = NULL; metric=""; chunk = NULL; dtraj = NULL;
+    n_threads = 1;
 
-    if (!PyArg_ParseTuple(args, "O!OO!s", &PyArray_Type, &np_chunk, &py_centers, &PyArray_Type, &np_dtraj, &metric)) goto error; /* ref:borr. */
+    if (!PyArg_ParseTuple(args, "O!OO!s|i", &PyArray_Type, &np_chunk, &py_centers, &PyArray_Type, &np_dtraj, &metric, &n_threads)) goto error; /* ref:borr. */
 
     /* import chunk */
     if(PyArray_TYPE(np_chunk)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of \"chunk\" isn\'t float (32)."); goto error; };
@@ -150,8 +357,12 @@ PyObject *assign(PyObject *self, PyObject *args) {
     }
     centers = (float*)PyArray_DATA(np_centers);
 
-    /* do the assignment */
-    switch(c_assign(chunk, centers, dtraj, metric, N_frames, N_centers, dim)) {
+    /* do the assignment. The arrays are owned by numpy, so the GIL is not needed meanwhile. */
+    load_blas();
+    Py_BEGIN_ALLOW_THREADS
+    ret = c_assign(chunk, centers, dtraj, NULL, metric, N_frames, N_centers, dim, n_threads);
+    Py_END_ALLOW_THREADS
+    switch(ret) {
         case ASSIGN_ERR_INVALID_METRIC:
             PyErr_SetString(PyExc_ValueError, "metric must be one of \"euclidean\" or \"minRMSD\".");
             goto error;
@@ -163,5 +374,6 @@ PyObject *assign(PyObject *self, PyObject *args) {
     py_res = Py_BuildValue(""); /* =None */
     /* fall through */
 error:
+    Py_XDECREF(np_centers);
     return py_res;
 }
@@ -46,48 +46,141 @@ static PyObject *c_set_callback(PyObject *dummy, PyObject *args) {
     return result;
 }
 
+/* Copies the list of cluster centers into one contiguous (N_centers, dim) array, which has to be freed by
+   the caller. Returns NULL with an exception set, if the centers are invalid. */
+static float *import_centers(PyObject *py_centers, Py_ssize_t dim, Py_ssize_t *N_centers)
+{
+    PyObject *py_item;
+    PyArrayObject *np_item;
+    float *centers_array;
+    Py_ssize_t i;
+
+    *N_centers = PyList_Size(py_centers);
+    if(*N_centers==0) {
+        PyErr_SetString(PyExc_ValueError, "centers must contain at least one element.");
+        return NULL;
+    }
+    if(!(centers_array = malloc(*N_centers*dim*sizeof(float)))) {
+        PyErr_NoMemory(); return NULL;
+    }
+    for(i = 0; i < *N_centers; ++i) {
+        py_item = PyList_GetItem(py_centers,i); /* ref:borr. */
+        if(!py_item) goto error;
+        if(!PyArray_Check(py_item)) { PyErr_SetString(PyExc_ValueError, "Elements of centers must be numpy arrays."); goto error; }
+        np_item = (PyArrayObject*)py_item;
+        if(PyArray_TYPE(np_item)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of cluster center isn\'t float (32)."); goto error; };
+        if(!PyArray_ISBEHAVED_RO(np_item) ) { PyErr_SetString(PyExc_ValueError, "cluster center isn\'t behaved."); goto error; };
+        if(PyArray_NDIM(np_item)!=1) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of cluster centers must be 1."); goto error;  };
+        if(np_item->dimensions[0]!=dim) {
+          PyErr_SetString(PyExc_ValueError, "Dimension of cluster centers doesn\'t match dimension of frames.");
+          goto error;
+        }
+        memcpy(&centers_array[i*dim], PyArray_DATA(np_item), dim*sizeof(float));
+    }
+    return centers_array;
+error:
+    free(centers_array);
+    return NULL;
+}
+
+/* Adds the frames of every center to sums and counts and sums up (if mindist2 is given) the squared distances of
+   the frames to their centers. Every thread accumulates into its own partial sums (in double precision), which are
+   reduced at the end. */
+static int accumulate_centers(float *chunk, npy_int32 *labels, float *mindist2, Py_ssize_t N_frames,
+                              Py_ssize_t N_centers, Py_ssize_t dim, double *sums, npy_int64 *counts,
+                              double *cost, int n_threads)
+{
+    int ret;
+    double total_cost;
+
+    ret = ASSIGN_SUCCESS;
+    total_cost = 0.0;
+
+#ifdef USE_OPENMP
+    if(n_threads <= 0) n_threads = omp_get_max_threads();
+    #pragma omp parallel num_threads(n_threads)
+#endif
+    {
+        Py_ssize_t i, j;
+        npy_int32 c;
+        double *partial_sums, partial_cost;
+        npy_int64 *partial_counts;
+        int failed;
+
+        partial_sums = calloc(N_centers*dim, sizeof(double));
+        partial_counts = calloc(N_centers, sizeof(npy_int64));
+        partial_cost = 0.0;
+        failed = !partial_sums || !partial_counts;
+        if(failed) {
+#ifdef USE_OPENMP
+            #pragma omp atomic write
+#endif
+            ret = ASSIGN_ERR_NO_MEMORY;
+        }
+
+#ifdef USE_OPENMP
+        #pragma omp for schedule(static)
+#endif
+        for(i = 0; i < N_frames; ++i) {
+            if(failed) continue;
+            c = labels[i];
+            if(c < 0) continue;
+            partial_counts[c]++;
+            for(j = 0; j < dim; ++j) {
+                partial_sums[c*dim + j] += chunk[i*dim + j];
+            }
+            if(mindist2) partial_cost += mindist2[i];
+        }
+
+        if(!failed) {
+#ifdef USE_OPENMP
+            #pragma omp critical
+#endif
+            {
+                for(i = 0; i < N_centers; ++i) {
+                    counts[i] += partial_counts[i];
+                    for(j = 0; j < dim; ++j) sums[i*dim + j] += partial_sums[i*dim + j];
+                }
+                total_cost += partial_cost;
+            }
+        }
+
+        free(partial_sums);
+        free(partial_counts);
+    }
+
+    if(cost) *cost = total_cost;
+    return ret;
+}
+
 static PyObject *cluster(PyObject *self, PyObject *args) {
-    int debug;
-    PyObject *py_centers, *py_item, *py_res;
-    PyArrayObject *np_chunk, *np_item;
+    PyObject *py_centers, *py_new_centers, *py_counts, *result;
+    PyArrayObject *np_chunk;
     Py_ssize_t N_centers, N_frames, dim;
     float *chunk;
-    float **centers;
     char *metric;
-    float mindist;
-    float d;
-    float *buffer_a, *buffer_b;
-    int l;
-    int *centers_counter;
-    void *arr_data;
+    npy_int64 *centers_counter;
+    double *sums, cost;
     float *new_centers;
-    int i, j;
-    int closest_center_index;
+    Py_ssize_t i, j;
+    int n_threads, ret;
+    npy_int32 *labels;
+    float *mindist2;
+    float *centers_array;
     npy_intp dims[2];
-    float (*distance)(float*, float*, size_t, float*, float*);
-    PyObject* return_new_centers;
-    debug = 0;
-    if(debug) printf("KMEANS: \n----------- cluster called ----------\n");
-    if(debug) printf("KMEANS: declaring variables...");
-    if(debug) printf("done.\n");
-
-    if(debug) printf("KMEANS: initializing some of them...");
-    py_centers = NULL; py_item = NULL; py_res = NULL;
-    np_chunk = NULL; np_item = NULL;
-    centers = NULL; metric=""; chunk = NULL;
-    centers_counter = NULL; new_centers = NULL;
-    buffer_a = NULL; buffer_b = NULL;
-    return_new_centers = Py_BuildValue("");
-    if(debug) printf("done\n");
-
-    if(debug) printf("KMEANS: attempting to parse args...");
-    if (!PyArg_ParseTuple(args, "O!O!s", &PyArray_Type, &np_chunk, &PyList_Type, &py_centers, &metric)) {
+
+    py_centers = NULL; py_new_centers = NULL; py_counts = NULL; result = NULL;
+    np_chunk = NULL;
+    metric = ""; chunk = NULL;
+    centers_counter = NULL; sums = NULL;
+    labels = NULL; mindist2 = NULL; centers_array = NULL;
+    n_threads = 1;
+
+    if (!PyArg_ParseTuple(args, "O!O!s|i", &PyArray_Type, &np_chunk, &PyList_Type, &py_centers, &metric, &n_threads)) {
         goto error;
     }
-    if(debug) printf("done\n");
 
     /* import chunk */
-    if(debug) printf("KMEANS: importing chunk...");
     if(PyArray_TYPE(np_chunk)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of \"chunk\" isn\'t float (32)."); goto error; };
     if(!PyArray_ISCARRAY_RO(np_chunk) ) { PyErr_SetString(PyExc_ValueError, "\"chunk\" isn\'t C-style contiguous or isn\'t behaved."); goto error; };
     if(PyArray_NDIM(np_chunk)!=2) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of \"chunk\" isn\'t 2."); goto error;  };
@@ -98,164 +191,429 @@ static PyObject *cluster(PyObject *self, PyObject *args) {
         goto error;
     }
     chunk = PyArray_DATA(np_chunk);
-    if(debug) printf("done with N_frames=%zd, dim=%zd\n", N_frames, dim);
 
-    if(debug) printf("KMEANS: creating metric function...");
-    if(strcmp(metric,"euclidean")==0) {
-        distance = euclidean_distance;
-    } else if(strcmp(metric,"minRMSD")==0) {
-        distance = minRMSD_distance;
-        buffer_a = malloc(dim*sizeof(float));
-        buffer_b = malloc(dim*sizeof(float));
-        if(!buffer_a || !buffer_b) { PyErr_NoMemory(); goto error; }
-    } else {
+    if(strcmp(metric,"euclidean")!=0 && strcmp(metric,"minRMSD")!=0) {
         PyErr_SetString(PyExc_ValueError, "metric must be one of \"euclidean\" or \"minRMSD\".");
         goto error;
     }
-    if(debug) printf("done\n");
 
-    /* import list of cluster centers */
-    if(debug) printf("KMEANS: importing list of cluster centers...");
-    N_centers = PyList_Size(py_centers);
-    if(!(centers = malloc(N_centers*sizeof(float*)))) {
-        PyErr_NoMemory(); goto error;
+    /* import list of cluster centers into one contiguous array */
+    if(!(centers_array = import_centers(py_centers, dim, &N_centers))) goto error;
+
+    /* the number of frames of every center is returned, eg. as weights for online updates */
+    dims[0] = N_centers;
+    py_counts = PyArray_ZEROS(1, dims, NPY_INT64, 0);
+    if(py_counts == NULL) goto error;
+    centers_counter = PyArray_DATA((PyArrayObject*)py_counts);
+    labels = malloc(N_frames*sizeof(npy_int32));
+    mindist2 = malloc(N_frames*sizeof(float));
+    sums = calloc(N_centers*dim, sizeof(double));
+    if(!labels || !mindist2 || !sums) { PyErr_NoMemory(); goto error; }
+
+    /* assign the frames to their closest centers and sum them up, along with the cost */
+    load_blas();
+    Py_BEGIN_ALLOW_THREADS
+    ret = c_assign(chunk, centers_array, labels, mindist2, metric, N_frames, N_centers, dim, n_threads);
+    if(ret == ASSIGN_SUCCESS) {
+        ret = accumulate_centers(chunk, labels, mindist2, N_frames, N_centers, dim, sums, centers_counter,
+                                 &cost, n_threads);
     }
-    for(i = 0; i < N_centers; ++i) {
-        l = 0;
-        if(debug) printf("%d", l++); /* 0 */
-        py_item = PyList_GetItem(py_centers,i); /* ref:borr. */
-        if(debug) printf("%d", l++); /* 1 */
-        if(!py_item) goto error;
-        if(debug) printf("%d", l++); /* 2 */
-        if(!PyArray_Check(py_item)) { PyErr_SetString(PyExc_ValueError, "Elements of centers must be numpy arrays."); goto error; }
-        if(debug) printf("%d", l++); /* 3 */
-        np_item = (PyArrayObject*)py_item;
-        if(debug) printf("%d", l++); /* 4 */
-        if(PyArray_TYPE(np_item)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of cluster center isn\'t float (32)."); goto error; };
-        if(debug) printf("%d", l++); /* 5 */
-        if(!PyArray_ISBEHAVED_RO(np_item) ) { PyErr_SetString(PyExc_ValueError, "cluster center isn\'t behaved."); goto error; };
-        if(debug) printf("%d", l++); /* 6 */
-        if(PyArray_NDIM(np_item)!=1) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of cluster centers must be 1."); goto error;  };
-        if(debug) printf("%d", l++); /* 7 */
-        if(np_item->dimensions[0]!=dim) {
-          PyErr_SetString(PyExc_ValueError, "Dimension of cluster centers doesn\'t match dimension of frames.");
-          goto error;
+    Py_END_ALLOW_THREADS
+    if(ret != ASSIGN_SUCCESS) { PyErr_NoMemory(); goto error; }
+
+    /* move the centers to the means of their frames, centers without frames stay where they are */
+    dims[0] = N_centers; dims[1] = dim;
+    py_new_centers = PyArray_SimpleNew(2, dims, NPY_FLOAT32);
+    if (py_new_centers == NULL) goto error;
+    new_centers = PyArray_DATA((PyArrayObject*)py_new_centers);
+    for (i = 0; i < N_centers; i++) {
+        for (j = 0; j < dim; j++) {
+            if (centers_counter[i] == 0) {
+                new_centers[i*dim + j] = centers_array[i*dim + j];
+            } else {
+                new_centers[i*dim + j] = (float) (sums[i*dim + j] / centers_counter[i]);
+            }
         }
-        if(debug) printf("%d", l++); /* 8 */
-        centers[i] = (float*)PyArray_DATA(np_item);
-        if(debug) printf("%d", l++); /* 9 */
-    }
-    if(debug) printf("done, k=%zd\n", N_centers);
-
-    /* initialize centers_counter and new_centers with zeros */
-    if(debug) printf("KMEANS: initializing calloc centers counter and new_centers stuff...");
-    centers_counter = (int*) calloc(N_centers, sizeof(int));
-    new_centers = (float*) calloc(N_centers * dim, sizeof(float));
-    if(!centers_counter || !new_centers) { PyErr_NoMemory(); goto error; }
-    if(debug) printf("done\n");
-
-    /* do the clustering */
-    if(debug) printf("KMEANS: performing the clustering...");
-    for (i = 0; i < N_frames; i++) {
-        mindist = FLT_MAX;
+    }
+
+    result = Py_BuildValue("OdO", py_new_centers, cost, py_counts);
+    /* fall through */
+error:
+    Py_XDECREF(py_new_centers);
+    Py_XDECREF(py_counts);
+    free(labels);
+    free(mindist2);
+    free(centers_array);
+    free(sums);
+    return result;
+}
+
+static PyObject *accumulate(PyObject *self, PyObject *args) {
+    PyObject *py_centers;
+    PyArrayObject *np_chunk, *np_centers, *np_sums, *np_counts;
+    Py_ssize_t N_centers, N_frames, dim;
+    char *metric;
+    double cost;
+    int n_threads, ret;
+    npy_int32 *labels;
+    float *mindist2;
+    float *centers_array;
+
+    py_centers = NULL; np_chunk = NULL; np_sums = NULL; np_counts = NULL;
+    metric = "";
+    labels = NULL; mindist2 = NULL; centers_array = NULL;
+    n_threads = 1;
+
+    if (!PyArg_ParseTuple(args, "O!OsO!O!|i", &PyArray_Type, &np_chunk, &py_centers, &metric,
+                          &PyArray_Type, &np_sums, &PyArray_Type, &np_counts, &n_threads)) {
+        goto error;
+    }
+
+    /* import chunk */
+    if(PyArray_TYPE(np_chunk)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of \"chunk\" isn\'t float (32)."); goto error; };
+    if(!PyArray_ISCARRAY_RO(np_chunk) ) { PyErr_SetString(PyExc_ValueError, "\"chunk\" isn\'t C-style contiguous or isn\'t behaved."); goto error; };
+    if(PyArray_NDIM(np_chunk)!=2) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of \"chunk\" isn\'t 2."); goto error;  };
+    N_frames = np_chunk->dimensions[0];
+    dim = np_chunk->dimensions[1];
+    if(dim==0) {
+        PyErr_SetString(PyExc_ValueError, "chunk dimension must be larger than zero.");
+        goto error;
+    }
+
+    if(strcmp(metric,"euclidean")!=0 && strcmp(metric,"minRMSD")!=0) {
+        PyErr_SetString(PyExc_ValueError, "metric must be one of \"euclidean\" or \"minRMSD\".");
+        goto error;
+    }
+
+    /* import the cluster centers into one contiguous array, a list of centers or a (K,M) array */
+    if(PyArray_Check(py_centers)) {
+        np_centers = (PyArrayObject*) py_centers;
+        if(PyArray_TYPE(np_centers)!=NPY_FLOAT32 || !PyArray_ISCARRAY_RO(np_centers) || PyArray_NDIM(np_centers)!=2
+           || PyArray_DIM(np_centers, 0)==0 || PyArray_DIM(np_centers, 1)!=dim) {
+            PyErr_SetString(PyExc_ValueError, "centers must be a non-empty C-style contiguous float32 array with the "\
+                                              "dimension of the frames.");
+            goto error;
+        }
+        N_centers = PyArray_DIM(np_centers, 0);
+        if(!(centers_array = malloc(N_centers*dim*sizeof(float)))) { PyErr_NoMemory(); goto error; }
+        memcpy(centers_array, PyArray_DATA(np_centers), N_centers*dim*sizeof(float));
+    } else if(PyList_Check(py_centers)) {
+        if(!(centers_array = import_centers(py_centers, dim, &N_centers))) goto error;
+    } else {
+        PyErr_SetString(PyExc_TypeError, "centers must be a list of arrays or an array.");
+        goto error;
+    }
+
+    /* the accumulators are updated in place */
+    if(PyArray_TYPE(np_sums)!=NPY_FLOAT64 || !PyArray_ISCARRAY(np_sums) || PyArray_NDIM(np_sums)!=2 ||
+       PyArray_DIM(np_sums, 0)!=N_centers || PyArray_DIM(np_sums, 1)!=dim) {
+        PyErr_SetString(PyExc_ValueError, "\"sums\" has to be a writeable C-style contiguous (K,M) array of float (64).");
+        goto error;
+    }
+    if(PyArray_TYPE(np_counts)!=NPY_INT64 || !PyArray_ISCARRAY(np_counts) || PyArray_NDIM(np_counts)!=1 ||
+       PyArray_DIM(np_counts, 0)!=N_centers) {
+        PyErr_SetString(PyExc_ValueError, "\"counts\" has to be a writeable C-style contiguous (K) array of int (64).");
+        goto error;
+    }
+
+    labels = malloc(N_frames*sizeof(npy_int32));
+    mindist2 = malloc(N_frames*sizeof(float));
+    if(!labels || !mindist2) { PyErr_NoMemory(); goto error; }
+
+    /* assign the frames to their closest centers and add them up, along with the cost */
+    load_blas();
+    Py_BEGIN_ALLOW_THREADS
+    ret = c_assign(PyArray_DATA(np_chunk), centers_array, labels, mindist2, metric, N_frames, N_centers, dim,
+                   n_threads);
+    if(ret == ASSIGN_SUCCESS) {
+        ret = accumulate_centers(PyArray_DATA(np_chunk), labels, mindist2, N_frames, N_centers, dim,
+                                 PyArray_DATA(np_sums), PyArray_DATA(np_counts), &cost, n_threads);
+    }
+    Py_END_ALLOW_THREADS
+    if(ret != ASSIGN_SUCCESS) { PyErr_NoMemory(); goto error; }
+
+    free(labels);
+    free(mindist2);
+    free(centers_array);
+    return PyFloat_FromDouble(cost);
+
+error:
+    free(labels);
+    free(mindist2);
+    free(centers_array);
+    return NULL;
+}
+
+/* Finds the closest and second closest center of frame i by computing all distances. If all_distances is
+   given, the distances to all centers are written into it (the lower bounds of Elkan's algorithm). Frames
+   and centers are prepared by prepare_frames. */
+static void nearest_two_centers(float *frames, float *frame_traces, Py_ssize_t i, float *centers,
+                                float *center_traces, Py_ssize_t N_centers, Py_ssize_t dim,
+                                npy_int32 *argmin, float *d1, float *d2, float *all_distances)
+{
+    Py_ssize_t j;
+    float d;
+
+    *argmin = -1; *d1 = FLT_MAX; *d2 = FLT_MAX;
+    for(j = 0; j < N_centers; ++j) {
+        d = pair_distance(frames, frame_traces, i, centers, center_traces, j, dim);
+        if(all_distances) all_distances[j] = d;
+        if(d < *d1) {
+            *d2 = *d1; *d1 = d; *argmin = (npy_int32) j;
+        } else if(d < *d2) {
+            *d2 = d;
+        }
+    }
+}
+
+/* One k-means iteration which skips distance computations by the triangle inequality (Hamerly's algorithm
+   with one lower bound per frame, or Elkan's algorithm with one lower bound per frame and center). The
+   assignments and bounds are updated in place, frames with a negative label are assigned from scratch. The
+   number of frames of every new center is written into counts. */
+static int bounded_lloyd_step(float *chunk, float *centers, float *new_centers, Py_ssize_t N_frames,
+                              Py_ssize_t N_centers, Py_ssize_t dim, int elkan, int minrmsd,
+                              npy_int32 *labels, float *upper, float *lower, npy_int64 *counts,
+                              npy_int64 *n_changed, int n_threads)
+{
+    int ret;
+    Py_ssize_t i, j, j_max;
+    float *half_min_center_distance, *center_distances, *drift;
+    float *frames, *frame_traces, *prepared_centers, *center_traces, *prepared_new_centers, *new_center_traces;
+    float drift_max, drift_second;
+    double *sums;
+    npy_int64 changed;
+
+    changed = 0;
+    center_distances = NULL;
+    frames = frame_traces = prepared_centers = center_traces = prepared_new_centers = new_center_traces = NULL;
+#ifdef USE_OPENMP
+    if(n_threads <= 0) n_threads = omp_get_max_threads();
+#endif
+    half_min_center_distance = malloc(N_centers*sizeof(float));
+    drift = malloc(N_centers*sizeof(float));
+    sums = calloc(N_centers*dim, sizeof(double));
+    /* Elkan's algorithm needs all distances between the centers, Hamerly's only the smallest ones */
+    if(elkan) center_distances = malloc(N_centers*N_centers*sizeof(float));
+    if(!half_min_center_distance || !drift || !sums || (elkan && !center_distances)) {
+        ret = ASSIGN_ERR_NO_MEMORY; goto error;
+    }
+    /* for minRMSD, frames and centers are centered once instead of for every distance */
+    ret = prepare_frames(chunk, N_frames, dim, minrmsd, &frames, &frame_traces, n_threads);
+    if(ret != ASSIGN_SUCCESS) goto error;
+    ret = prepare_frames(centers, N_centers, dim, minrmsd, &prepared_centers, &center_traces, n_threads);
+    if(ret != ASSIGN_SUCCESS) goto error;
+
+#ifdef USE_OPENMP
+    #pragma omp parallel num_threads(n_threads)
+#endif
+    {
+        Py_ssize_t i, j, k;
+        float d, m, u, d1, d2, *l;
+        npy_int32 a;
+        int tight;
+
+        /* half the distance of every center to its closest other center: a frame closer than that to its
+           center can not be closer to any other center */
+#ifdef USE_OPENMP
+        #pragma omp for schedule(dynamic, 16)
+#endif
         for(j = 0; j < N_centers; ++j) {
-            d = distance(&chunk[i*dim], centers[j], dim, buffer_a, buffer_b);
-            if(d<mindist) {
-                mindist = d;
-                closest_center_index = j;
+            m = FLT_MAX;
+            for(k = 0; k < N_centers; ++k) {
+                if(k == j) continue;
+                d = pair_distance(prepared_centers, center_traces, j, prepared_centers, center_traces, k, dim);
+                if(elkan) center_distances[j*N_centers + k] = d;
+                if(d < m) m = d;
             }
+            if(elkan) center_distances[j*N_centers + j] = 0.0f;
+            half_min_center_distance[j] = 0.5f * m;
         }
-        (*(centers_counter + closest_center_index))++;
-	    for (j = 0; j < dim; j++) {
-	        new_centers[closest_center_index*dim+j] += chunk[i*dim+j];
-	    }
-    }
 
-    for (i = 0; i < N_centers; i++) {
-        if (*(centers_counter + i) == 0) {
-            for (j = 0; j < dim; j++) {
-                (*(new_centers + i * dim + j)) = centers[i][j];
+#ifdef USE_OPENMP
+        #pragma omp for schedule(dynamic, 256) reduction(+:changed)
+#endif
+        for(i = 0; i < N_frames; ++i) {
+            a = labels[i];
+            if(a < 0) {
+                nearest_two_centers(frames, frame_traces, i, prepared_centers, center_traces, N_centers, dim,
+                                    &labels[i], &upper[i], &d2, elkan ? &lower[i*N_centers] : NULL);
+                if(!elkan) lower[i] = d2;
+                changed++;
+                continue;
             }
-        } else {
-            for (j=0; j < dim; j++) {
-                (*(new_centers + i * dim + j)) /= (*(centers_counter + i));
+            u = upper[i];
+            if(!elkan) {
+                m = lower[i] > half_min_center_distance[a] ? lower[i] : half_min_center_distance[a];
+                if(u <= m) continue;
+                /* tighten the upper bound and check again, before looking at all centers */
+                u = pair_distance(frames, frame_traces, i, prepared_centers, center_traces, a, dim);
+                upper[i] = u;
+                if(u <= m) continue;
+                nearest_two_centers(frames, frame_traces, i, prepared_centers, center_traces, N_centers, dim,
+                                    &labels[i], &d1, &d2, NULL);
+                upper[i] = d1;
+                lower[i] = d2;
+                if(labels[i] != a) changed++;
+            } else {
+                if(u <= half_min_center_distance[a]) continue;
+                l = &lower[i*N_centers];
+                tight = 0;
+                for(j = 0; j < N_centers; ++j) {
+                    if(j == a || u <= l[j] || u <= 0.5f * center_distances[a*N_centers + j]) continue;
+                    if(!tight) {
+                        u = pair_distance(frames, frame_traces, i, prepared_centers, center_traces, a, dim);
+                        l[a] = u;
+                        tight = 1;
+                        if(u <= l[j] || u <= 0.5f * center_distances[a*N_centers + j]) continue;
+                    }
+                    d = pair_distance(frames, frame_traces, i, prepared_centers, center_traces, j, dim);
+                    l[j] = d;
+                    if(d < u) { a = (npy_int32) j; u = d; }
+                }
+                upper[i] = u;
+                if(labels[i] != a) { labels[i] = a; changed++; }
             }
         }
     }
-    if(debug) printf("done\n");
+    *n_changed = changed;
 
-    if(debug) printf("KMEANS: creating return_new_centers...");
-    dims[0] = N_centers; dims[1] = dim;
-    return_new_centers = PyArray_SimpleNew(2, dims, NPY_FLOAT32);
-    if (return_new_centers == NULL){
-        PyErr_SetString(PyExc_MemoryError, "Error occurs when creating a new PyArray");
-        goto error;
+    /* move the centers to the means of their frames */
+    ret = accumulate_centers(chunk, labels, NULL, N_frames, N_centers, dim, sums, counts, NULL, n_threads);
+    if(ret != ASSIGN_SUCCESS) goto error;
+    drift_max = 0.0f; drift_second = 0.0f; j_max = -1;
+    for(j = 0; j < N_centers; ++j) {
+        for(i = 0; i < dim; ++i) {
+            new_centers[j*dim + i] = counts[j] == 0 ? centers[j*dim + i] : (float) (sums[j*dim + i] / counts[j]);
+        }
     }
-    arr_data = PyArray_DATA((PyArrayObject*)return_new_centers);
-    if(debug) printf("done\n");
-    /* Need to copy the data of the malloced buffer to the PyObject
-       since the malloced buffer will disappear after the C extension is called. */
-    if(debug) printf("KMEANS: attempting memcopy...");
-    memcpy(arr_data, new_centers, PyArray_ITEMSIZE((PyArrayObject*) return_new_centers) * N_centers * dim);
-    if(debug) printf("done\n");
-    if(debug) printf("KMEANS: increasting ref to return_new_centers thingy...");
-    Py_INCREF(return_new_centers);  /* The returned list should still exist after calling the C extension */
-    if(debug) printf("done\n");
-    /* fall through */
+    ret = prepare_frames(new_centers, N_centers, dim, minrmsd, &prepared_new_centers, &new_center_traces, n_threads);
+    if(ret != ASSIGN_SUCCESS) goto error;
+    for(j = 0; j < N_centers; ++j) {
+        drift[j] = pair_distance(prepared_centers, center_traces, j, prepared_new_centers, new_center_traces, j, dim);
+        if(drift[j] > drift_max) {
+            drift_second = drift_max; drift_max = drift[j]; j_max = j;
+        } else if(drift[j] > drift_second) {
+            drift_second = drift[j];
+        }
+    }
+
+    /* by the triangle inequality, the distances to the moved centers change at most by their drift */
+#ifdef USE_OPENMP
+    #pragma omp parallel for num_threads(n_threads) private(j)
+#endif
+    for(i = 0; i < N_frames; ++i) {
+        upper[i] += drift[labels[i]];
+        if(elkan) {
+            for(j = 0; j < N_centers; ++j) {
+                lower[i*N_centers + j] -= drift[j];
+                if(lower[i*N_centers + j] < 0.0f) lower[i*N_centers + j] = 0.0f;
+            }
+        } else {
+            lower[i] -= labels[i] == j_max ? drift_second : drift_max;
+            if(lower[i] < 0.0f) lower[i] = 0.0f;
+        }
+    }
+
 error:
-    free(centers_counter);
-    free(new_centers);
-    free(centers);
-    free(buffer_a);
-    free(buffer_b);
-    return return_new_centers;
+    free(half_min_center_distance);
+    free(center_distances);
+    free(drift);
+    free(sums);
+    free_prepared_frames(frames, frame_traces);
+    free_prepared_frames(prepared_centers, center_traces);
+    free_prepared_frames(prepared_new_centers, new_center_traces);
+    return ret;
 }
 
-static PyObject* costFunction(PyObject *self, PyObject *args) {
-    int k, i, j, r;
-    float value, d;
-    float *data, *centers;
-    char *metric;
-    PyObject *ret_cost;
-    Py_ssize_t dim, n_frames;
-    PyArrayObject *np_data, *np_centers;
-    float (*distance)(float*, float*, size_t, float*, float*);
-    float *buffer_a, *buffer_b;
-
-    k = 0; r = 0; i = 0; j = 0; value = 0.0; d = 0.0;
-    metric = NULL; np_data = NULL;
-    data = NULL; ret_cost = Py_BuildValue("");
-    buffer_a = NULL; buffer_b = NULL;
-    /* parse python input (np_data, np_centers, metric, k) */
-    if (!PyArg_ParseTuple(args, "O!O!si", &PyArray_Type, &np_data, &PyList_Type, &np_centers, &metric, &k)) {
+static PyObject *cluster_bounded(PyObject *self, PyObject *args) {
+    PyObject *py_centers, *py_new_centers, *py_counts, *result;
+    PyArrayObject *np_chunk, *np_labels, *np_upper, *np_lower;
+    Py_ssize_t N_centers, N_frames, dim;
+    char *metric, *algorithm;
+    float *centers_array;
+    int n_threads, elkan, ret;
+    npy_int64 n_changed;
+    npy_intp dims[2];
+    int minrmsd;
+
+    py_centers = NULL; py_new_centers = NULL; py_counts = NULL; result = NULL;
+    np_chunk = NULL; np_labels = NULL; np_upper = NULL; np_lower = NULL;
+    metric = ""; algorithm = ""; centers_array = NULL;
+    n_threads = 1; n_changed = 0;
+
+    if (!PyArg_ParseTuple(args, "O!O!ssO!O!O!|i", &PyArray_Type, &np_chunk, &PyList_Type, &py_centers, &metric,
+                          &algorithm, &PyArray_Type, &np_labels, &PyArray_Type, &np_upper, &PyArray_Type, &np_lower,
+                          &n_threads)) {
         goto error;
     }
-    n_frames = np_data->dimensions[0];
-    dim = np_data->dimensions[1];
-    data = PyArray_DATA(np_data);
-    /* parse and initialize metric */
+
+    if(PyArray_TYPE(np_chunk)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of \"chunk\" isn\'t float (32)."); goto error; };
+    if(!PyArray_ISCARRAY_RO(np_chunk) ) { PyErr_SetString(PyExc_ValueError, "\"chunk\" isn\'t C-style contiguous or isn\'t behaved."); goto error; };
+    if(PyArray_NDIM(np_chunk)!=2) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of \"chunk\" isn\'t 2."); goto error;  };
+    N_frames = np_chunk->dimensions[0];
+    dim = np_chunk->dimensions[1];
+    if(dim==0) {
+        PyErr_SetString(PyExc_ValueError, "chunk dimension must be larger than zero.");
+        goto error;
+    }
+
     if(strcmp(metric,"euclidean")==0) {
-        distance = euclidean_distance;
+        minrmsd = 0;
     } else if(strcmp(metric,"minRMSD")==0) {
-        distance = minRMSD_distance;
-        buffer_a = malloc(dim*sizeof(float));
-        buffer_b = malloc(dim*sizeof(float));
-        if(!buffer_a || !buffer_b) { PyErr_NoMemory(); goto error; }
+        minrmsd = 1;
     } else {
         PyErr_SetString(PyExc_ValueError, "metric must be one of \"euclidean\" or \"minRMSD\".");
         goto error;
     }
+    if(strcmp(algorithm,"hamerly")==0) {
+        elkan = 0;
+    } else if(strcmp(algorithm,"elkan")==0) {
+        elkan = 1;
+    } else {
+        PyErr_SetString(PyExc_ValueError, "algorithm must be one of \"hamerly\" or \"elkan\".");
+        goto error;
+    }
 
-    for(r = 0; r < k; r++) {
-        centers = PyArray_DATA(PyList_GetItem(np_centers,r));
-        for(i = 0; i < n_frames; i++) {
-            value += pow(distance(&data[i*dim], &centers[0], dim, buffer_a, buffer_b), 2);
-        }
+    if(!(centers_array = import_centers(py_centers, dim, &N_centers))) goto error;
+
+    if(PyArray_TYPE(np_labels)!=NPY_INT32 || !PyArray_ISCARRAY(np_labels) || PyArray_NDIM(np_labels)!=1
+       || np_labels->dimensions[0]!=N_frames) {
+        PyErr_SetString(PyExc_ValueError, "\"labels\" has to be a writeable C-style contiguous int32 array with one element per frame.");
+        goto error;
     }
-    ret_cost = Py_BuildValue("f", value);
-    Py_INCREF(ret_cost);
+    if(PyArray_TYPE(np_upper)!=NPY_FLOAT32 || !PyArray_ISCARRAY(np_upper) || PyArray_NDIM(np_upper)!=1
+       || np_upper->dimensions[0]!=N_frames) {
+        PyErr_SetString(PyExc_ValueError, "\"upper\" has to be a writeable C-style contiguous float32 array with one element per frame.");
+        goto error;
+    }
+    if(PyArray_TYPE(np_lower)!=NPY_FLOAT32 || !PyArray_ISCARRAY(np_lower) || np_lower->dimensions[0]!=N_frames
+       || PyArray_NDIM(np_lower)!=(elkan ? 2 : 1) || (elkan && np_lower->dimensions[1]!=N_centers)) {
+        PyErr_SetString(PyExc_ValueError, "\"lower\" has to be a writeable C-style contiguous float32 array of shape (N,) "
+                                          "for hamerly or (N, K) for elkan.");
+        goto error;
+    }
+
+    dims[0] = N_centers; dims[1] = dim;
+    py_new_centers = PyArray_SimpleNew(2, dims, NPY_FLOAT32);
+    if (py_new_centers == NULL) goto error;
+    py_counts = PyArray_ZEROS(1, dims, NPY_INT64, 0);
+    if (py_counts == NULL) goto error;
+
+    Py_BEGIN_ALLOW_THREADS
+    ret = bounded_lloyd_step(PyArray_DATA(np_chunk), centers_array, PyArray_DATA((PyArrayObject*) py_new_centers),
+                             N_frames, N_centers, dim, elkan, minrmsd, PyArray_DATA(np_labels),
+                             PyArray_DATA(np_upper), PyArray_DATA(np_lower), PyArray_DATA((PyArrayObject*) py_counts),
+                             &n_changed, n_threads);
+    Py_END_ALLOW_THREADS
+    if(ret != ASSIGN_SUCCESS) { PyErr_NoMemory(); goto error; }
+
+    result = Py_BuildValue("OLO", py_new_centers, (long long) n_changed, py_counts);
+    /* fall through */
 error:
-    return ret_cost;
+    Py_XDECREF(py_new_centers);
+    Py_XDECREF(py_counts);
+    free(centers_array);
+    return result;
 }
 
 static PyObject* initCentersKMpp(PyObject *self, PyObject *args) {
@@ -277,17 +635,16 @@ static PyObject* initCentersKMpp(PyObject *self, PyObject *args) {
     float *next_center_candidates_rand;
     float *next_center_candidates_potential;
     float *data, *init_centers;
-    float *buffer_a, *buffer_b;
+    float *prepared, *traces;
     void *arr_data;
     float *squared_distances;
-    float (*distance)(float*, float*, size_t, float*, float*);
 
     ret_init_centers = Py_BuildValue("");
     py_callback_result = NULL;
     np_data = NULL; metric = NULL; data = NULL;
     init_centers = NULL; taken_points = NULL;
     centers_found = 0; squared_distances = NULL;
-    buffer_a = NULL; buffer_b = NULL;
+    prepared = NULL; traces = NULL;
     next_center_candidates = NULL;
     next_center_candidates_rand = NULL;
     next_center_candidates_potential = NULL;
@@ -331,18 +688,14 @@ static PyObject* initCentersKMpp(PyObject *self, PyObject *args) {
     if(!(next_center_candidates_rand = (float*) malloc(n_trials * sizeof(float)))) { PyErr_NoMemory(); goto error; }
     if(!(next_center_candidates_potential = (float*) malloc(n_trials * sizeof(float)))) { PyErr_NoMemory(); goto error; }
 
-    /* parse and initialize metric */
-    if(strcmp(metric,"euclidean")==0) {
-        distance = euclidean_distance;
-    } else if(strcmp(metric,"minRMSD")==0) {
-        distance = minRMSD_distance;
-        buffer_a = malloc(dim*sizeof(float));
-        buffer_b = malloc(dim*sizeof(float));
-        if(!buffer_a || !buffer_b) { PyErr_NoMemory(); goto error; }
-    } else {
+    /* parse and initialize metric. For minRMSD, the frames are centered once instead of for every distance. */
+    if(strcmp(metric,"euclidean")!=0 && strcmp(metric,"minRMSD")!=0) {
         PyErr_SetString(PyExc_ValueError, "metric must be one of \"euclidean\" or \"minRMSD\".");
         goto error;
     }
+    if(prepare_frames(data, n_frames, dim, strcmp(metric,"minRMSD")==0, &prepared, &traces, 1) != ASSIGN_SUCCESS) {
+        PyErr_NoMemory(); goto error;
+    }
 
     /* pick first center randomly */
     first_center_index = rand() % n_frames;
@@ -364,7 +717,7 @@ static PyObject* initCentersKMpp(PyObject *self, PyObject *args) {
     /* squared_distances[i] = distance(x_j, x_i)*distance(x_j, x_i) */
     for(i = 0; i < n_frames; i++) {
         if(i != first_center_index) {
-            d = pow(distance(&data[i*dim], &data[first_center_index*dim], dim, buffer_a, buffer_b), 2);
+            d = pow(pair_distance(prepared, traces, i, prepared, traces, first_center_index, dim), 2);
             squared_distances[i] = d;
             /* build up dist_sum which keeps the sum of all squared distances */
             dist_sum += d;
@@ -406,7 +759,7 @@ static PyObject* initCentersKMpp(PyObject *self, PyObject *args) {
                 for(j = 0; j < n_trials; j++) {
                     if(next_center_candidates[j] == -1) break;
                     if(next_center_candidates[j] != i) {
-                        d = pow(distance(&data[i*dim], &data[next_center_candidates[j]*dim], dim, buffer_a, buffer_b), 2);
+                        d = pow(pair_distance(prepared, traces, i, prepared, traces, next_center_candidates[j], dim), 2);
                         if(d < squared_distances[i]) {
                             next_center_candidates_potential[j] += d;
                         } else {
@@ -463,7 +816,7 @@ static PyObject* initCentersKMpp(PyObject *self, PyObject *args) {
                 /* the new one. */
                 for(i = 0; i < n_frames; i++) {
                     if(!taken_points[i]) {
-                        d = pow(distance(&data[i*dim], &data[best_candidate*dim], dim, buffer_a, buffer_b), 2);
+                        d = pow(pair_distance(prepared, traces, i, prepared, traces, best_candidate, dim), 2);
                         if(d < squared_distances[i]) {
                             dist_sum += d - squared_distances[i];
                             squared_distances[i] = d;
@@ -494,8 +847,7 @@ error:
     if(!use_random_seed) {
         srand(time(NULL));
     }
-    free(buffer_a);
-    free(buffer_b);
+    free_prepared_frames(prepared, traces);
     free(taken_points);
     free(init_centers);
     free(squared_distances);
@@ -505,32 +857,329 @@ error:
     return ret_init_centers;
 }
 
+/* Uniform random number in [0, 1) for the i'th draw of a stream, derived from the seed by a counter based
+   hash (splitmix64), so that the draws do not depend on the number of threads. */
+static npy_uint64 splitmix64(npy_uint64 x)
+{
+    x += 0x9E3779B97F4A7C15ULL;
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EBULL;
+    return x ^ (x >> 31);
+}
+
+static double uniform_draw(npy_uint64 seed, npy_uint64 stream, npy_uint64 i)
+{
+    return (splitmix64(seed ^ splitmix64(stream ^ splitmix64(i))) >> 11) * (1.0 / 9007199254740992.0);
+}
+
+/* Chooses k of the M weighted candidates by kmeans++ (with probabilities proportional to weight times squared
+   distance to the chosen centers), writes them into centers. */
+static int weighted_kmeanspp(float *candidates, double *weights, Py_ssize_t M, Py_ssize_t dim, Py_ssize_t k,
+                             int minrmsd, npy_uint64 seed, int n_threads, float *centers)
+{
+    int ret;
+    Py_ssize_t i, c, chosen;
+    double *d2, total, u, cumsum;
+    char *taken;
+    float *prepared, *traces;
+
+    prepared = traces = NULL;
+    d2 = malloc(M*sizeof(double));
+    taken = calloc(M, sizeof(char));
+    if(!d2 || !taken) { ret = ASSIGN_ERR_NO_MEMORY; goto error; }
+    /* the chosen centers are candidates, so only the candidates have to be prepared */
+    ret = prepare_frames(candidates, M, dim, minrmsd, &prepared, &traces, n_threads);
+    if(ret != ASSIGN_SUCCESS) goto error;
+    for(i = 0; i < M; ++i) d2[i] = DBL_MAX;
+
+    for(c = 0; c < k; ++c) {
+        /* the first center is drawn in proportion to the weights only */
+        total = 0.0;
+        for(i = 0; i < M; ++i) if(!taken[i]) total += c == 0 ? weights[i] : weights[i] * d2[i];
+        chosen = -1;
+        if(total > 0.0) {
+            u = uniform_draw(seed, 0x6b6d2b2bULL, c) * total;
+            cumsum = 0.0;
+            for(i = 0; i < M; ++i) {
+                if(taken[i]) continue;
+                cumsum += c == 0 ? weights[i] : weights[i] * d2[i];
+                chosen = i;
+                if(cumsum > u) break;
+            }
+        } else {
+            /* all remaining candidates coincide with chosen centers */
+            for(i = 0; i < M && chosen < 0; ++i) if(!taken[i]) chosen = i;
+        }
+        taken[chosen] = 1;
+        memcpy(&centers[c*dim], &candidates[chosen*dim], dim*sizeof(float));
+        if(c + 1 == k) break;
+
+#ifdef USE_OPENMP
+        #pragma omp parallel for schedule(static) num_threads(n_threads)
+#endif
+        for(i = 0; i < M; ++i) {
+            float d;
+            if(taken[i]) continue;
+            d = pair_distance(prepared, traces, i, prepared, traces, chosen, dim);
+            if((double) d*d < d2[i]) d2[i] = (double) d*d;
+        }
+    }
+
+error:
+    free(d2);
+    free(taken);
+    free_prepared_frames(prepared, traces);
+    return ret;
+}
+
+/* Scalable k-means++ (k-means||) initialization. Starting from a random frame, every round samples each frame
+   independently with probability oversampling * k * d^2 / sum(d^2), where d is the distance to the closest
+   candidate so far. The candidates, weighted by the number of frames closest to them, are reduced to k centers
+   by kmeans++. */
+static int kmeans_parallel_init(float *data, Py_ssize_t N, Py_ssize_t dim, char *metric, Py_ssize_t k,
+                                double oversampling, int rounds, npy_uint64 seed, int n_threads, float *centers)
+{
+    int ret, r;
+    Py_ssize_t i, M, n_new, capacity, start;
+    float *candidates, *grown, *mindist2, *new_mindist2;
+    npy_int32 *closest, *new_closest;
+    double psi, *weights;
+    char *taken;
+
+    ret = ASSIGN_SUCCESS;
+#ifdef USE_OPENMP
+    if(n_threads <= 0) n_threads = omp_get_max_threads();
+#endif
+    capacity = k + 1;
+    candidates = malloc(capacity*dim*sizeof(float));
+    mindist2 = malloc(N*sizeof(float));
+    new_mindist2 = malloc(N*sizeof(float));
+    closest = malloc(N*sizeof(npy_int32));
+    new_closest = malloc(N*sizeof(npy_int32));
+    taken = calloc(N, sizeof(char));
+    weights = NULL;
+    if(!candidates || !mindist2 || !new_mindist2 || !closest || !new_closest || !taken) {
+        ret = ASSIGN_ERR_NO_MEMORY; goto error;
+    }
+
+    /* first candidate: a random frame */
+    i = (Py_ssize_t) (uniform_draw(seed, 0, 0) * N);
+    taken[i] = 1;
+    memcpy(candidates, &data[i*dim], dim*sizeof(float));
+    M = 1;
+    ret = c_assign(data, candidates, closest, mindist2, metric, N, 1, dim, n_threads);
+    if(ret != ASSIGN_SUCCESS) goto error;
+
+    for(r = 1; r <= rounds; ++r) {
+        psi = 0.0;
+        for(i = 0; i < N; ++i) psi += mindist2[i];
+        if(psi <= 0.0) break;
+        /* oversample frames in proportion to their squared distance */
+        start = M;
+        for(i = 0; i < N; ++i) {
+            if(taken[i] || uniform_draw(seed, r, i) * psi >= oversampling * k * mindist2[i]) continue;
+            if(M == capacity) {
+                capacity *= 2;
+                if(!(grown = realloc(candidates, capacity*dim*sizeof(float)))) { ret = ASSIGN_ERR_NO_MEMORY; goto error; }
+                candidates = grown;
+            }
+            taken[i] = 1;
+            memcpy(&candidates[M*dim], &data[i*dim], dim*sizeof(float));
+            M++;
+        }
+        n_new = M - start;
+        if(n_new == 0) continue;
+        /* the frames only have to be compared to the new candidates */
+        ret = c_assign(data, &candidates[start*dim], new_closest, new_mindist2, metric, N, n_new, dim, n_threads);
+        if(ret != ASSIGN_SUCCESS) goto error;
+#ifdef USE_OPENMP
+        #pragma omp parallel for num_threads(n_threads) schedule(static)
+#endif
+        for(i = 0; i < N; ++i) {
+            if(new_mindist2[i] < mindist2[i]) {
+                mindist2[i] = new_mindist2[i];
+                closest[i] = (npy_int32) (start + new_closest[i]);
+            }
+        }
+    }
+
+    /* not enough candidates, eg. if there are fewer distinct frames than k: add further frames */
+    start = (Py_ssize_t) (uniform_draw(seed, 0, 1) * N);
+    for(i = 0; M < k && i < N; ++i) {
+        if(taken[(start + i) % N]) continue;
+        if(M == capacity) {
+            capacity *= 2;
+            if(!(grown = realloc(candidates, capacity*dim*sizeof(float)))) { ret = ASSIGN_ERR_NO_MEMORY; goto error; }
+            candidates = grown;
+        }
+        taken[(start + i) % N] = 1;
+        memcpy(&candidates[M*dim], &data[((start + i) % N)*dim], dim*sizeof(float));
+        M++;
+    }
+
+    /* weight of a candidate: number of frames closest to it */
+    if(!(weights = calloc(M, sizeof(double)))) { ret = ASSIGN_ERR_NO_MEMORY; goto error; }
+    for(i = 0; i < N; ++i) weights[closest[i]] += 1.0;
+    /* candidates without frames (the added ones) keep a small weight, so that they can still be chosen */
+    for(i = 0; i < M; ++i) if(weights[i] == 0.0) weights[i] = 1.0;
+
+    ret = weighted_kmeanspp(candidates, weights, M, dim, k, strcmp(metric, "minRMSD") == 0, seed, n_threads,
+                            centers);
+
+error:
+    free(candidates);
+    free(mindist2);
+    free(new_mindist2);
+    free(closest);
+    free(new_closest);
+    free(taken);
+    free(weights);
+    return ret;
+}
+
+static PyObject* initCentersKMParallel(PyObject *self, PyObject *args) {
+    PyArrayObject *np_data;
+    PyObject *py_centers;
+    char *metric;
+    Py_ssize_t k, N, dim;
+    unsigned long long seed;
+    int n_threads, rounds, ret;
+    double oversampling;
+    npy_intp dims[2];
+
+    np_data = NULL; py_centers = NULL; metric = "";
+    n_threads = 1; oversampling = 2.0; rounds = 5;
+
+    if (!PyArg_ParseTuple(args, "O!snK|idi", &PyArray_Type, &np_data, &metric, &k, &seed, &n_threads,
+                          &oversampling, &rounds)) {
+        return NULL;
+    }
+    if(PyArray_TYPE(np_data)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of \"data\" isn\'t float (32)."); return NULL; };
+    if(!PyArray_ISCARRAY_RO(np_data) ) { PyErr_SetString(PyExc_ValueError, "\"data\" isn\'t C-style contiguous or isn\'t behaved."); return NULL; };
+    if(PyArray_NDIM(np_data)!=2) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of \"data\" isn\'t 2."); return NULL; };
+    N = np_data->dimensions[0];
+    dim = np_data->dimensions[1];
+    if(strcmp(metric,"euclidean")!=0 && strcmp(metric,"minRMSD")!=0) {
+        PyErr_SetString(PyExc_ValueError, "metric must be one of \"euclidean\" or \"minRMSD\".");
+        return NULL;
+    }
+    if(k < 1 || k > N) {
+        PyErr_Format(PyExc_ValueError, "can not choose %zd cluster centers from %zd frames.", k, N);
+        return NULL;
+    }
+    if(oversampling <= 0.0 || rounds < 0) {
+        PyErr_SetString(PyExc_ValueError, "oversampling has to be positive and rounds non-negative.");
+        return NULL;
+    }
+
+    dims[0] = k; dims[1] = dim;
+    py_centers = PyArray_SimpleNew(2, dims, NPY_FLOAT32);
+    if(!py_centers) return NULL;
+    load_blas();
+    Py_BEGIN_ALLOW_THREADS
+    ret = kmeans_parallel_init(PyArray_DATA(np_data), N, dim, metric, k, oversampling, rounds, (npy_uint64) seed,
+                               n_threads, PyArray_DATA((PyArrayObject*) py_centers));
+    Py_END_ALLOW_THREADS
+    if(ret != ASSIGN_SUCCESS) {
+        Py_DECREF(py_centers);
+        PyErr_NoMemory();
+        return NULL;
+    }
+    return py_centers;
+}
+
 static char MOD_USAGE[] = "Chunked regular spatial clustering";
 
-static char CLUSTER_USAGE[] = "cluster(chunk, centers, mindist, metric)\n"\
-"Given a chunk of data and a list of cluster centers, update the list of cluster centers with the newly found centers.\n"\
+static char CLUSTER_USAGE[] = "cluster(chunk, centers, metric, n_threads=1)\n"\
+"Performs one k-means (Lloyd) iteration: assigns the frames to their closest cluster centers and moves\n"\
+"every center to the mean of its frames. The cost of the assignment is computed in the same sweep.\n"\
 "\n"\
 "Parameters\n"\
 "----------\n"\
 "chunk : (N,M) C-style contiguous and behaved ndarray of np.float32\n"\
 "    (input) array of N frames, each frame having dimension M\n"\
 "centers : list of (M) behaved ndarrays of np.float32\n"\
-"    (input/output) Possibly empty list of previously found cluster\n"\
-"    centers. New centers are appended to this list.\n"\
-"dmin : float\n"\
-"    (input) Distance parameter for regular spatial clustering. Whenever\n"\
-"    a frame is at least `dmin` away form all cluster centers it is added\n"\
-"    as a new cluster center.\n"\
+"    (input) Non-empty list of the current cluster centers.\n"\
 "metric : string\n"\
 "    (input) One of \"euclidean\" or \"minRMSD\" (case sensitive).\n"\
+"n_threads : int, optional, default=1\n"\
+"    (input) number of threads used for the assignment and the summation, if\n"\
+"    compiled with OpenMP support. Values <= 0 use the OpenMP default.\n"\
 "\n"\
 "Returns\n"\
 "-------\n"\
-"None. The input parameter `centers` is updated instead.\n"\
+"A tuple (new_centers, cost, counts): a (K,M) ndarray of np.float32 with the updated cluster\n"\
+"centers (centers without frames are not moved), the sum of the squared distances of the frames\n"\
+"to their closest given center, ie. the k-means cost of the given centers, and a (K) ndarray of\n"\
+"np.int64 with the number of frames of every center. The means are accumulated in double precision.\n"\
 "\n"\
 "Note\n"\
 "----\n"\
-"This function uses the minRMSD implementation of mdtraj.";
+"This function uses the minRMSD implementation of mdtraj. For the euclidean metric,\n"\
+"the closest centers are found by matrix products (BLAS sgemm of scipy, if available).\n"\
+"The GIL is released during the iteration.";
+
+static char ACCUMULATE_USAGE[] = "accumulate(chunk, centers, metric, sums, counts, n_threads=1)\n"\
+"Assigns the frames to their closest cluster centers and adds them to the sums and counts of their\n"\
+"centers. Calling it for every chunk of the data and dividing the sums by the counts performs one\n"\
+"k-means (Lloyd) iteration on data which does not fit into memory.\n"\
+"\n"\
+"Parameters\n"\
+"----------\n"\
+"chunk : (N,M) C-style contiguous and behaved ndarray of np.float32\n"\
+"    (input) array of N frames, each frame having dimension M\n"\
+"centers : list of (M) behaved ndarrays of np.float32 or (K,M) C-style contiguous ndarray of np.float32\n"\
+"    (input) Non-empty list or array of the current cluster centers.\n"\
+"metric : string\n"\
+"    (input) One of \"euclidean\" or \"minRMSD\" (case sensitive).\n"\
+"sums : (K,M) C-style contiguous ndarray of np.float64\n"\
+"    (input/output) the frames of every center are added to its row.\n"\
+"counts : (K) C-style contiguous ndarray of np.int64\n"\
+"    (input/output) the number of frames of every center is added.\n"\
+"n_threads : int, optional, default=1\n"\
+"    (input) number of threads used for the assignment and the summation, if\n"\
+"    compiled with OpenMP support. Values <= 0 use the OpenMP default.\n"\
+"\n"\
+"Returns\n"\
+"-------\n"\
+"The sum of the squared distances of the frames to their closest center (the k-means cost of the\n"\
+"chunk).\n"\
+"\n"\
+"Note\n"\
+"----\n"\
+"The GIL is released during the assignment and the summation.";
+
+static char CLUSTER_BOUNDED_USAGE[] = "cluster_bounded(chunk, centers, metric, algorithm, labels, upper, lower, n_threads=1)\n"\
+"Performs one k-means (Lloyd) iteration, skipping distance computations by the triangle inequality.\n"\
+"Bounds on the distances of every frame to the centers are kept between the iterations and are\n"\
+"updated in place. The resulting centers are the same as the ones of cluster().\n"\
+"\n"\
+"Parameters\n"\
+"----------\n"\
+"chunk : (N,M) C-style contiguous and behaved ndarray of np.float32\n"\
+"    (input) array of N frames, each frame having dimension M\n"\
+"centers : list of (M) behaved ndarrays of np.float32\n"\
+"    (input) Non-empty list of the current cluster centers.\n"\
+"metric : string\n"\
+"    (input) One of \"euclidean\" or \"minRMSD\" (case sensitive).\n"\
+"algorithm : string\n"\
+"    (input) \"hamerly\" (one lower bound per frame) or \"elkan\" (one lower bound per frame and center).\n"\
+"labels : (N) C-style contiguous ndarray of np.int32\n"\
+"    (input/output) index of the center of every frame. Frames with negative labels are assigned\n"\
+"    from scratch, which is needed in the first iteration.\n"\
+"upper : (N) C-style contiguous ndarray of np.float32\n"\
+"    (input/output) upper bounds of the distances of the frames to their centers.\n"\
+"lower : (N) or (N,K) C-style contiguous ndarray of np.float32\n"\
+"    (input/output) lower bounds of the distances to the second closest center (hamerly) or to every\n"\
+"    center (elkan).\n"\
+"n_threads : int, optional, default=1\n"\
+"    (input) number of threads, if compiled with OpenMP support. Values <= 0 use the OpenMP default.\n"\
+"\n"\
+"Returns\n"\
+"-------\n"\
+"A tuple (new_centers, n_changed, counts): a (K,M) ndarray of np.float32 with the updated cluster\n"\
+"centers, the number of frames which changed their center and a (K) ndarray of np.int64 with the\n"\
+"number of frames of every center. If no frame changed its center, the iteration has converged.";
 
 static char INIT_CENTERS_USAGE[] = "init_centers(data, metric, k)\n"\
 "Given the data, choose \"k\" cluster centers according to the kmeans++ initialization."\
@@ -554,13 +1203,46 @@ static char INIT_CENTERS_USAGE[] = "init_centers(data, metric, k)\n"\
 "----\n"\
 "This function uses the minRMSD implementation of mdtraj.";
 
+static char INIT_CENTERS_PARALLEL_USAGE[] = "init_centers_parallel(data, metric, k, seed, n_threads=1, oversampling=2.0, rounds=5)\n"\
+"Given the data, choose \"k\" cluster centers according to the scalable kmeans++ (k-means||) initialization.\n"\
+"Every round samples about oversampling*k candidate frames in proportion to their squared distance to the\n"\
+"candidates so far, in a single multithreaded pass over the data. The candidates, weighted by the number\n"\
+"of frames closest to them, are reduced to k centers by kmeans++.\n"\
+"\n"\
+"Parameters\n"\
+"----------\n"\
+"data : (N,M) C-style contiguous and behaved ndarray of np.float32\n"\
+"    (input) array of data points, each having dimension M.\n"\
+"metric : string\n"\
+"    (input) One of \"euclidean\" or \"minRMSD\" (case sensitive).\n"\
+"k : int\n"\
+"    (input) the number of cluster centers to be assigned for initialization.\n"\
+"seed : int\n"\
+"    (input) seed of the random draws. The result does not depend on the number of threads.\n"\
+"n_threads : int, optional, default=1\n"\
+"    (input) number of threads, if compiled with OpenMP support. Values <= 0 use the OpenMP default.\n"\
+"oversampling : float, optional, default=2.0\n"\
+"    (input) expected number of candidates per round, in units of k.\n"\
+"rounds : int, optional, default=5\n"\
+"    (input) number of sampling rounds (passes over the data).\n"\
+"\n"\
+"Returns\n"\
+"-------\n"\
+"A (k,M) ndarray of np.float32 with the initial cluster centers.\n"\
+"\n"\
+"Note\n"\
+"----\n"\
+"Bahmani et al., Scalable K-Means++, Proceedings of the VLDB Endowment 5(7), 2012.";
+
 
 static PyMethodDef kmeansMethods[] =
 {
      {"cluster", cluster, METH_VARARGS, CLUSTER_USAGE},
+     {"accumulate", accumulate, METH_VARARGS, ACCUMULATE_USAGE},
+     {"cluster_bounded", cluster_bounded, METH_VARARGS, CLUSTER_BOUNDED_USAGE},
      {"assign",  assign,  METH_VARARGS, ASSIGN_USAGE},
      {"init_centers", initCentersKMpp, METH_VARARGS, INIT_CENTERS_USAGE},
-     {"cost_function", costFunction, METH_VARARGS, "Evaluates the cost function for the k-means clustering algorithm."},
+     {"init_centers_parallel", initCentersKMParallel, METH_VARARGS, INIT_CENTERS_PARALLEL_USAGE},
      {"set_callback", c_set_callback, METH_VARARGS, "For setting a callback."},
      {NULL, NULL, 0, NULL}
 };
@@ -18,124 +18,586 @@
 
 #include <clustering.h>
 
-static PyObject *cluster(PyObject *self, PyObject *args) {
-    PyObject *py_centers, *py_item, *py_res;
-    PyArrayObject *np_chunk, *np_item, *np_new_center;
-    Py_ssize_t N_centers, N_frames, dim, i, j, max_clusters;
-    npy_intp new_dims[1];
-    float *chunk;
-    float **centers;
+/* maximum dimension for which the centers are indexed by a grid (3^dim cells are searched per frame) */
+#define REGSPACE_GRID_MAX_DIM 4
+#define REGSPACE_EMPTY_SLOT -1
+/* number of cells of pivot distances per radius */
+#define REGSPACE_PIVOT_CELLS 2
+
+/* Index over the cluster centers, which finds centers within a radius (the cell width) of a frame without
+   comparing it to all centers. For the euclidean metric in low dimensions, the centers are sorted into the
+   cells of a grid (a hash table of cell coordinates), any center within the radius lies in the cell of the
+   frame or in a neighboring cell. Otherwise, the centers are sorted into cells of their distance to a pivot
+   (the first center) in the same hash table, by the triangle inequality only centers in the cells of a
+   similar pivot distance can be close to the frame. Adding a center takes constant time, the index grows
+   with the number of centers. Frames and centers are prepared by prepare_frames, ie. for minRMSD they are
+   centered once. */
+typedef struct {
+    Py_ssize_t dim, n, capacity;
+    float radius;
+    int use_grid;
+    /* hash table of the cells (grid coordinates, or the cell of the pivot distance), dimension of the keys */
+    Py_ssize_t key_dim, table_mask;
+    npy_int64 *keys;
+    Py_ssize_t *head, *tail, *next;
+    /* pivot, the pivot distances are sorted into cells of width pivot_width */
+    float *pivot_distance, pivot_width;
+} center_index;
+
+static void index_free(center_index *index)
+{
+    free(index->keys);
+    free(index->head);
+    free(index->tail);
+    free(index->next);
+    free(index->pivot_distance);
+}
+
+static void grid_cell(center_index *index, float *x, npy_int64 *cell)
+{
+    Py_ssize_t k;
+    for(k = 0; k < index->dim; ++k) cell[k] = (npy_int64) floor((double) x[k] / index->radius);
+}
+
+/* slot of the hash table holding the given cell, or the empty slot where it would be inserted */
+static Py_ssize_t grid_slot(center_index *index, npy_int64 *cell)
+{
+    Py_ssize_t k, slot;
+    npy_uint64 h;
+
+    h = 0x9E3779B97F4A7C15ULL;
+    for(k = 0; k < index->key_dim; ++k) {
+        h ^= (npy_uint64) cell[k] + 0x9E3779B97F4A7C15ULL + (h << 6) + (h >> 2);
+        h *= 0xBF58476D1CE4E5B9ULL;
+    }
+    slot = (Py_ssize_t) ((h ^ (h >> 31)) & (npy_uint64) index->table_mask);
+    while(index->head[slot] != REGSPACE_EMPTY_SLOT
+          && memcmp(&index->keys[slot*index->key_dim], cell, index->key_dim*sizeof(npy_int64)) != 0) {
+        slot = (slot + 1) & index->table_mask;
+    }
+    return slot;
+}
+
+/* links center c into the list of its cell */
+static void index_link(center_index *index, float *centers, Py_ssize_t c)
+{
+    Py_ssize_t slot;
+    npy_int64 cell[REGSPACE_GRID_MAX_DIM];
+
+    if(index->use_grid) grid_cell(index, &centers[c*index->dim], cell);
+    else cell[0] = (npy_int64) floor((double) index->pivot_distance[c] / index->pivot_width);
+    slot = grid_slot(index, cell);
+    if(index->head[slot] == REGSPACE_EMPTY_SLOT) {
+        memcpy(&index->keys[slot*index->key_dim], cell, index->key_dim*sizeof(npy_int64));
+    }
+    /* the centers of a cell are kept in the order they were added */
+    index->next[c] = REGSPACE_EMPTY_SLOT;
+    if(index->head[slot] == REGSPACE_EMPTY_SLOT) index->head[slot] = c;
+    else index->next[index->tail[slot]] = c;
+    index->tail[slot] = c;
+}
+
+/* Makes room for capacity centers. If the hash table would get more than half full, it is enlarged and the n
+   centers of the index are linked again. */
+static int index_reserve(center_index *index, float *centers, Py_ssize_t capacity)
+{
+    Py_ssize_t table_size, i, *next, *head, *tail;
+    npy_int64 *keys;
+    float *pivot_distance;
+
+    if(capacity < 1) capacity = 1;
+    if(capacity <= index->capacity) return ASSIGN_SUCCESS;
+    next = realloc(index->next, capacity*sizeof(Py_ssize_t));
+    if(!next) return ASSIGN_ERR_NO_MEMORY;
+    index->next = next;
+    if(!index->use_grid) {
+        pivot_distance = realloc(index->pivot_distance, capacity*sizeof(float));
+        if(!pivot_distance) return ASSIGN_ERR_NO_MEMORY;
+        index->pivot_distance = pivot_distance;
+    }
+    index->capacity = capacity;
+
+    /* there are at most as many occupied cells as centers, keep the load factor below 1/2 */
+    table_size = 16;
+    while(table_size < 2*capacity) table_size *= 2;
+    if(index->head && table_size == index->table_mask + 1) return ASSIGN_SUCCESS;
+    keys = malloc(table_size*index->key_dim*sizeof(npy_int64));
+    head = malloc(table_size*sizeof(Py_ssize_t));
+    tail = malloc(table_size*sizeof(Py_ssize_t));
+    if(!keys || !head || !tail) {
+        free(keys);
+        free(head);
+        free(tail);
+        return ASSIGN_ERR_NO_MEMORY;
+    }
+    free(index->keys);
+    free(index->head);
+    free(index->tail);
+    index->keys = keys;
+    index->head = head;
+    index->tail = tail;
+    index->table_mask = table_size - 1;
+    for(i = 0; i < table_size; ++i) index->head[i] = REGSPACE_EMPTY_SLOT;
+    for(i = 0; i < index->n; ++i) index_link(index, centers, i);
+    return ASSIGN_SUCCESS;
+}
+
+static int index_init(center_index *index, Py_ssize_t dim, Py_ssize_t capacity, float radius, int euclidean)
+{
+    memset(index, 0, sizeof(center_index));
+    index->dim = dim;
+    index->radius = radius;
+    index->use_grid = euclidean && dim <= REGSPACE_GRID_MAX_DIM;
+    index->key_dim = index->use_grid ? dim : 1;
+    index->pivot_width = radius / REGSPACE_PIVOT_CELLS;
+    return index_reserve(index, NULL, capacity);
+}
+
+/* Adds center c (the n'th center) to the index, which needs to have room for it. d_pivot is its distance to
+   the pivot (unused for grids). */
+static void index_add(center_index *index, float *centers, float d_pivot)
+{
+    Py_ssize_t c;
+
+    c = index->n;
+    if(!index->use_grid) index->pivot_distance[c] = c == 0 ? 0.0f : d_pivot;
+    index_link(index, centers, c);
+    index->n++;
+}
+
+/* Finds the closest center to frame i among the centers, which might be within the radius of the frame. If
+   first_match is set, the search stops at the first center within the radius. Returns the index of the center
+   (-1, if no center is within the radius) and its distance. The distance of the frame to the pivot is returned
+   in d_pivot. */
+static Py_ssize_t index_query(center_index *index, float *frames, float *frame_traces, Py_ssize_t i,
+                              float *centers, float *center_traces, int first_match, float *mindist, float *d_pivot)
+{
+    Py_ssize_t k, c, slot, pos, best, n_neighbors, neighbor;
+    npy_int64 cell[REGSPACE_GRID_MAX_DIM], neighbor_cell[REGSPACE_GRID_MAX_DIM], first_cell, last_cell, frame_cell;
+    float d, dp, slack;
+
+    best = -1;
+    *mindist = FLT_MAX;
+    *d_pivot = 0.0f;
+    if(index->n == 0) return -1;
+    if(index->use_grid) {
+        grid_cell(index, &frames[i*index->dim], cell);
+        n_neighbors = 1;
+        for(k = 0; k < index->dim; ++k) n_neighbors *= 3;
+        for(neighbor = 0; neighbor < n_neighbors; ++neighbor) {
+            pos = neighbor;
+            for(k = 0; k < index->dim; ++k) {
+                neighbor_cell[k] = cell[k] + (pos % 3) - 1;
+                pos /= 3;
+            }
+            slot = grid_slot(index, neighbor_cell);
+            for(c = index->head[slot]; c != REGSPACE_EMPTY_SLOT; c = index->next[c]) {
+                d = pair_distance(frames, frame_traces, i, centers, center_traces, c, index->dim);
+                if(d < *mindist) { *mindist = d; best = c; }
+                if(first_match && d <= index->radius) return best;
+            }
+        }
+    } else {
+        dp = pair_distance(frames, frame_traces, i, centers, center_traces, 0, index->dim);
+        *d_pivot = dp;
+        /* allow for rounding errors of the distances in the triangle inequality */
+        slack = 1e-5f * (dp + index->radius);
+        first_cell = (npy_int64) floor((double) (dp - index->radius - slack) / index->pivot_width);
+        if(first_cell < 0) first_cell = 0;
+        last_cell = (npy_int64) floor((double) (dp + index->radius + slack) / index->pivot_width);
+        frame_cell = (npy_int64) floor((double) dp / index->pivot_width);
+        /* the cells are visited outwards from the cell of the frame, so that centers with a similar pivot
+           distance (which are more likely to be within the radius) are compared first */
+        for(neighbor = 0; neighbor <= 2*(last_cell - first_cell); ++neighbor) {
+            cell[0] = frame_cell + (neighbor % 2 ? (neighbor + 1) / 2 : -neighbor / 2);
+            if(cell[0] < first_cell || cell[0] > last_cell) continue;
+            slot = grid_slot(index, cell);
+            for(c = index->head[slot]; c != REGSPACE_EMPTY_SLOT; c = index->next[c]) {
+                if(fabsf(index->pivot_distance[c] - dp) > index->radius + slack) continue;
+                d = c == 0 ? dp : pair_distance(frames, frame_traces, i, centers, center_traces, c, index->dim);
+                if(d < *mindist) { *mindist = d; best = c; }
+                if(first_match && d <= index->radius) return best;
+            }
+        }
+    }
+    return *mindist <= index->radius ? best : -1;
+}
+
+/* State of a regular space clustering over many chunks, owned by a capsule: the centers found so far, for
+   minRMSD their centered copies, and the index over them. The buffers grow geometrically. */
+#define REGSPACE_CLUSTERING_CAPSULE "pyemma.regspatial.clustering"
+
+typedef struct {
+    center_index index;
+    Py_ssize_t n_centers, capacity, max_clusters;
+    int euclidean;
+    /* centers as given, prepared centers (the same for euclidean) and their traces */
+    float *centers, *prepared, *traces;
+} clustering_state;
+
+static void clustering_state_free(clustering_state *cs)
+{
+    index_free(&cs->index);
+    if(!cs->euclidean) {
+        free(cs->prepared);
+        free(cs->traces);
+    }
+    free(cs->centers);
+    free(cs);
+}
+
+static void clustering_state_destructor(PyObject *capsule)
+{
+    clustering_state *cs = PyCapsule_GetPointer(capsule, REGSPACE_CLUSTERING_CAPSULE);
+    if(cs) clustering_state_free(cs);
+}
+
+/* makes room for at least n centers */
+static int clustering_state_reserve(clustering_state *cs, Py_ssize_t n)
+{
+    Py_ssize_t capacity, dim;
+    float *buf;
+
+    if(n <= cs->capacity) return ASSIGN_SUCCESS;
+    dim = cs->index.dim;
+    capacity = 2*cs->capacity > n ? 2*cs->capacity : n;
+    if(capacity > cs->max_clusters && n <= cs->max_clusters) capacity = cs->max_clusters;
+    if(!(buf = realloc(cs->centers, capacity*dim*sizeof(float)))) return ASSIGN_ERR_NO_MEMORY;
+    cs->centers = buf;
+    if(cs->euclidean) {
+        cs->prepared = cs->centers;
+    } else {
+        if(!(buf = realloc(cs->prepared, capacity*dim*sizeof(float)))) return ASSIGN_ERR_NO_MEMORY;
+        cs->prepared = buf;
+        if(!(buf = realloc(cs->traces, capacity*sizeof(float)))) return ASSIGN_ERR_NO_MEMORY;
+        cs->traces = buf;
+    }
+    cs->capacity = capacity;
+    return index_reserve(&cs->index, cs->prepared, capacity);
+}
+
+/* adds the given (prepared) center as the next center of the clustering */
+static void clustering_state_add(clustering_state *cs, float *center, float *prepared, float trace, float d_pivot)
+{
+    Py_ssize_t dim = cs->index.dim;
+
+    memcpy(&cs->centers[cs->n_centers*dim], center, dim*sizeof(float));
+    if(!cs->euclidean) {
+        memcpy(&cs->prepared[cs->n_centers*dim], prepared, dim*sizeof(float));
+        cs->traces[cs->n_centers] = trace;
+    }
+    index_add(&cs->index, cs->prepared, d_pivot);
+    cs->n_centers++;
+}
+
+static PyObject *start_clustering(PyObject *self, PyObject *args) {
+    PyArrayObject *np_centers;
+    PyObject *capsule;
+    Py_ssize_t N_centers, dim, i, max_clusters, capacity;
+    float *centers, *prepared, *traces, dmin, d_pivot;
     char *metric;
-    float cutoff, mindist;
-    float d;
-    float *buffer_a, *buffer_b;
-    float (*distance)(float*, float*, size_t, float*, float*);
+    clustering_state *cs;
+    int ret, euclidean;
 
-    py_centers = NULL; py_item = NULL; py_res = NULL;
-    np_chunk = NULL; np_item = NULL;
-    centers = NULL; metric=""; chunk = NULL;
-    buffer_a = NULL; buffer_b = NULL;
+    np_centers = NULL;
+    metric = "";
+    prepared = traces = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!O!fsn", &PyArray_Type, &np_chunk, &PyList_Type, &py_centers, &cutoff, &metric, &max_clusters)) goto error; /* ref:borr. */
+    if (!PyArg_ParseTuple(args, "O!fsn", &PyArray_Type, &np_centers, &dmin, &metric, &max_clusters)) return NULL;
 
-    if(cutoff<=0.0) {
-        PyErr_SetString(PyExc_ValueError, "cutoff can\'t be zero or negative.");
-        goto error;
+    if(dmin<=0.0) { PyErr_SetString(PyExc_ValueError, "cutoff can\'t be zero or negative."); return NULL; }
+    if(PyArray_TYPE(np_centers)!=NPY_FLOAT32 || !PyArray_ISCARRAY_RO(np_centers) || PyArray_NDIM(np_centers)!=2
+       || np_centers->dimensions[1]==0) {
+        PyErr_SetString(PyExc_ValueError, "centers must be a C-style contiguous float32 array of non-zero dimension.");
+        return NULL;
+    }
+    N_centers = np_centers->dimensions[0];
+    dim = np_centers->dimensions[1];
+    if(strcmp(metric,"euclidean")==0)
+        euclidean = 1;
+    else if(strcmp(metric,"minRMSD")==0)
+        euclidean = 0;
+    else {
+        PyErr_SetString(PyExc_ValueError, "metric must be one of \"euclidean\" or \"minRMSD\".");
+        return NULL;
+    }
+    centers = PyArray_DATA(np_centers);
+
+    if(!(cs = calloc(1, sizeof(clustering_state)))) return PyErr_NoMemory();
+    cs->euclidean = euclidean;
+    cs->max_clusters = max_clusters > N_centers ? max_clusters : N_centers;
+
+    Py_BEGIN_ALLOW_THREADS
+    capacity = N_centers > 16 ? N_centers : 16;
+    if(capacity > cs->max_clusters) capacity = cs->max_clusters > 0 ? cs->max_clusters : 1;
+    ret = index_init(&cs->index, dim, capacity, dmin, euclidean);
+    if(ret == ASSIGN_SUCCESS) ret = clustering_state_reserve(cs, capacity);
+    if(ret == ASSIGN_SUCCESS) ret = prepare_frames(centers, N_centers, dim, !euclidean, &prepared, &traces, 1);
+    if(ret == ASSIGN_SUCCESS) {
+        /* the given centers are taken as they are, even if they are closer than dmin */
+        for(i = 0; i < N_centers; ++i) {
+            d_pivot = i == 0 ? 0.0f : pair_distance(prepared, traces, i, cs->prepared, cs->traces, 0, dim);
+            clustering_state_add(cs, &centers[i*dim], &prepared[i*dim], traces ? traces[i] : 0.0f, d_pivot);
+        }
+        free_prepared_frames(prepared, traces);
     }
+    Py_END_ALLOW_THREADS
+    if(ret != ASSIGN_SUCCESS) { clustering_state_free(cs); return PyErr_NoMemory(); }
+
+    capsule = PyCapsule_New(cs, REGSPACE_CLUSTERING_CAPSULE, clustering_state_destructor);
+    if(!capsule) clustering_state_free(cs);
+    return capsule;
+}
+
+static PyObject *cluster(PyObject *self, PyObject *args) {
+    PyArrayObject *np_chunk;
+    PyObject *capsule;
+    Py_ssize_t N_frames, dim, i;
+    float *chunk;
+    float mindist, d_pivot;
+    float *frames, *frame_traces;
+    clustering_state *cs;
+    int ret, exceeded;
+
+    np_chunk = NULL; capsule = NULL;
+    frames = frame_traces = NULL;
+
+    if (!PyArg_ParseTuple(args, "O!O", &PyArray_Type, &np_chunk, &capsule)) return NULL; /* ref:borr. */
+    if(!(cs = PyCapsule_GetPointer(capsule, REGSPACE_CLUSTERING_CAPSULE))) return NULL;
+    dim = cs->index.dim;
 
     /* import chunk */
-    if(PyArray_TYPE(np_chunk)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of \"chunk\" isn\'t float (32)."); goto error; };
-    if(!PyArray_ISCARRAY_RO(np_chunk) ) { PyErr_SetString(PyExc_ValueError, "\"chunk\" isn\'t C-style contiguous or isn\'t behaved."); goto error; };
-    if(PyArray_NDIM(np_chunk)!=2) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of \"chunk\" isn\'t 2."); goto error;  };
+    if(PyArray_TYPE(np_chunk)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of \"chunk\" isn\'t float (32)."); return NULL; };
+    if(!PyArray_ISCARRAY_RO(np_chunk) ) { PyErr_SetString(PyExc_ValueError, "\"chunk\" isn\'t C-style contiguous or isn\'t behaved."); return NULL; };
+    if(PyArray_NDIM(np_chunk)!=2) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of \"chunk\" isn\'t 2."); return NULL;  };
     N_frames = np_chunk->dimensions[0];
-    dim = np_chunk->dimensions[1];
-    if(dim==0) {
-        PyErr_SetString(PyExc_ValueError, "chunk dimension must be larger than zero.");
-        goto error;
+    if(np_chunk->dimensions[1]!=dim) {
+        PyErr_SetString(PyExc_ValueError, "Dimension of the frames doesn\'t match the dimension of the centers.");
+        return NULL;
     }
     chunk = PyArray_DATA(np_chunk);
 
-    if(strcmp(metric,"euclidean")==0)
-        distance = euclidean_distance;
-    else if(strcmp(metric,"minRMSD")==0) {
-        distance = minRMSD_distance;
-        buffer_a = malloc(dim*sizeof(float));
-        buffer_b = malloc(dim*sizeof(float));
-        if(!buffer_a || !buffer_b) { PyErr_NoMemory(); goto error; }
+    exceeded = 0;
+    Py_BEGIN_ALLOW_THREADS
+    /* for minRMSD, the frames are centered once, new centers are copied from the centered frames */
+    ret = prepare_frames(chunk, N_frames, dim, !cs->euclidean, &frames, &frame_traces, 1);
+    if(ret == ASSIGN_SUCCESS) {
+        /* do the clustering: a frame becomes a new center, if no center is within the cutoff */
+        for(i = 0; i < N_frames; ++i) {
+            if(index_query(&cs->index, frames, frame_traces, i, cs->prepared, cs->traces, 1, &mindist,
+                           &d_pivot) >= 0) continue;
+            if(cs->n_centers+1>cs->max_clusters) {
+                exceeded = 1;
+                break;
+            }
+            if((ret = clustering_state_reserve(cs, cs->n_centers + 1)) != ASSIGN_SUCCESS) break;
+            clustering_state_add(cs, &chunk[i*dim], &frames[i*dim], frame_traces ? frame_traces[i] : 0.0f,
+                                 d_pivot);
+        }
+        free_prepared_frames(frames, frame_traces);
+    }
+    Py_END_ALLOW_THREADS
+    if(ret != ASSIGN_SUCCESS) { PyErr_NoMemory(); return NULL; }
+    if(exceeded) {
+        PyErr_SetString(PyExc_RuntimeError, "Maximum number of cluster centers reached. "\
+                                            "Consider increasing max_clusters or choose "\
+                                            "a larger minimum distance, dmin.");
+        return NULL;
     }
+
+    return Py_BuildValue("n", cs->n_centers);
+}
+
+static PyObject *clustering_centers(PyObject *self, PyObject *args) {
+    PyObject *capsule;
+    PyArrayObject *np_centers;
+    npy_intp dims[2];
+    clustering_state *cs;
+
+    capsule = NULL;
+    if (!PyArg_ParseTuple(args, "O", &capsule)) return NULL;
+    if(!(cs = PyCapsule_GetPointer(capsule, REGSPACE_CLUSTERING_CAPSULE))) return NULL;
+    dims[0] = cs->n_centers;
+    dims[1] = cs->index.dim;
+    np_centers = (PyArrayObject*) PyArray_SimpleNew(2, dims, NPY_FLOAT32);
+    if(!np_centers) return NULL;
+    if(cs->n_centers > 0) memcpy(PyArray_DATA(np_centers), cs->centers, cs->n_centers*dims[1]*sizeof(float));
+    return (PyObject*) np_centers;
+}
+
+/* An index over a fixed set of centers for repeated assignments, owned by a capsule. The centers are copied
+   (euclidean) or copied and centered (minRMSD), so the index does not refer to memory of the caller. */
+#define REGSPACE_INDEX_CAPSULE "pyemma.regspatial.center_index"
+
+typedef struct {
+    center_index index;
+    Py_ssize_t n_centers;
+    int euclidean;
+    float *centers, *traces;
+} assignment_index;
+
+static void assignment_index_free(assignment_index *ai)
+{
+    index_free(&ai->index);
+    if(ai->euclidean) free(ai->centers);
+    else free_prepared_frames(ai->centers, ai->traces);
+    free(ai);
+}
+
+static void assignment_index_destructor(PyObject *capsule)
+{
+    assignment_index *ai = PyCapsule_GetPointer(capsule, REGSPACE_INDEX_CAPSULE);
+    if(ai) assignment_index_free(ai);
+}
+
+static PyObject *build_index(PyObject *self, PyObject *args) {
+    PyArrayObject *np_centers;
+    PyObject *capsule;
+    Py_ssize_t N_centers, dim, i;
+    float *centers, radius, d_pivot;
+    char *metric;
+    assignment_index *ai;
+    int ret, euclidean, n_threads;
+
+    np_centers = NULL;
+    metric = "";
+    n_threads = 1;
+
+    if (!PyArg_ParseTuple(args, "O!fs|i", &PyArray_Type, &np_centers, &radius, &metric, &n_threads)) return NULL;
+
+    if(radius<=0.0) { PyErr_SetString(PyExc_ValueError, "dmin can\'t be zero or negative."); return NULL; }
+    if(PyArray_TYPE(np_centers)!=NPY_FLOAT32 || !PyArray_ISCARRAY_RO(np_centers) || PyArray_NDIM(np_centers)!=2
+       || np_centers->dimensions[0]==0 || np_centers->dimensions[1]==0) {
+        PyErr_SetString(PyExc_ValueError, "centers must be a non-empty C-style contiguous float32 array.");
+        return NULL;
+    }
+    N_centers = np_centers->dimensions[0];
+    dim = np_centers->dimensions[1];
+    if(strcmp(metric,"euclidean")==0)
+        euclidean = 1;
+    else if(strcmp(metric,"minRMSD")==0)
+        euclidean = 0;
     else {
         PyErr_SetString(PyExc_ValueError, "metric must be one of \"euclidean\" or \"minRMSD\".");
-        goto error;
-    }
-
-    /* import list of cluster centers */
-    N_centers = PyList_Size(py_centers);
-    centers = malloc(N_centers*sizeof(float*));
-    if(!centers) { PyErr_NoMemory(); goto error; }
-
-    for(i = 0; i < N_centers; ++i) {
-        py_item = PyList_GetItem(py_centers,i); /* ref:borr. */
-        if(!py_item) goto error;
-        if(!PyArray_Check(py_item)) { PyErr_SetString(PyExc_ValueError, "Elements of centers must be numpy arrays."); goto error; }
-        np_item = (PyArrayObject*)py_item;
-        if(PyArray_TYPE(np_item)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of cluster center isn\'t float (32)."); goto error; };
-        if(!PyArray_ISBEHAVED_RO(np_item) ) { PyErr_SetString(PyExc_ValueError, "cluster center isn\'t behaved."); goto error; };
-        if(PyArray_NDIM(np_item)!=1) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of cluster centers must be 1."); goto error;  };
-        if(np_item->dimensions[0]!=dim) {
-          PyErr_SetString(PyExc_ValueError, "Dimension of cluster centers doesn\'t match dimension of frames.");
-          goto error;
-        }
-        centers[i] = (float*)PyArray_DATA(np_item);
+        return NULL;
     }
+    centers = PyArray_DATA(np_centers);
 
-    /* do the clustering */
-    for(i = 0; i < N_frames; ++i) {
-        mindist = FLT_MAX;
-        for(j = 0; j < N_centers; ++j) {
-            d = distance(&chunk[i*dim], centers[j], dim, buffer_a, buffer_b);
-            if(d<mindist) mindist = d;
+    if(!(ai = calloc(1, sizeof(assignment_index)))) return PyErr_NoMemory();
+    ai->n_centers = N_centers;
+    ai->euclidean = euclidean;
+
+    Py_BEGIN_ALLOW_THREADS
+#ifdef USE_OPENMP
+    if(n_threads <= 0) n_threads = omp_get_max_threads();
+#endif
+    if(euclidean) {
+        ai->centers = malloc(N_centers*dim*sizeof(float));
+        if(ai->centers) {
+            memcpy(ai->centers, centers, N_centers*dim*sizeof(float));
+            ret = ASSIGN_SUCCESS;
+        } else {
+            ret = ASSIGN_ERR_NO_MEMORY;
+        }
+    } else {
+        ret = prepare_frames(centers, N_centers, dim, 1, &ai->centers, &ai->traces, n_threads);
+    }
+    if(ret == ASSIGN_SUCCESS) ret = index_init(&ai->index, dim, N_centers, radius, euclidean);
+    if(ret == ASSIGN_SUCCESS) {
+        for(i = 0; i < N_centers; ++i) {
+            d_pivot = i == 0 ? 0.0f : pair_distance(ai->centers, ai->traces, i, ai->centers, ai->traces, 0, dim);
+            index_add(&ai->index, ai->centers, d_pivot);
         }
-        if(mindist > cutoff) {
-            if(N_centers+1>max_clusters) {
-                PyErr_SetString(PyExc_RuntimeError, "Maximum number of cluster centers reached. "\
-                                                    "Consider increasing max_clusters or choose "\
-                                                    "a larger minimum distance, dmin.");
-                goto error;
+    }
+    Py_END_ALLOW_THREADS
+    if(ret != ASSIGN_SUCCESS) { assignment_index_free(ai); return PyErr_NoMemory(); }
+
+    capsule = PyCapsule_New(ai, REGSPACE_INDEX_CAPSULE, assignment_index_destructor);
+    if(!capsule) assignment_index_free(ai);
+    return capsule;
+}
+
+static PyObject *assign_indexed(PyObject *self, PyObject *args) {
+    PyArrayObject *np_chunk, *np_dtraj;
+    PyObject *capsule;
+    Py_ssize_t N_centers, N_frames, dim, i;
+    float *chunk;
+    npy_int32 *dtraj;
+    float *frames, *frame_traces;
+    assignment_index *ai;
+    int ret, n_threads;
+
+    np_chunk = NULL; np_dtraj = NULL; capsule = NULL;
+    frames = frame_traces = NULL;
+    n_threads = 1;
+
+    if (!PyArg_ParseTuple(args, "O!OO!|i", &PyArray_Type, &np_chunk, &capsule, &PyArray_Type, &np_dtraj,
+                          &n_threads)) return NULL;
+
+    if(!(ai = PyCapsule_GetPointer(capsule, REGSPACE_INDEX_CAPSULE))) return NULL;
+    N_centers = ai->n_centers;
+    dim = ai->index.dim;
+    if(PyArray_TYPE(np_chunk)!=NPY_FLOAT32) { PyErr_SetString(PyExc_ValueError, "dtype of \"chunk\" isn\'t float (32)."); return NULL; };
+    if(!PyArray_ISCARRAY_RO(np_chunk) ) { PyErr_SetString(PyExc_ValueError, "\"chunk\" isn\'t C-style contiguous or isn\'t behaved."); return NULL; };
+    if(PyArray_NDIM(np_chunk)!=2) { PyErr_SetString(PyExc_ValueError, "Number of dimensions of \"chunk\" isn\'t 2."); return NULL; };
+    N_frames = np_chunk->dimensions[0];
+    if(np_chunk->dimensions[1]!=dim) {
+        PyErr_SetString(PyExc_ValueError, "Dimension of the frames doesn\'t match the dimension of the centers.");
+        return NULL;
+    }
+    if(PyArray_TYPE(np_dtraj)!=NPY_INT32 || !PyArray_ISCARRAY(np_dtraj) || PyArray_NDIM(np_dtraj)!=1
+       || np_dtraj->dimensions[0]!=N_frames) {
+        PyErr_SetString(PyExc_ValueError, "dtraj must be a writeable C-style contiguous int32 array with one "\
+                                          "element per frame.");
+        return NULL;
+    }
+    chunk = PyArray_DATA(np_chunk);
+    dtraj = PyArray_DATA(np_dtraj);
+
+    Py_BEGIN_ALLOW_THREADS
+#ifdef USE_OPENMP
+    if(n_threads <= 0) n_threads = omp_get_max_threads();
+#endif
+    ret = prepare_frames(chunk, N_frames, dim, !ai->euclidean, &frames, &frame_traces, n_threads);
+    if(ret == ASSIGN_SUCCESS) {
+#ifdef USE_OPENMP
+        #pragma omp parallel for schedule(dynamic, 256) num_threads(n_threads)
+#endif
+        for(i = 0; i < N_frames; ++i) {
+            Py_ssize_t j;
+            npy_int32 best;
+            float d, mindist, d_pivot;
+
+            best = (npy_int32) index_query(&ai->index, frames, frame_traces, i, ai->centers, ai->traces, 0,
+                                           &mindist, &d_pivot);
+            if(best < 0) {
+                /* no center within dmin, eg. for frames outside of the clustered data: compare to all */
+                mindist = FLT_MAX;
+                for(j = 0; j < N_centers; ++j) {
+                    d = pair_distance(frames, frame_traces, i, ai->centers, ai->traces, j, dim);
+                    if(d < mindist) { mindist = d; best = (npy_int32) j; }
+                }
             }
-            new_dims[0] = dim;
-            np_new_center = (PyArrayObject*) PyArray_SimpleNew(1, new_dims, NPY_FLOAT32); /* ref:new */
-            if(!np_new_center) goto error;
-            memcpy(PyArray_DATA(np_new_center), &chunk[i*dim], sizeof(float)*dim);
-            if(PyList_Append(py_centers, (PyObject*)np_new_center)!=0) goto error; /* ref:not stolen */
-            Py_DECREF(np_new_center);
-            centers = realloc(centers, (N_centers+1)*sizeof(float*));
-            if(!centers) { PyErr_NoMemory(); goto error; }
-            centers[N_centers] = (float*)PyArray_DATA(np_new_center);
-            N_centers++;
+            dtraj[i] = best;
         }
     }
+    free_prepared_frames(frames, frame_traces);
+    Py_END_ALLOW_THREADS
+    if(ret != ASSIGN_SUCCESS) { PyErr_NoMemory(); return NULL; }
 
-    py_res = Py_BuildValue(""); /* =None */
-    /* fall through */
-error:
-    free(centers);
-    free(buffer_a);
-    free(buffer_b);
-    return py_res;
+    Py_RETURN_NONE;
 }
 
 static char MOD_USAGE[] = "Chunked regular spatial clustering";
 
-static char CLUSTER_USAGE[] = "cluster(chunk, centers, mindist, metric)\n"\
-"Given a chunk of data and a list of cluster centers, update the list of cluster centers with the newly found centers.\n"\
+static char START_CLUSTERING_USAGE[] = "start_clustering(centers, dmin, metric, max_clusters)\n"\
+"Starts a regular space clustering, which is continued chunk by chunk by cluster().\n"\
 "\n"\
 "Parameters\n"\
 "----------\n"\
-"chunk : (N,M) C-style contiguous and behaved ndarray of np.float32\n"\
-"    (input) array of N frames, each frame having dimension M\n"\
-"centers : list of (M) behaved ndarrays of np.float32\n"\
-"    (input/output) Possibly empty list of previously found cluster\n"\
-"    centers. New centers are appended to this list.\n"\
+"centers : (K,M) C-style contiguous ndarray of np.float32\n"\
+"    (input) initial cluster centers (K may be zero). They are copied (and\n"\
+"    centered for the minRMSD metric) once.\n"\
 "dmin : float\n"\
 "    (input) Distance parameter for regular spatial clustering. Whenever\n"\
 "    a frame is at least `dmin` away form all cluster centers it is added\n"\
@@ -143,22 +605,94 @@ static char CLUSTER_USAGE[] = "cluster(chunk, centers, mindist, metric)\n"\
 "metric : string\n"\
 "    (input) One of \"euclidean\" or \"minRMSD\" (case sensitive).\n"\
 "max_clusters : unsigned integer\n"\
-"    (input) Maximum allowed number of cluster. The function will raise\n"\
-"    a `RuntimeError` when this limit is exceeded.\n"\
+"    (input) Maximum allowed number of cluster.\n"\
+"\n"\
+"Returns\n"\
+"-------\n"\
+"An opaque capsule holding the centers found so far and the index over them,\n"\
+"which is released with the capsule.";
+
+static char CLUSTER_USAGE[] = "cluster(chunk, clustering)\n"\
+"Given a chunk of data, adds the newly found centers to the clustering.\n"\
+"\n"\
+"Parameters\n"\
+"----------\n"\
+"chunk : (N,M) C-style contiguous and behaved ndarray of np.float32\n"\
+"    (input) array of N frames, each frame having dimension M\n"\
+"clustering : capsule\n"\
+"    (input/output) the clustering, the result of start_clustering().\n"\
 "\n"\
 "Returns\n"\
 "-------\n"\
-"None. The input parameter `centers` is updated instead.\n"\
+"The number of cluster centers. Raises a `RuntimeError`, when max_clusters\n"\
+"would be exceeded, then the clustering holds max_clusters centers.\n"\
 "\n"\
 "Note\n"\
 "----\n"\
-"This function uses the minRMSD implementation of mdtraj.";
+"This function uses the minRMSD implementation of mdtraj. The centers are\n"\
+"indexed, so that a frame is not compared to all centers: by a grid of cells\n"\
+"of width dmin for the euclidean metric in up to 4 dimensions, otherwise by\n"\
+"their distance to the first center and the triangle inequality. The index\n"\
+"and the centered centers are kept for all chunks. The GIL is released during\n"\
+"the clustering.";
+
+static char CLUSTERING_CENTERS_USAGE[] = "clustering_centers(clustering)\n"\
+"The cluster centers found so far by a clustering of start_clustering().\n"\
+"\n"\
+"Returns\n"\
+"-------\n"\
+"A new (K,M) ndarray of np.float32 holding the centers.";
+
+static char BUILD_INDEX_USAGE[] = "build_index(centers, dmin, metric, n_threads=1)\n"\
+"Builds the index over the cluster centers of cluster() with the radius dmin, for repeated\n"\
+"assignments by assign_indexed().\n"\
+"\n"\
+"Parameters\n"\
+"----------\n"\
+"centers : (K,M) C-style contiguous ndarray of np.float32\n"\
+"    (input) Non-empty array of cluster centers. They are copied (and centered\n"\
+"    for the minRMSD metric) once.\n"\
+"dmin : float\n"\
+"    (input) radius of the index, the minimum distance of the regular space clustering.\n"\
+"metric : string\n"\
+"    (input) One of \"euclidean\" or \"minRMSD\" (case sensitive).\n"\
+"n_threads : int, optional, default=1\n"\
+"    (input) number of threads the centers are centered by, if compiled\n"\
+"    with OpenMP support. Values <= 0 use the OpenMP default.\n"\
+"\n"\
+"Returns \n"\
+"-------\n"\
+"An opaque capsule holding the index, which is released with the capsule.";
+
+static char ASSIGN_INDEXED_USAGE[] = "assign_indexed(chunk, index, dtraj, n_threads=1)\n"\
+"Assigns frames in `chunk` to the closest cluster centers, using an index over the centers\n"\
+"built by build_index(). Frames without a center within dmin are compared to all centers.\n"\
+"\n"\
+"Parameters\n"\
+"----------\n"\
+"chunk : (N,M) C-style contiguous and behaved ndarray of np.float32\n"\
+"    (input) array of N frames, each frame having dimension M\n"\
+"index : capsule\n"\
+"    (input) index over the cluster centers, the result of build_index().\n"\
+"dtraj : (N) ndarray of np.int32\n"\
+"    (output) discretized trajectory\n"\
+"n_threads : int, optional, default=1\n"\
+"    (input) number of threads the frames are distributed to, if compiled\n"\
+"    with OpenMP support. Values <= 0 use the OpenMP default.\n"\
+"\n"\
+"Returns \n"\
+"-------\n"\
+"None";
 
 
 static PyMethodDef regspatialMethods[] =
 {
+     {"start_clustering", start_clustering, METH_VARARGS, START_CLUSTERING_USAGE},
      {"cluster", cluster, METH_VARARGS, CLUSTER_USAGE},
+     {"clustering_centers", clustering_centers, METH_VARARGS, CLUSTERING_CENTERS_USAGE},
      {"assign",  assign,  METH_VARARGS, ASSIGN_USAGE},
+     {"build_index", build_index, METH_VARARGS, BUILD_INDEX_USAGE},
+     {"assign_indexed", assign_indexed, METH_VARARGS, ASSIGN_INDEXED_USAGE},
      {NULL, NULL, 0, NULL}
 };
 
@@ -100,33 +100,36 @@ class DataInMemory(ReaderInterface):
     def _reset(self, context=None):
         """Resets the data producer
         """
-        self._itraj = 0
-        self._t = 0
+        if context is not None:
+            context.itraj = context.first_trajectory
+            context.t = 0
 
     def _next_chunk(self, ctx):
         # finished once with all trajectories? so _reset the pointer to allow
         # multi-pass
-        if self._itraj >= self._ntraj:
-            self._reset()
+        if ctx.itraj >= self._ntraj:
+            self._reset(ctx)
 
-        traj_len = self._lengths[self._itraj]
-        traj = self._data[self._itraj]
+        traj_len = self._lengths[ctx.itraj]
+        traj = self._data[ctx.itraj]
 
         # complete trajectory mode
         if self._chunksize == 0:
             if not ctx.uniform_stride:
-                X = self._data[self._itraj][ctx.ra_indices_for_traj(self._itraj)]
-                self._itraj += 1
+                X = traj[ctx.ra_indices_for_traj(ctx.itraj)]
+                if ctx.lag != 0:
+                    Y = traj[ctx.ra_lagged_indices_for_traj(ctx.itraj, traj_len)]
+                ctx.itraj += 1
                 # skip trajs which are not included in stride
-                while self._itraj not in ctx.traj_keys and self._itraj < self.number_of_trajectories():
-                    self._itraj += 1
+                while ctx.itraj not in ctx.traj_keys and ctx.itraj < self.number_of_trajectories():
+                    ctx.itraj += 1
                 if ctx.lag == 0:
                     return X
                 else:
-                    raise ValueError("Random access with lag not supported")
+                    return X, Y
             else:
                 X = traj[::ctx.stride]
-                self._itraj += 1
+                ctx.itraj += 1
                 if ctx.lag == 0:
                     return X
                 else:
@@ -135,42 +138,42 @@ class DataInMemory(ReaderInterface):
         # chunked mode
         else:
             if not ctx.uniform_stride:
-                Y0 = self._data[self._itraj][
-                    ctx.ra_indices_for_traj(self._itraj)[self._t:min(
-                        self._t + self.chunksize, ctx.ra_trajectory_length(self._itraj)
-                    )]
-                ]
+                chunk = slice(ctx.t, min(ctx.t + self.chunksize, ctx.ra_trajectory_length(ctx.itraj)))
+                Y0 = traj[ctx.ra_indices_for_traj(ctx.itraj)[chunk]]
                 if ctx.lag != 0:
-                    raise ValueError("Random access with lag not supported")
+                    Ytau = traj[ctx.ra_lagged_indices_for_traj(ctx.itraj, traj_len)[chunk]]
 
-                self._t += self.chunksize
-                if self._t >= ctx.ra_trajectory_length(self._itraj):
-                    self._itraj += 1
-                    self._t = 0
+                ctx.t += self.chunksize
+                if ctx.t >= ctx.ra_trajectory_length(ctx.itraj):
+                    ctx.itraj += 1
+                    ctx.t = 0
 
                 # skip trajs which are not included in stride
-                while (self._itraj not in ctx.traj_keys or self._t >= ctx.ra_trajectory_length(self._itraj)) \
-                        and self._itraj < self.number_of_trajectories():
-                    self._itraj += 1
-                    self._t = 0
-                return Y0
+                while (ctx.itraj not in ctx.traj_keys or ctx.t >= ctx.ra_trajectory_length(ctx.itraj)) \
+                        and ctx.itraj < self.number_of_trajectories():
+                    ctx.itraj += 1
+                    ctx.t = 0
+                if ctx.lag == 0:
+                    return Y0
+                else:
+                    return Y0, Ytau
             else:
-                upper_bound = min(self._t + self._chunksize * ctx.stride, traj_len)
-                slice_x = slice(self._t, upper_bound, ctx.stride)
+                upper_bound = min(ctx.t + self._chunksize * ctx.stride, traj_len)
+                slice_x = slice(ctx.t, upper_bound, ctx.stride)
 
                 X = traj[slice_x]
 
                 if ctx.lag != 0:
                     upper_bound_Y = min(
-                         self._t + ctx.lag + self._chunksize * ctx.stride, traj_len)
-                    slice_y = slice(self._t + ctx.lag, upper_bound_Y, ctx.stride)
+                         ctx.t + ctx.lag + self._chunksize * ctx.stride, traj_len)
+                    slice_y = slice(ctx.t + ctx.lag, upper_bound_Y, ctx.stride)
                     Y = traj[slice_y]
 
-                self._t = upper_bound
+                ctx.t = upper_bound
 
                 if upper_bound >= traj_len:
-                    self._itraj += 1
-                    self._t = 0
+                    ctx.itraj += 1
+                    ctx.t = 0
 
                 if ctx.lag == 0:
                     return X
@@ -97,13 +97,6 @@ class FeatureReader(ReaderInterface):
         # Check that the topology and the files in the filelist can actually work together
         self._assert_toptraj_consistency()
 
-        # iteration
-        self._mditer = None
-        # current lag time
-        self._curr_lag = 0
-        # time lagged iterator
-        self._mditer2 = None
-
         self.__set_dimensions_and_lengths()
         self._parametrized = True
 
@@ -150,30 +143,42 @@ class FeatureReader(ReaderInterface):
         return patches.iterload(filename, chunk=self.chunksize,
                                 top=self.topfile, skip=skip, stride=stride, atom_indices=atom_indices)
 
-    def _close(self):
+    def _close(self, context=None):
+        if context is None:
+            return
         try:
-            if self._mditer:
-                self._mditer.close()
-            if self._mditer2:
-                self._mditer2.close()
+            if getattr(context, 'mditer', None):
+                context.mditer.close()
+            if getattr(context, 'mditer2', None):
+                context.mditer2.close()
         except:
             self._logger.exception("something went wrong closing file handles")
 
+    def _open_trajectory(self, context):
+        """ opens the iterator of the current trajectory of the given context """
+        if not context.uniform_stride:
+            context.mditer = self._create_iter(
+                self.trajfiles[context.itraj], stride=context.ra_indices_for_traj(context.itraj)
+            )
+        else:
+            context.mditer = self._create_iter(self.trajfiles[context.itraj], stride=context.stride)
+        # the time lagged iterator (mditer2) is opened only if requested due lag parameter!
+        context.mditer2 = None
+        context.curr_lag = 0
+
     def _reset(self, context=None):
         """
         resets the chunk reader
         """
-        self._itraj = 0
-        self._curr_lag = 0
-        if len(self.trajfiles) >= 1:
-            self._t = 0
-            if context and not context.uniform_stride:
-                self._itraj = min(context.traj_keys)
-                self._mditer = self._create_iter(
-                    self.trajfiles[self._itraj], stride=context.ra_indices_for_traj(self._itraj)
-                )
-            else:
-                self._mditer = self._create_iter(self.trajfiles[0], stride=context.stride if context else 1)
+        if context is None:
+            return
+        self._close(context)
+        context.itraj = context.first_trajectory
+        context.t = 0
+        if context.itraj < len(self.trajfiles):
+            if not context.uniform_stride:
+                context.itraj = min(context.traj_keys)
+            self._open_trajectory(context)
 
     def _next_chunk(self, context=None):
         """
@@ -182,63 +187,64 @@ class FeatureReader(ReaderInterface):
 
         :return: a feature mapped vector X, or (X, Y) if lag > 0
         """
-        chunk = next(self._mditer)
+        chunk = next(context.mditer)
         shape = chunk.xyz.shape
 
         if context.lag > 0:
-            if not context.uniform_stride:
-                raise ValueError("random access stride with lag not supported")
-            if self._curr_lag == 0:
+            if context.curr_lag == 0:
                 # lag time or trajectory index changed, so open lagged iterator
                 if __debug__:
                     self._logger.debug("open time lagged iterator for traj %i with lag %i"
-                                       % (self._itraj, context.lag))
-                self._curr_lag = context.lag
-                self._mditer2 = self._create_iter(self.trajfiles[self._itraj],
-                                                  skip=self._curr_lag,
-                                                  stride=context.stride)
+                                       % (context.itraj, context.lag))
+                context.curr_lag = context.lag
+                if not context.uniform_stride:
+                    # read only the frames lagged to the requested ones
+                    lagged = context.ra_lagged_indices_for_traj(context.itraj,
+                                                                self.trajectory_length(context.itraj, stride=1))
+                    context.mditer2 = self._create_iter(self.trajfiles[context.itraj], stride=lagged) \
+                        if len(lagged) > 0 else None
+                else:
+                    context.mditer2 = self._create_iter(self.trajfiles[context.itraj],
+                                                        skip=context.curr_lag,
+                                                        stride=context.stride)
+            adv_chunk = None
             try:
-                adv_chunk = next(self._mditer2)
+                if context.mditer2 is None:
+                    raise StopIteration
+                adv_chunk = next(context.mditer2)
             except StopIteration:
-                # When _mditer2 ran over the trajectory end, return empty chunks.
-                adv_chunk = mdtraj.Trajectory(np.empty((0, shape[1], shape[2]), np.float32), chunk.topology)
+                pass
             except RuntimeError as e:
                 if "seek error" in str(e):
                     raise RuntimeError("Trajectory %s too short for lag time %i" %
-                                       (self.trajfiles[self._itraj], context.lag))
-
-        self._t += shape[0]
-
-        if (self._t >= self.trajectory_length(self._itraj, stride=context.stride) and
-                self._itraj < len(self.trajfiles) - 1):
-            if __debug__:
-                self._logger.debug('closing current trajectory "%s"'
-                                   % self.trajfiles[self._itraj])
-            self._close()
+                                       (self.trajfiles[context.itraj], context.lag))
+                # since Python 3.7 (PEP 479), the end of the mdtraj generator is reported as RuntimeError
+                if "StopIteration" not in str(e):
+                    raise
+            if adv_chunk is None:
+                # When mditer2 ran over the trajectory end, return empty chunks.
+                adv_chunk = mdtraj.Trajectory(np.empty((0, shape[1], shape[2]), np.float32), chunk.topology)
 
-            self._t = 0
-            self._itraj += 1
-            if not context.uniform_stride:
-                while self._itraj not in context.traj_keys and self._itraj < self.number_of_trajectories():
-                    self._itraj += 1
-                self._mditer = self._create_iter(
-                    self.trajfiles[self._itraj], stride=context.ra_indices_for_traj(self._itraj)
-                )
-            else:
-                self._mditer = self._create_iter(self.trajfiles[self._itraj], stride=context.stride)
-            # we open self._mditer2 only if requested due lag parameter!
-            self._curr_lag = 0
+        context.t += shape[0]
 
         if not context.uniform_stride:
-            traj_len = context.ra_trajectory_length(self._itraj)
+            traj_len = context.ra_trajectory_length(context.itraj)
         else:
-            traj_len = self.trajectory_length(self._itraj)
-        if self._t >= traj_len and self._itraj == len(self.trajfiles) - 1:
+            traj_len = self.trajectory_length(context.itraj, stride=context.stride)
+
+        if context.t >= traj_len:
             if __debug__:
-                self._logger.debug('closing last trajectory "%s"' % self.trajfiles[self._itraj])
-            self._mditer.close()
-            if self._curr_lag != 0:
-                self._mditer2.close()
+                self._logger.debug('closing trajectory "%s"'
+                                   % self.trajfiles[context.itraj])
+            self._close(context)
+
+            context.t = 0
+            context.itraj += 1
+            if not context.uniform_stride:
+                while context.itraj not in context.traj_keys and context.itraj < self.number_of_trajectories():
+                    context.itraj += 1
+            if context.itraj < context.trajectory_stop(self.number_of_trajectories()):
+                self._open_trajectory(context)
 
         # map data
         if context.lag == 0:
@@ -38,10 +38,6 @@ class ReaderInterface(Transformer):
         # needs to be set, to ensure some getters of Transformer will work.
         self._data_producer = self
 
-        # internal counters
-        self._t = 0
-        self._itraj = 0
-
         # lengths and dims
         # NOTE: children have to make sure, they set these attributes in their ctor
         self._ntraj = -1
@@ -59,17 +59,16 @@ class NumPyFileReader(ReaderInterface, ProgressReporter):
 
         self.mmap_mode = mmap_mode
 
-        # currently opened array
-        self._array = None
-
         self.__set_dimensions_and_lenghts()
 
         self._parametrized = True
 
-    def _reset(self, stride=1):
-        self._t = 0
-        self._itraj = 0
-        self._close()
+    def _reset(self, context=None):
+        if context is None:
+            return
+        self._close(context)
+        context.itraj = context.first_trajectory
+        context.t = 0
 
     def describe(self):
         return "[NumpyFileReader arrays with shape %s]" % [np.shape(x)
@@ -78,7 +77,7 @@ class NumPyFileReader(ReaderInterface, ProgressReporter):
     def __reshape(self, array):
         """
         checks shapes, eg convert them (2d), raise if not possible
-        after checks passed, set self._array and return it.
+        after checks passed, return the (reshaped) array.
         """
 
         if array.ndim == 1:
@@ -94,7 +93,6 @@ class NumPyFileReader(ReaderInterface, ProgressReporter):
         return array
 
     def __load_file(self, filename):
-        self._close()
         self._logger.debug("opening file %s" % filename)
 
         if filename.endswith('.npy'):
@@ -103,17 +101,16 @@ class NumPyFileReader(ReaderInterface, ProgressReporter):
         else:
             raise ValueError("given file '%s' is not a NumPy array. Make sure"
                              " it has a .npy extension" % filename)
-        self._array = arr
         return arr
 
-    def _close(self):
-        if self._array is None:
+    def _close(self, context=None):
+        if context is None or getattr(context, 'array', None) is None:
             return
 
         if __debug__:
             self._logger.debug("delete filehandle")
-        del self._array
-        self._array = None
+        del context.array
+        context.array = None
 
     def __set_dimensions_and_lenghts(self):
         ndims = []
@@ -124,7 +121,7 @@ class NumPyFileReader(ReaderInterface, ProgressReporter):
             array = self.__load_file(f)
             self._lengths.append(np.shape(array)[0])
             ndims.append(np.shape(array)[1])
-            self._close()
+            del array
             self._progress_update(1)
 
         # ensure all trajs have same dim
@@ -139,72 +136,79 @@ class NumPyFileReader(ReaderInterface, ProgressReporter):
     def _next_chunk(self, context=None):
 
         # if no file is open currently, open current index.
-        if self._array is None:
-            self.__load_file(self._filenames[self._itraj])
+        if getattr(context, 'array', None) is None or context.array_itraj != context.itraj:
+            context.array = self.__load_file(self._filenames[context.itraj])
+            context.array_itraj = context.itraj
 
-        traj_len = self._lengths[self._itraj]
-        traj = self._array
+        traj_len = self._lengths[context.itraj]
+        traj = context.array
 
         # if stride by dict, update traj length accordingly
         if not context.uniform_stride:
-            traj_len = context.ra_trajectory_length(self._itraj)
+            traj_len = context.ra_trajectory_length(context.itraj)
 
         # complete trajectory mode
         if self._chunksize == 0:
             if not context.uniform_stride:
-                X = traj[context.ra_indices_for_traj(self._itraj)]
-                self._itraj += 1
+                X = traj[context.ra_indices_for_traj(context.itraj)]
+                if context.lag != 0:
+                    Y = traj[context.ra_lagged_indices_for_traj(context.itraj, self._lengths[context.itraj])]
+                context.itraj += 1
 
                 # skip the trajs that are not in the stride dict
-                while self._itraj < self.number_of_trajectories() \
-                        and (self._itraj not in context.traj_keys):
-                    self._itraj += 1
-                self._array = None
+                while context.itraj < self.number_of_trajectories() \
+                        and (context.itraj not in context.traj_keys):
+                    context.itraj += 1
+                self._close(context)
             else:
                 X = traj[::context.stride]
-                self._itraj += 1
+                context.itraj += 1
 
             if context.lag == 0:
                 return X
             else:
-                if not context.uniform_stride:
-                    raise ValueError("Requested lagged data but was in random access mode. This is not supported.")
-                else:
+                if context.uniform_stride:
                     Y = traj[context.lag::context.stride]
                 return X, Y
 
         # chunked mode
         else:
             if not context.uniform_stride:
-                X = traj[context.ra_indices_for_traj(self._itraj)[self._t:min(self._t + self.chunksize, traj_len)]]
-                upper_bound = min(self._t + self.chunksize, traj_len)
+                upper_bound = min(context.t + self.chunksize, traj_len)
+                X = traj[context.ra_indices_for_traj(context.itraj)[context.t:upper_bound]]
+                if context.lag != 0:
+                    lagged = context.ra_lagged_indices_for_traj(context.itraj, self._lengths[context.itraj])
+                    Y = traj[lagged[context.t:upper_bound]]
             else:
-                upper_bound = min(self._t + self._chunksize * context.stride, traj_len)
-                slice_x = slice(self._t, upper_bound, context.stride)
+                upper_bound = min(context.t + self._chunksize * context.stride, traj_len)
+                slice_x = slice(context.t, upper_bound, context.stride)
                 X = traj[slice_x]
 
-            if context.lag != 0:
-                upper_bound_Y = min(self._t + context.lag + self._chunksize * context.stride, traj_len)
-                slice_y = slice(self._t + context.lag, upper_bound_Y, context.stride)
+            if context.lag != 0 and context.uniform_stride:
+                upper_bound_Y = min(context.t + context.lag + self._chunksize * context.stride, traj_len)
+                slice_y = slice(context.t + context.lag, upper_bound_Y, context.stride)
                 Y = traj[slice_y]
 
             # set new time position
-            self._t = upper_bound
+            context.t = upper_bound
 
-            if self._t >= traj_len:
+            if context.t >= traj_len:
                 if __debug__:
                     self._logger.debug("reached bounds of array, open next.")
-                self._itraj += 1
-                self._t = 0
+                context.itraj += 1
+                context.t = 0
 
                 # if we have a dictionary, skip trajectories that are not in the key set
-                while not context.uniform_stride and self._itraj < self.number_of_trajectories() \
-                        and (self._itraj not in context.traj_keys):
-                    self._itraj += 1
+                while not context.uniform_stride and context.itraj < self.number_of_trajectories() \
+                        and (context.itraj not in context.traj_keys):
+                    context.itraj += 1
 
                 # if time index scope ran out of len of current trajectory, open next file.
-                if self._itraj <= self.number_of_trajectories() - 1:
-                    self.__load_file(self._filenames[self._itraj])
+                if context.itraj < context.trajectory_stop(self.number_of_trajectories()):
+                    context.array = self.__load_file(self._filenames[context.itraj])
+                    context.array_itraj = context.itraj
+                else:
+                    self._close(context)
 
             if context.lag == 0:
                 return X
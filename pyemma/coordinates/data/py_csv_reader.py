@@ -131,9 +131,6 @@ class PyCSVReader(ReaderInterface):
         else:
             self._skip = 0
 
-        self._current_lag = 0
-        self._lagged_iter_finished = False
-
         self.__set_dimensions_and_lenghts()
         self._parametrized = True
 
@@ -186,36 +183,40 @@ class PyCSVReader(ReaderInterface):
             self._ndim = dim
 
     def _reset(self, context=None):
-        self._t = 0
-        self._itraj = 0
+        if context is None:
+            return
+        self._close(context)
+        context.itraj = context.first_trajectory
+        context.t = 0
         # to reopen files
-        self._iter = None
-        self._iter_lagged = None
-        self._lagged_iter_finished = False
+        context.iter = None
+        context.iter_lagged = None
+        context.current_lag = 0
+        context.lagged_iter_finished = False
 
     def _open_file(self, skip, context=None, lagged=False):
-        fn = self._filenames[self._itraj]
+        fn = self._filenames[context.itraj]
         self._logger.debug("opening file %s" % fn)
 
         # do not open same file
         if not lagged:
-            reader = self._iter
+            reader = context.iter
         else:
-            reader = self._iter_lagged
+            reader = context.iter_lagged
 
         if reader and reader.f == fn:
             return
 
-        if self._has_header[self._itraj]:
+        if self._has_header[context.itraj]:
             # set first line to be interpreted as header(labels)
             header = 0
         else:
             header = None
 
         skip = (self._skip + skip)
-        nt = self._lengths[self._itraj]
+        nt = self._lengths[context.itraj]
 
-        if self._has_header[self._itraj]:
+        if self._has_header[context.itraj]:
             nt += 1
             skip += 1
 
@@ -228,7 +229,7 @@ class PyCSVReader(ReaderInterface):
 
         if not context.uniform_stride:
             all_frames = np.arange(nt)
-            skiprows = np.setdiff1d(all_frames, context.ra_indices_for_traj(self._itraj), assume_unique=True)
+            skiprows = np.setdiff1d(all_frames, context.ra_indices_for_traj(context.itraj), assume_unique=True)
         elif context.stride > 1:
             all_frames = np.arange(nt)
             if skiprows is not None:
@@ -241,8 +242,8 @@ class PyCSVReader(ReaderInterface):
         try:
             fh = open(fn)
             reader = _csv_chunked_numpy_iterator(
-                csv.reader(fh, dialect=self._dialects[self._itraj]),
-                chunksize=self.chunksize, skiprows=skiprows, header=header, context=context, itraj=self._itraj)
+                csv.reader(fh, dialect=self._dialects[context.itraj]),
+                chunksize=self.chunksize, skiprows=skiprows, header=header, context=context, itraj=context.itraj)
             reader.f = fn
             reader.fh = fh
         except EnvironmentError:
@@ -250,50 +251,66 @@ class PyCSVReader(ReaderInterface):
             raise
 
         if not lagged:
-            self._iter = reader
+            context.iter = reader
         else:
-            self._iter_lagged = reader
+            context.iter_lagged = reader
 
-    def _close(self):
-        # invalidate iterator
-        if self._iter:
-            self._iter.close()
+    def _close(self, context=None):
+        # invalidate iterators
+        if context is None:
+            return
+        for reader in (getattr(context, 'iter', None), getattr(context, 'iter_lagged', None)):
+            if reader:
+                reader.close()
+        context.iter = None
+        context.iter_lagged = None
 
     def _next_chunk(self, ctx):
 
-        if self._iter is None:
+        if getattr(ctx, 'iter', None) is None:
+            if not hasattr(ctx, 'current_lag'):
+                self._reset(ctx)
             self._open_file(0, context=ctx)
 
-        if ctx.lag != self._current_lag:
-            self._current_lag = ctx.lag
+        if ctx.lag != ctx.current_lag:
+            ctx.current_lag = ctx.lag
+            ctx.lagged_iter_finished = False
             self._open_file(ctx.lag, context=ctx, lagged=True)
 
-        X = self._iter.get_chunk()
-        self._t += X.shape[0]
-
-        if (self._t >= self.trajectory_length(self._itraj, stride=ctx.stride) and
-                    self._itraj < len(self._filenames) - 1):
-            # close file handles and open new ones
-            self._t = 0
-            self._itraj += 1
-
-            while not ctx.uniform_stride and self._itraj not in ctx.traj_keys:
-                self._itraj += 1
-
-            self._open_file(0, context=ctx)
+        X = ctx.iter.get_chunk()
+        ctx.t += X.shape[0]
 
         if ctx.lag == 0:
-            return X
+            Y = None
         else:
             # Note: this ugly hack is needed, since the caller of this method
             # may try to request lagged chunks repeatedly.
             try:
-                if self._lagged_iter_finished:
+                if ctx.lagged_iter_finished:
                     raise StopIteration
-                Y = self._iter_lagged.get_chunk()
+                Y = ctx.iter_lagged.get_chunk()
             except StopIteration:
-                self._lagged_iter_finished = True
+                ctx.lagged_iter_finished = True
                 Y = np.empty(0)
+
+        if ctx.t >= self.trajectory_length(ctx.itraj, stride=ctx.stride):
+            # close file handles and open new ones
+            self._close(ctx)
+            ctx.t = 0
+            ctx.itraj += 1
+
+            while not ctx.uniform_stride and ctx.itraj not in ctx.traj_keys \
+                    and ctx.itraj < self.number_of_trajectories():
+                ctx.itraj += 1
+
+            if ctx.itraj < ctx.trajectory_stop(self.number_of_trajectories()):
+                # the lagged file is reopened on demand
+                ctx.current_lag = 0
+                self._open_file(0, context=ctx)
+
+        if ctx.lag == 0:
+            return X
+        else:
             return X, Y
 
     def parametrize(self, stride=1):
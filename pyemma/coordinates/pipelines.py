@@ -20,6 +20,7 @@ from __future__ import absolute_import
 from pyemma.coordinates.clustering.interface import AbstractClustering
 from pyemma.coordinates.transform.transformer import Transformer
 from pyemma.coordinates.data.feature_reader import FeatureReader
+from pyemma.coordinates.util.profiling import PipelineProfiler
 
 from pyemma.util.log import getLogger
 
@@ -33,7 +34,7 @@ __author__ = 'noe, marscher'
 class Pipeline(object):
     r"""Data processing pipeline."""
 
-    def __init__(self, chain, chunksize=100, param_stride=1):
+    def __init__(self, chain, chunksize=100, param_stride=1, profile=False):
         r"""Data processing pipeline.
 
         Parameters
@@ -44,9 +45,12 @@ class Pipeline(object):
             how many frames shall be processed at once.
         param_stride : int, optional
             omit every n'th data point
+        profile : bool, optional
+            record per-stage timings and data volumes, see :meth:`profiling_report`.
 
         """
         self._chain = []
+        self._profiler = PipelineProfiler() if profile else None
         self.chunksize = chunksize
         self.param_stride = param_stride
         self.chunksize = chunksize
@@ -89,6 +93,8 @@ class Pipeline(object):
         # triggers a re-parametrization even on readers (where it makes not sense)
         e._data_producer = data_producer
         e.chunksize = self.chunksize
+        if self._profiler is not None:
+            self._profiler.register(e)
 
         self._chain.append(e)
 
@@ -111,6 +117,9 @@ class Pipeline(object):
         # remove current index and its data producer
         replaced = self._chain.pop(index)
         replaced.data_producer = None
+        if self._profiler is not None:
+            self._profiler.unregister(replaced)
+            self._profiler.register(e)
 
         self._chain.insert(index, e)
 
@@ -146,6 +155,49 @@ class Pipeline(object):
 
         self._parametrized = True
 
+    @property
+    def profile(self):
+        r""" whether the stages of this pipeline are instrumented. """
+        return self._profiler is not None
+
+    @profile.setter
+    def profile(self, value):
+        if value and self._profiler is None:
+            self._profiler = PipelineProfiler()
+            for e in self._chain:
+                self._profiler.register(e)
+        elif not value and self._profiler is not None:
+            for e in self._chain:
+                self._profiler.unregister(e)
+            self._profiler = None
+
+    def profiling_report(self, log=False):
+        r""" Per-stage profiling report.
+
+        Reports for every stage the wall time spent in producing chunks (reading,
+        featurizing, transforming; excluding the time of upstream stages) and in
+        parametrization, the number of chunks, frames and bytes produced, the
+        number of parametrization passes and the size of the largest chunk.
+        Statistics are accumulated over all parametrizations and iterations
+        since profiling has been enabled.
+
+        Parameters
+        ----------
+        log : bool, optional
+            also write the report to the logger of this pipeline.
+
+        Returns
+        -------
+        report : list of dict
+            one dictionary per stage, see
+            :meth:`pyemma.coordinates.util.profiling.PipelineProfiler.report`.
+        """
+        if self._profiler is None:
+            raise RuntimeError("profiling is not enabled. Set profile=True first.")
+        if log:
+            self._profiler.log(self._logger)
+        return self._profiler.report()
+
     def _is_parametrized(self):
         r"""
         Iterates through the pipeline elements and checks if every element is parametrized.
@@ -174,12 +226,15 @@ class Discretizer(Pipeline):
         used to assign input data to discrete states/ discrete trajectories.
     chunksize : int, optional
         how many frames shall be processed at once.
+    profile : bool, optional
+        record per-stage timings and data volumes, see :meth:`Pipeline.profiling_report`.
     """
 
-    def __init__(self, reader, transform=None, cluster=None, chunksize=100, param_stride=1):
+    def __init__(self, reader, transform=None, cluster=None, chunksize=100, param_stride=1,
+                 profile=False):
         # init with an empty chain and add given transformers afterwards
         Pipeline.__init__(
-            self, [], chunksize=chunksize, param_stride=param_stride)
+            self, [], chunksize=chunksize, param_stride=param_stride, profile=profile)
 
         # check input
         if not isinstance(reader, Transformer):
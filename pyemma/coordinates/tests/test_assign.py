@@ -191,5 +191,60 @@ class TestCluster(unittest.TestCase):
         with self.assertRaises(ValueError):
             c = coor.assign_to_centers(data, centers)
 
+    def test_n_jobs(self):
+        np.random.seed(0)
+        data = np.random.randn(10000, 3).astype(np.float32)
+        centers = np.random.randn(50, 3).astype(np.float32)
+        d2 = ((data[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        expected = np.argmin(d2, axis=1)
+        for n_jobs in (None, 1, 4):
+            dtraj = coor.assign_to_centers(data, centers, n_jobs=n_jobs)[0]
+            np.testing.assert_equal(dtraj, expected)
+        # minRMSD uses buffers per thread
+        X = np.random.randn(500, 30).astype(np.float32)
+        ref = coor.assign_to_centers(X, X[:10], metric='minRMSD', n_jobs=1)[0]
+        np.testing.assert_equal(coor.assign_to_centers(X, X[:10], metric='minRMSD', n_jobs=3)[0], ref)
+        np.testing.assert_equal(ref[:10], np.arange(10))
+        with self.assertRaises(ValueError):
+            coor.assign_to_centers(data, centers, n_jobs=0)
+
+    def test_minRMSD(self):
+        import mdtraj as md
+        np.random.seed(0)
+        n_atoms = 10
+        X = np.random.randn(1000, n_atoms * 3).astype(np.float32)
+        centers = X[::50].copy()
+        traj = md.Trajectory(X.reshape(-1, n_atoms, 3).copy(), None)
+        ref = md.Trajectory(centers.reshape(-1, n_atoms, 3).copy(), None)
+        rmsd = np.array([md.rmsd(traj, ref, frame=j) for j in range(len(centers))])
+        expected = np.argmin(rmsd, axis=0)
+        # frames and centers are centered once, the assignment has to be invariant to rotations and translations
+        R = np.linalg.qr(np.random.randn(3, 3))[0]
+        moved = (np.dot(X.reshape(-1, n_atoms, 3), R) + np.random.randn(len(X), 1, 3)).astype(np.float32)
+        for n_jobs in (1, 3):
+            np.testing.assert_equal(coor.assign_to_centers(X, centers, metric='minRMSD', n_jobs=n_jobs)[0], expected)
+            np.testing.assert_equal(coor.assign_to_centers(moved.reshape(len(X), -1), centers, metric='minRMSD',
+                                                           n_jobs=n_jobs)[0], expected)
+
+    def test_center_index(self):
+        np.random.seed(0)
+        data = [np.random.randn(3000, 2), np.random.randn(1000, 2)]
+        centers = np.random.randn(300, 2).astype(np.float32)
+        expected = [np.argmin(((X[:, None, :].astype(np.float32) - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+                    for X in data]
+        ass = coor.assign_to_centers(centers=centers)
+        self.assertTrue(ass._use_center_tree())
+        for index in ('auto', 'kdtree', None):
+            ass.center_index = index
+            for X, ref in zip(data, expected):
+                np.testing.assert_equal(ass.assign(X), ref)
+        # no tree for few centers, other metrics or high dimensions
+        ass.center_index = 'auto'
+        self.assertFalse(coor.assign_to_centers(centers=centers[:10])._use_center_tree())
+        self.assertFalse(coor.assign_to_centers(centers=np.random.randn(300, 30))._use_center_tree())
+        self.assertFalse(coor.assign_to_centers(centers=np.random.randn(300, 3), metric='minRMSD')._use_center_tree())
+        with self.assertRaises(ValueError):
+            ass.center_index = 'balltree'
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -252,5 +252,66 @@ class TestDataInMemory(unittest.TestCase):
                 chunks = np.vstack(chunks)
                 np.testing.assert_equal(chunks, data[lag::stride])
 
+    def test_concurrent_iterators(self):
+        data = [np.random.random((100, 3)), np.random.random((60, 3))]
+        reader = DataInMemory(data)
+        reader.chunksize = 7
+        expected = data
+        it1 = reader.iterator(stride=3)
+        it2 = reader.iterator(stride=2, lag=5)
+
+        chunks1 = {i: [] for i in range(reader.number_of_trajectories())}
+        chunks2 = {i: [] for i in range(reader.number_of_trajectories())}
+        # advance both iterators alternately over the same reader
+        for (itraj1, X1), (itraj2, X2, Y2) in zip(it1, it2):
+            chunks1[itraj1].append(X1)
+            chunks2[itraj2].append(Y2)
+        # drain the remainders
+        for itraj1, X1 in it1:
+            chunks1[itraj1].append(X1)
+        for itraj2, X2, Y2 in it2:
+            chunks2[itraj2].append(Y2)
+
+        for i, d in enumerate(expected):
+            np.testing.assert_almost_equal(np.vstack(chunks1[i]), d[::3])
+            np.testing.assert_almost_equal(np.vstack(chunks2[i]), d[5::2])
+
+    def test_concurrent_iterators_threads(self):
+        import threading
+        data = [np.random.random((100, 3)), np.random.random((60, 3))]
+        reader = DataInMemory(data)
+        reader.chunksize = 7
+        expected = data
+
+        def consume(stride, lag, result):
+            for chunk in reader.iterator(stride=stride, lag=lag):
+                result.setdefault(chunk[0], []).append(chunk[-1])
+
+        params = [(1, 0), (3, 0), (2, 5), (4, 7)]
+        results = [{} for _ in params]
+        threads = [threading.Thread(target=consume, args=(stride, lag, result))
+                   for (stride, lag), result in zip(params, results)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for (stride, lag), result in zip(params, results):
+            for i, d in enumerate(expected):
+                np.testing.assert_almost_equal(np.vstack(result[i]), d[lag::stride])
+
+    def test_iterator_single_trajectory(self):
+        data = [np.random.random((100, 3)), np.random.random((60, 3)), np.random.random((30, 3))]
+        reader = DataInMemory(data)
+        reader.chunksize = 7
+        for i, d in enumerate(data):
+            for stride in (1, 3):
+                chunks = [X for itraj, X in reader.iterator(stride=stride, trajectory=i)]
+                self.assertTrue(all(itraj == i for itraj, _ in reader.iterator(stride=stride, trajectory=i)))
+                np.testing.assert_equal(np.vstack(chunks), d[::stride])
+            Y = [Y for _, _, Y in reader.iterator(stride=2, lag=5, trajectory=i)]
+            np.testing.assert_equal(np.vstack(Y), d[5::2])
+        with self.assertRaises(ValueError):
+            reader.iterator(stride=np.array([[0, 1]]), trajectory=0)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -205,5 +205,80 @@ class TestFeatureReader(unittest.TestCase):
                 np.testing.assert_almost_equal(
                     chunks[1], self.xyz2.reshape(-1, 9)[lag::stride], err_msg=err_msg % (stride, lag))
 
+    def _fixed_length_reader(self):
+        # trajectories of fixed lengths, at which mdtraj reads strided xtc files correctly up to their end
+        expected, files = [], []
+        for n_frames in (600, 450):
+            f = tempfile.mktemp('.xtc')
+            self.addCleanup(os.unlink, f)
+            t = mdtraj.load(self.topfile)
+            t.xyz = np.arange(n_frames * 9).reshape((n_frames, 3, 3))
+            t.time = np.arange(n_frames)
+            t.save(f)
+            files.append(f)
+            expected.append(t.xyz.reshape(-1, 9))
+        reader = FeatureReader(files, self.topfile)
+        reader.chunksize = 70
+        return reader, expected
+
+    def test_concurrent_iterators(self):
+        reader, expected = self._fixed_length_reader()
+        it1 = reader.iterator(stride=3)
+        it2 = reader.iterator(stride=2, lag=5)
+
+        chunks1 = {i: [] for i in range(reader.number_of_trajectories())}
+        chunks2 = {i: [] for i in range(reader.number_of_trajectories())}
+        # advance both iterators alternately over the same reader
+        for (itraj1, X1), (itraj2, X2, Y2) in zip(it1, it2):
+            chunks1[itraj1].append(X1)
+            chunks2[itraj2].append(Y2)
+        # drain the remainders
+        for itraj1, X1 in it1:
+            chunks1[itraj1].append(X1)
+        for itraj2, X2, Y2 in it2:
+            chunks2[itraj2].append(Y2)
+
+        for i, d in enumerate(expected):
+            np.testing.assert_almost_equal(np.vstack(chunks1[i]), d[::3])
+            np.testing.assert_almost_equal(np.vstack(chunks2[i]), d[5::2])
+
+    def test_concurrent_iterators_threads(self):
+        import threading
+        reader, expected = self._fixed_length_reader()
+
+        def consume(stride, lag, result):
+            for chunk in reader.iterator(stride=stride, lag=lag):
+                result.setdefault(chunk[0], []).append(chunk[-1])
+
+        params = [(1, 0), (3, 0), (2, 5), (4, 7)]
+        results = [{} for _ in params]
+        threads = [threading.Thread(target=consume, args=(stride, lag, result))
+                   for (stride, lag), result in zip(params, results)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for (stride, lag), result in zip(params, results):
+            for i, d in enumerate(expected):
+                np.testing.assert_almost_equal(np.vstack(result[i]), d[lag::stride])
+
+    def test_iterator_single_trajectory(self):
+        reader, expected = self._fixed_length_reader()
+        for i, d in enumerate(expected):
+            for stride in (1, 3):
+                chunks = [X for itraj, X in reader.iterator(stride=stride, trajectory=i)]
+                np.testing.assert_almost_equal(np.vstack(chunks), d[::stride])
+
+    def test_write_output_parallel(self):
+        import shutil
+        reader, expected = self._fixed_length_reader()
+        out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out_dir, ignore_errors=True)
+        # every trajectory is read sequentially by its own thread
+        for stride in (1, 3):
+            out = reader.write_output(out_dir, stride=stride, n_jobs=2, overwrite=True)
+            for Y, d in zip(out.get_output(), expected):
+                np.testing.assert_almost_equal(Y, d[::stride], decimal=3)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
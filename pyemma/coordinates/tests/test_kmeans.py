@@ -183,5 +183,152 @@ class TestKmeans(unittest.TestCase):
         self.assertGreaterEqual(np.inner(np.array([0, -144337500, -102061250], dtype=float), res) + 353560531, 0)
         self.assertGreaterEqual(np.inner(np.array([0, 0, -10000], dtype=float), res) + 17321, 0)
 
+    def test_partial_fit(self):
+        # with a single center, the center is the mean of all data seen
+        data = [np.random.random((100, 3)), np.random.random((50, 3)) + 1]
+        kmeans = cluster_kmeans(k=1)
+        for X in data:
+            kmeans.partial_fit(X)
+        np.testing.assert_allclose(kmeans.clustercenters[0], np.vstack(data).mean(axis=0), rtol=1e-5)
+
+        # centers are moved towards the new data
+        X = [np.random.randn(200, 1) - 2.0, np.random.randn(200, 1) + 2.0]
+        kmeans = cluster_kmeans(X[0], k=2, max_iter=100, fixed_seed=True)
+        kmeans.partial_fit(X[1])
+        self.assertEqual(np.sum(kmeans._center_counts), 400)
+        centers = np.sort(kmeans.clustercenters[:, 0])
+        self.assertLess(centers[0], 0)
+        self.assertGreater(centers[1], 0)
+        self.assertEqual(len(kmeans.dtrajs), 1)
+
+    def test_streaming(self):
+        from pyemma.coordinates.util.pass_cache import PassCache
+        np.random.seed(0)
+        means = np.array([[-10., 0.], [0., 10.], [10., 0.], [0., -10.]])
+        data = [np.concatenate([m + np.random.randn(500, 2) for m in means])[np.random.permutation(2000)]
+                for _ in range(3)]
+        X = np.concatenate(data)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        files = [os.path.join(tmpdir, '%i.npy' % i) for i in range(len(data))]
+        for f, x in zip(files, data):
+            np.save(f, x)
+        from pyemma.coordinates import source
+        reader = source(files, chunk_size=300)
+        for init_strategy in ('kmeans++', 'uniform'):
+            for cache in (None, PassCache()):
+                kmeans = cluster_kmeans(reader, k=4, max_iter=50, streaming=True, param_cache=cache,
+                                        init_strategy=init_strategy, fixed_seed=True)
+                self.assertEqual(kmeans.__class__.__name__, 'StreamingKmeansClustering')
+                centers = kmeans.clustercenters
+                # every center is the mean of its frames
+                dtraj = np.concatenate(kmeans.dtrajs)
+                np.testing.assert_allclose(centers, [X[dtraj == j].mean(axis=0) for j in range(4)], rtol=1e-4)
+                np.testing.assert_allclose(np.sort(centers, axis=0), np.sort(means, axis=0), atol=0.2)
+                self.assertEqual(kmeans._center_counts.sum(), len(X))
+        # the minRMSD metric stops by the relative change of the cost as well
+        frames = [np.random.randn(1000, 9) for _ in range(3)]
+        kmeans = cluster_kmeans(frames, k=5, max_iter=50, streaming=True, metric='minRMSD', tolerance=1e-3,
+                                fixed_seed=True)
+        self.assertEqual(kmeans._center_counts.sum(), 3000)
+        self.assertGreater(kmeans._prev_cost, 0)
+        with self.assertRaises(ValueError):
+            cluster_kmeans(data, k=4, param_cache=PassCache())
+
+    def test_algorithms(self):
+        np.random.seed(0)
+        means = np.random.randn(10, 12) * 4
+        data = [(means[np.random.randint(10, size=n)] + np.random.randn(n, 12)).astype(np.float32)
+                for n in (1500, 500)]
+        for metric in ('euclidean', 'minRMSD'):
+            # lloyd until the cost does not change anymore
+            ref = cluster_kmeans(data, k=20, max_iter=100, tolerance=0, metric=metric, init_strategy='uniform',
+                                 fixed_seed=True)
+            for algorithm in ('hamerly', 'elkan'):
+                kmeans = cluster_kmeans(data, k=20, max_iter=100, metric=metric, init_strategy='uniform',
+                                        fixed_seed=True, algorithm=algorithm)
+                np.testing.assert_allclose(kmeans.clustercenters, ref.clustercenters, atol=1e-4)
+                for dtraj, dtraj_ref in zip(kmeans.dtrajs, ref.dtrajs):
+                    np.testing.assert_equal(dtraj, dtraj_ref)
+        with self.assertRaises(ValueError):
+            cluster_kmeans(data, k=20, algorithm='macqueen')
+        with self.assertRaises(ValueError):
+            cluster_kmeans(data, k=20, algorithm='elkan', streaming=True)
+
+    def test_kmeans_parallel_init(self):
+        from pyemma.coordinates.clustering import kmeans_clustering
+        np.random.seed(0)
+        means = np.random.randn(20, 3) * 10
+        X = (means[np.random.randint(20, size=5000)] + np.random.randn(5000, 3)).astype(np.float32)
+        centers = kmeans_clustering.init_centers_parallel(X, 'euclidean', 20, 42, 1)
+        self.assertEqual(centers.shape, (20, 3))
+        # centers are distinct frames, independent of the number of threads
+        self.assertEqual(len(set(map(tuple, centers))), 20)
+        self.assertTrue(all(np.any(np.all(X == c, axis=1)) for c in centers))
+        np.testing.assert_equal(kmeans_clustering.init_centers_parallel(X, 'euclidean', 20, 42, 3), centers)
+        # every blob should get a center
+        d = np.sqrt(((means[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)).min(axis=1)
+        self.assertLess(np.sum(d > 5), 3)
+        # fewer distinct frames than centers
+        Z = np.zeros((10, 3), dtype=np.float32)
+        self.assertEqual(kmeans_clustering.init_centers_parallel(Z, 'euclidean', 10, 1).shape, (10, 3))
+        with self.assertRaises(ValueError):
+            kmeans_clustering.init_centers_parallel(Z, 'euclidean', 11, 1)
+
+        for kwargs in ({}, {'streaming': True}):
+            kmeans = cluster_kmeans([X[:3000], X[3000:]], k=20, init_strategy='kmeans||', fixed_seed=True, **kwargs)
+            self.assertEqual(kmeans.clustercenters.shape, (20, 3))
+            kmeans2 = cluster_kmeans([X[:3000], X[3000:]], k=20, init_strategy='kmeans||', fixed_seed=True, **kwargs)
+            np.testing.assert_equal(kmeans.clustercenters, kmeans2.clustercenters)
+        X12 = np.random.randn(200, 12).astype(np.float32)
+        self.assertEqual(cluster_kmeans(X12, k=10, metric='minRMSD', init_strategy='kmeans||').clustercenters.shape,
+                         (10, 12))
+
+    def test_lloyd_step_many_centers(self):
+        from pyemma.coordinates.clustering import kmeans_clustering
+        np.random.seed(0)
+        # data far from the origin, more centers than a tile of the nearest center search
+        X = (np.random.randn(3000, 7) + 100.0).astype(np.float32)
+        centers = [c for c in X[np.random.choice(len(X), 700, replace=False)].copy()]
+        d2 = ((X[:, None, :].astype(np.float64) - np.array(centers)[None, :, :]) ** 2).sum(axis=2)
+        labels = np.argmin(d2, axis=1)
+        expected = np.array([X[labels == j].mean(axis=0) if np.any(labels == j) else centers[j]
+                             for j in range(len(centers))])
+        for n_threads in (1, 3):
+            new_centers, cost, counts = kmeans_clustering.cluster(X, centers, 'euclidean', n_threads)
+            np.testing.assert_allclose(new_centers, expected, rtol=1e-5)
+            # cost of the assignment to the given centers
+            np.testing.assert_allclose(cost, d2.min(axis=1).sum(), rtol=1e-3)
+            np.testing.assert_equal(counts, np.bincount(labels, minlength=len(centers)))
+
+    def test_accumulate(self):
+        from pyemma.coordinates.clustering import kmeans_clustering
+        np.random.seed(0)
+        X = np.random.randn(3000, 9).astype(np.float32)
+        centers = [c for c in X[:20].copy()]
+        for metric in ('euclidean', 'minRMSD'):
+            new_centers, cost, counts = kmeans_clustering.cluster(X, centers, metric, 1)
+            # chunk by chunk, the sums and counts give the same iteration
+            sums, acc_counts, acc_cost = np.zeros((20, 9)), np.zeros(20, dtype=np.int64), 0.0
+            for chunk in np.array_split(X, 7):
+                acc_cost += kmeans_clustering.accumulate(chunk, centers, metric, sums, acc_counts, 2)
+            np.testing.assert_equal(acc_counts, counts)
+            np.testing.assert_allclose(acc_cost, cost, rtol=1e-5)
+            np.testing.assert_allclose(sums / acc_counts[:, None], new_centers, rtol=1e-4, atol=1e-6)
+        with self.assertRaises(ValueError):
+            kmeans_clustering.accumulate(X, centers, 'euclidean', np.zeros((20, 9), dtype=np.float32),
+                                         acc_counts)
+
+    def test_lloyd_step_precision(self):
+        from pyemma.coordinates.clustering import kmeans_clustering
+        # one large cluster, summing up its frames in single precision would lose digits
+        X = np.full((2000000, 1), 1000.1, dtype=np.float32)
+        X[::2] += 0.5
+        new_centers, cost, counts = kmeans_clustering.cluster(X, [np.zeros(1, dtype=np.float32)], 'euclidean', 2)
+        self.assertEqual(new_centers.shape, (1, 1))
+        np.testing.assert_allclose(new_centers[0, 0], np.float32(1000.1) + 0.25, rtol=1e-6)
+        np.testing.assert_allclose(cost, np.sum(X.astype(np.float64) ** 2), rtol=1e-5)
+        np.testing.assert_equal(counts, [len(X)])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
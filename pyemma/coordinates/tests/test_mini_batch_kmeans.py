@@ -51,5 +51,66 @@ class TestMiniBatchKmeans(TestCase):
         assert (np.any((cc > -1.0) * (cc < 1.0)))
         assert (np.any(cc > -1.0))
 
+    def test_online_updates(self):
+        from pyemma.coordinates.api import source
+        np.random.seed(0)
+        means = np.array([[-5.0, 0.0], [0.0, 5.0], [5.0, 0.0]])
+        X = [(means[np.random.randint(3, size=n)] + 0.1 * np.random.randn(n, 2)).astype(np.float32)
+             for n in (3000, 2000)]
+        reader = source(X, chunk_size=500)
+        kmeans = cluster_mini_batch_kmeans(reader, k=3, max_iter=20, batch_size=100)
+        cc = kmeans.clustercenters[np.argsort(kmeans.clustercenters[:, 0])]
+        np.testing.assert_allclose(cc, means, atol=0.05)
+        # the data is streamed, every center has seen all of its frames in every pass
+        self.assertFalse(hasattr(kmeans, '_in_memory_chunks'))
+        self.assertEqual(kmeans._center_counts.sum() % 5000, 0)
+        self.assertLess(kmeans._center_counts.sum(), 20 * 5000)
+        # fraction of the frames as batch size
+        kmeans = cluster_mini_batch_kmeans(reader, k=3, max_iter=20, batch_size=0.1)
+        np.testing.assert_allclose(kmeans.clustercenters[np.argsort(kmeans.clustercenters[:, 0])], means, atol=0.05)
+        for batch_size in (0, 1.5, -10):
+            with self.assertRaises(ValueError):
+                cluster_mini_batch_kmeans(k=3, batch_size=batch_size)
+
+    def test_centers_published_per_pass(self):
+        import scipy.spatial
+        from pyemma.coordinates.api import source
+        from pyemma.coordinates.clustering.kmeans import MiniBatchKmeansClustering
+        cKDTree = scipy.spatial.cKDTree
+        trees = []
+
+        def counting_cKDTree(*args, **kwargs):
+            trees.append(args)
+            return cKDTree(*args, **kwargs)
+
+        np.random.seed(0)
+        X = np.random.randn(3000, 6).astype(np.float32)
+        for metric in ('euclidean', 'minRMSD'):
+            kmeans = MiniBatchKmeansClustering(n_clusters=20, max_iter=3, tolerance=0, metric=metric, batch_size=50)
+            kmeans.center_index = 'kdtree'
+            kmeans.data_producer = source(X, chunk_size=1000)
+            del trees[:]
+            scipy.spatial.cKDTree = counting_cKDTree
+            try:
+                kmeans.parametrize()
+                # no center tree is needed while the centers are updated
+                self.assertEqual(len(trees), 0)
+                dtrajs = kmeans.dtrajs
+                dtraj = kmeans.assign(X)
+            finally:
+                scipy.spatial.cKDTree = cKDTree
+            # every pass has seen all of the frames
+            self.assertEqual(kmeans._center_counts.sum(), 3 * len(X))
+            cc = kmeans.clustercenters
+            self.assertEqual(cc.shape, (20, 6))
+            self.assertTrue(np.all(np.isfinite(cc)))
+            np.testing.assert_equal(dtraj, dtrajs[0])
+            if metric == 'euclidean':
+                # a single tree over the published centers serves all assignments
+                self.assertEqual(len(trees), 1)
+                np.testing.assert_equal(dtraj, np.argmin(((X[:, None, :] - cc[None]) ** 2).sum(axis=2), axis=1))
+            else:
+                self.assertEqual(len(trees), 0)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
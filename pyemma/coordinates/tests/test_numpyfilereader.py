@@ -168,5 +168,28 @@ class TestNumPyFileReader(unittest.TestCase):
                                             "not equal for stride=%i"
                                             " and lag=%i" % (stride, lag))
 
+    def test_concurrent_iterators(self):
+        reader = NumPyFileReader(self.files2d)
+        reader.chunksize = 7
+        it1 = reader.iterator(stride=3)
+        it2 = reader.iterator(stride=2, lag=5)
+
+        chunks1 = {i: [] for i in range(reader.number_of_trajectories())}
+        chunks2 = {i: [] for i in range(reader.number_of_trajectories())}
+        # advance both iterators alternately over the same reader
+        for (itraj1, X1), (itraj2, X2, Y2) in zip(it1, it2):
+            chunks1[itraj1].append(X1)
+            chunks2[itraj2].append(Y2)
+        # drain the remainders
+        for itraj1, X1 in it1:
+            chunks1[itraj1].append(X1)
+        for itraj2, X2, Y2 in it2:
+            chunks2[itraj2].append(Y2)
+
+        for i, f in enumerate(self.files2d):
+            d = np.load(f)
+            np.testing.assert_equal(np.vstack(chunks1[i]), d[::3])
+            np.testing.assert_equal(np.vstack(chunks2[i]), d[5::2])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -24,6 +24,8 @@ Created on 02.02.2015
 '''
 
 from __future__ import absolute_import
+import os
+import tempfile
 import unittest
 
 import numpy as np
@@ -184,5 +186,63 @@ class TestPCAExtensive(unittest.TestCase):
 
         np.testing.assert_allclose(pca_spec_mean.cov, pca_calc_mean.cov)
 
+    def test_partial_fit(self):
+        data = [np.random.random((300, 3)), np.random.random((200, 3)) + 1]
+        pca_ref = pca(data)
+        pca_inc = pca()
+        for X in data:
+            pca_inc.partial_fit(X)
+        np.testing.assert_allclose(pca_inc.mean, pca_ref.mean)
+        np.testing.assert_allclose(pca_inc.cov, pca_ref.cov)
+        np.testing.assert_allclose(pca_inc.eigenvalues, pca_ref.eigenvalues)
+
+    def test_constant_dimensions(self):
+        X = np.column_stack((np.ones(self.T), self.X, np.zeros(self.T)))
+        pca_ref = pca(data=self.X)
+        pca_obj = pca(data=X)
+        np.testing.assert_allclose(pca_obj.eigenvalues, np.concatenate((pca_ref.eigenvalues, [0, 0])), atol=1e-12)
+        np.testing.assert_allclose(np.abs(pca_obj.eigenvectors[1:3, 0:2]), np.abs(pca_ref.eigenvectors))
+        np.testing.assert_allclose(pca_obj.cumvar[-1], 1.0)
+        np.testing.assert_allclose(np.abs(pca_obj.get_output()[0]), np.abs(pca_ref.get_output()[0]), rtol=1e-5)
+
+    def test_randomized(self):
+        np.random.seed(0)
+        A = np.random.randn(50, 50) * np.exp(-np.arange(50) / 3.)
+        data = [np.random.randn(2000, 50).dot(A.T) + 1, np.random.randn(1000, 50).dot(A.T)]
+        pca_ref = pca(data, dim=3)
+        pca_rnd = pca(data, dim=3, method='randomized')
+        self.assertIsNone(pca_rnd.cov)
+        np.testing.assert_allclose(pca_rnd.mean, pca_ref.mean)
+        np.testing.assert_allclose(pca_rnd.eigenvalues[:3], pca_ref.eigenvalues[:3], rtol=1e-6)
+        np.testing.assert_allclose(pca_rnd.cumvar[:3], pca_ref.cumvar[:3], rtol=1e-6)
+        np.testing.assert_allclose(np.abs(pca_rnd.get_output()[0]), np.abs(pca_ref.get_output()[0]),
+                                   rtol=1e-3, atol=1e-3)
+        # the sklearn-like interface goes through the same passes
+        from pyemma.coordinates.transform.pca import PCA
+        pca_fit = PCA(dim=3, method='randomized')
+        pca_fit.fit(data[1])
+        Y = pca_fit.fit_transform(data)
+        np.testing.assert_allclose(pca_fit.eigenvalues[:3], pca_ref.eigenvalues[:3], rtol=1e-6)
+        np.testing.assert_allclose(np.abs(Y[0]), np.abs(pca_ref.get_output()[0]), rtol=1e-3, atol=1e-3)
+        with self.assertRaises(ValueError):
+            pca(dim=-1, method='randomized')
+
+    def test_combine(self):
+        from pyemma.coordinates.util.moments import RunningMoments
+        data = [np.random.random((300, 3)), np.random.random((200, 3)) + 1]
+        pca_ref = pca(data)
+        # moments of the second part are stored and loaded again
+        f = tempfile.NamedTemporaryFile(suffix='.npz', delete=False)
+        f.close()
+        try:
+            pca(data[1]).moments.save(f.name)
+            moments = RunningMoments.load(f.name)
+        finally:
+            os.unlink(f.name)
+        pca_obj = pca().combine(pca(data[0])).combine(moments)
+        np.testing.assert_allclose(pca_obj.mean, pca_ref.mean)
+        np.testing.assert_allclose(pca_obj.cov, pca_ref.cov)
+        np.testing.assert_allclose(pca_obj.eigenvalues, pca_ref.eigenvalues)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -179,5 +179,118 @@ class TestPipeline(unittest.TestCase):
         api.pipeline([reader_xtc, api.cluster_regspace(dmin=10)])._chain[-1].get_output()
         api.pipeline([reader_xtc, api.cluster_uniform_time()])._chain[-1].get_output()
 
+    def test_profiling(self):
+        reader = api.source(self.generated_data)
+        tica = api.tica(lag=self.generated_lag)
+        p = api.pipeline([reader, tica], chunksize=1000, profile=True)
+
+        report = p.profiling_report()
+        self.assertEqual([r['stage'] for r in report], [reader.name, tica.name])
+        reader_stats, tica_stats = report
+        # tica needs a single pass over the (time-lagged) data
+        self.assertEqual(tica_stats['passes'], 1)
+        self.assertEqual(reader_stats['passes'], 0)
+        self.assertEqual(reader_stats['n_chunks'], 10)
+        self.assertEqual(reader_stats['frames'], len(self.generated_data))
+        self.assertEqual(reader_stats['peak_chunk_bytes'], 2 * 1000 * 2 * 8)
+        self.assertGreater(tica_stats['time_param'], 0)
+
+        # the output of tica is produced chunk-wise and accounted for
+        tica.get_output()
+        tica_stats = p.profiling_report(log=True)[1]
+        self.assertEqual(tica_stats['frames'], len(self.generated_data))
+        self.assertEqual(tica_stats['n_chunks'], 10)
+
+        p.profile = False
+        self.assertIsNone(tica._profiler)
+        with self.assertRaises(RuntimeError):
+            p.profiling_report()
+
+    def test_profiling_threads(self):
+        import threading
+        import time
+        from pyemma.coordinates.util.profiling import PipelineProfiler
+        profiler = PipelineProfiler()
+        slow, fast = DataInMemory(np.zeros((10, 1))), DataInMemory(np.zeros((10, 1)))
+        profiler.register(slow)
+        profiler.register(fast)
+        started, done = threading.Event(), threading.Event()
+
+        def slow_chunk():
+            started.set()
+            done.wait(10)
+            return np.zeros((5, 1))
+
+        def fast_chunk():
+            time.sleep(0.05)
+            return np.zeros((3, 1))
+
+        def run_fast():
+            started.wait(10)
+            profiler.produce(fast, fast_chunk)
+            done.set()
+
+        t = threading.Thread(target=run_fast)
+        t.start()
+        profiler.produce(slow, slow_chunk)
+        t.join()
+
+        # the chunk of the other thread is not nested into the slow one
+        self.assertGreaterEqual(profiler.stats(slow).time_chunks, profiler.stats(fast).time_chunks)
+        self.assertGreaterEqual(profiler.stats(fast).time_chunks, 0.05)
+        self.assertEqual(profiler.stats(slow).frames, 5)
+        self.assertEqual(profiler.stats(fast).frames, 3)
+
+    def test_profiling_parallel_write_output(self):
+        import shutil
+        data = [np.random.random((1000 + 100 * i, 3)) for i in range(6)]
+        reader = api.source(data)
+        tica = api.tica(lag=1, dim=2)
+        p = api.pipeline([reader, tica], chunksize=50, profile=True)
+        reader_frames = p.profiling_report()[0]['frames']
+
+        d = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, d, ignore_errors=True)
+        tica.write_output(d, n_jobs=3)
+
+        n_frames = sum(len(x) for x in data)
+        reader_stats, tica_stats = p.profiling_report()
+        self.assertEqual(tica_stats['frames'], n_frames)
+        self.assertEqual(reader_stats['frames'] - reader_frames, n_frames)
+        self.assertEqual(tica_stats['n_chunks'], sum(-(-len(x) // 50) for x in data))
+        # exclusive times of concurrent iterations are not mixed up
+        self.assertGreaterEqual(tica_stats['time_chunks'], 0)
+        self.assertGreaterEqual(reader_stats['time_chunks'], 0)
+        self.assertEqual(p._profiler._stack, [])
+
+    def test_param_cache(self):
+        from pyemma.coordinates.util.pass_cache import PassCache
+        d = tempfile.mkdtemp()
+        files = [os.path.join(d, '%i.npy' % i) for i in range(3)]
+        for f in files:
+            np.save(f, np.random.random((1000, 3)))
+        reader = api.source(files)
+
+        # sequential passes of mini-batch k-means: the first pass (sampling the initial
+        # centers) fills the cache, all other passes are served from the cache
+        for cache in (PassCache(), PassCache(max_memory=0, max_disk=2**30)):
+            km = api.cluster_mini_batch_kmeans(k=5, max_iter=5, batch_size=50)
+            km.param_cache = cache
+            p = api.pipeline([reader, km], chunksize=100, profile=True)
+            reader_stats, km_stats = p.profiling_report()
+            self.assertEqual(km.clustercenters.shape, (5, 3))
+            self.assertGreater(km_stats['passes'], 1)
+            self.assertEqual(reader_stats['frames'], 3000)
+            # buffer has been released
+            self.assertEqual(cache.nbytes, 0)
+            self.assertFalse(cache.on_disk)
+
+        # too small to cache: read on every pass
+        km = api.cluster_mini_batch_kmeans(k=5, max_iter=5, batch_size=50)
+        km.param_cache = PassCache(max_memory=1)
+        p = api.pipeline([reader, km], chunksize=100, profile=True)
+        reader_stats, km_stats = p.profiling_report()
+        self.assertEqual(reader_stats['frames'], 3000 * km_stats['passes'])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
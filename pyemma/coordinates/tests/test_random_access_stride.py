@@ -183,6 +183,53 @@ class TestRandomAccessStride(TestCase):
                 except EnvironmentError:
                     pass
 
+    def test_lagged_random_access(self):
+        from pyemma.coordinates.tests.test_featurereader import create_traj
+
+        lag = 4
+
+        def check(source, data):
+            X, Y = {}, {}
+            for itraj, x, y in source.iterator(stride=self.stride, lag=lag):
+                X.setdefault(itraj, []).append(x)
+                Y.setdefault(itraj, []).append(y)
+            self.assertEqual(sorted(X.keys()), [0, 2])
+            for itraj in X.keys():
+                frames = self.stride[self.stride[:, 0] == itraj][:, 1]
+                lagged = frames[frames + lag < len(data[itraj])] + lag
+                np.testing.assert_equal(np.concatenate(X[itraj]), data[itraj][frames])
+                np.testing.assert_equal(np.concatenate(Y[itraj]), data[itraj][lagged])
+
+        # the last lagged frame of trajectory 2 lies beyond its end
+        self.stride[-1, 1] = 17
+        for cs in (0, 1, 4):
+            check(coor.source(self.data, chunk_size=cs), self.data)
+
+        tmpfiles = []
+        try:
+            for x in self.data:
+                fd, f = tempfile.mkstemp(suffix='.npy')
+                os.close(fd)
+                np.save(f, x)
+                tmpfiles.append(f)
+            for cs in (0, 1, 4):
+                check(coor.source(tmpfiles, chunk_size=cs), self.data)
+
+            topfile = pkg_resources.resource_filename(__name__, 'data/test.pdb')
+            trajfiles = []
+            for _ in range(3):
+                f, _, _ = create_traj(topfile)
+                tmpfiles.append(f)
+                trajfiles.append(f)
+            data = [mdtraj.load(f, top=topfile).xyz.reshape(-1, 9) for f in trajfiles]
+            check(coor.source(trajfiles, top=topfile, chunk_size=2), data)
+        finally:
+            for f in tmpfiles:
+                try:
+                    os.unlink(f)
+                except EnvironmentError:
+                    pass
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
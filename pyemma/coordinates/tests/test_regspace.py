@@ -137,5 +137,83 @@ class TestRegSpaceClustering(unittest.TestCase):
             assert len(out) == self.clustering.number_of_trajectories()
             assert len(out[0]) == self.clustering.trajectory_lengths()[0]
 
+    def test_partial_fit(self):
+        data = [np.random.random((500, 3)), np.random.random((500, 3)) + 0.5]
+        ref = cluster_regspace(data, dmin=self.dmin)
+        clustering = RegularSpaceClustering(dmin=self.dmin)
+        for X in data:
+            clustering.partial_fit(X)
+        np.testing.assert_equal(clustering.clustercenters, ref.clustercenters)
+        # new data is assigned to the existing and new centers
+        assert len(clustering.dtrajs) == 1
+        assert np.max(clustering.dtrajs[0]) < clustering.n_clusters
+
+    def test_center_index(self):
+        np.random.seed(1)
+        # grid (low dimension) and pivot (high dimension, minRMSD) indices
+        for metric, dim, dmin in (('euclidean', 2, 0.1), ('euclidean', 8, 2.5), ('minRMSD', 12, 0.8)):
+            data = [np.random.randn(1500, dim).astype(np.float32), np.random.randn(500, dim).astype(np.float32)]
+            X = np.concatenate(data)
+            clustering = cluster_regspace(data, dmin=dmin, metric=metric, max_centers=10000)
+            centers = clustering.clustercenters
+            if metric == 'euclidean':
+                # every frame is within dmin of a center, which are further apart than dmin
+                expected = [X[0]]
+                for x in X[1:]:
+                    if np.sqrt(((np.array(expected) - x) ** 2).sum(axis=1)).min() > dmin:
+                        expected.append(x)
+                np.testing.assert_equal(centers, expected)
+            # assignment with the index of the centers
+            clustering.center_index = None
+            ref = clustering.assign(data)
+            clustering.center_index = 'auto'
+            clustering.MIN_INDEX_CENTERS = 1
+            self.assertTrue(clustering._use_regspace_index())
+            for dtraj, dtraj_ref in zip(clustering.assign(data), ref):
+                np.testing.assert_equal(dtraj, dtraj_ref)
+            # also for frames far from all centers
+            Y = np.random.randn(200, dim).astype(np.float32) * 5
+            clustering.center_index = None
+            ref = clustering.assign(Y)
+            clustering.center_index = 'auto'
+            np.testing.assert_equal(clustering.assign(Y), ref)
+            # the index is built once per set of centers
+            index = clustering._regspace_index[2]
+            clustering.assign(data)
+            self.assertIs(clustering._regspace_index[2], index)
+            clustering.partial_fit(Y)
+            clustering.assign(Y)
+            self.assertIsNot(clustering._regspace_index[2], index)
+            self.assertEqual(len(clustering._regspace_index[0]), clustering.n_clusters)
+
+    def test_clustering_kept_for_all_chunks(self):
+        from pyemma.coordinates.clustering import regspace
+        np.random.seed(2)
+        start_clustering = regspace.regspatial.start_clustering
+        calls = []
+
+        def counting_start_clustering(*args):
+            calls.append(args)
+            return start_clustering(*args)
+
+        for metric, dim, dmin in (('euclidean', 2, 0.1), ('euclidean', 8, 2.5), ('minRMSD', 12, 0.8)):
+            X = np.random.randn(2000, dim).astype(np.float32)
+            ref = cluster_regspace(DataInMemory(X, chunksize=2000), dmin=dmin, metric=metric, max_centers=10000)
+            del calls[:]
+            regspace.regspatial.start_clustering = counting_start_clustering
+            try:
+                # the centers found so far and the index over them are kept for all chunks of the pass
+                clustering = cluster_regspace(DataInMemory(X, chunksize=7), dmin=dmin, metric=metric,
+                                              max_centers=10000)
+            finally:
+                regspace.regspatial.start_clustering = start_clustering
+            self.assertEqual(len(calls), 1)
+            np.testing.assert_equal(clustering.clustercenters, ref.clustercenters)
+            # partial_fit starts from the centers found so far
+            Y = np.random.randn(500, dim).astype(np.float32) + 1.0
+            clustering.partial_fit(Y)
+            ref = cluster_regspace(np.concatenate((X, Y)), dmin=dmin, metric=metric, max_centers=10000)
+            np.testing.assert_equal(clustering.clustercenters, ref.clustercenters)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -329,5 +329,283 @@ class TestTICAExtensive(unittest.TestCase):
         its = -self.tica_obj.lag/np.log(np.abs(self.tica_obj.eigenvalues))
         assert np.allclose(self.tica_obj.timescales, its)
 
+    def test_get_output_dimensions(self):
+        tica_obj = api.tica(data=self.X, lag=self.lag, dim=2, kinetic_map=True)
+        full = tica_obj.get_output()[0]
+        for dims, ref in ((1, full[:, 1:2]), ([1, 0], full[:, [1, 0]]), (slice(1, 2), full[:, 1:2])):
+            out = tica_obj.get_output(dimensions=dims)[0]
+            np.testing.assert_allclose(out, ref, rtol=1e-5)
+
+    def test_get_output_out(self):
+        import tempfile
+        tica_obj = api.tica(data=[self.X, self.X[:100]], lag=self.lag, dim=2)
+        expected = tica_obj.get_output(stride=3)
+        with tempfile.NamedTemporaryFile(suffix='.npy') as f:
+            out = [np.lib.format.open_memmap(f.name, mode='w+', dtype=np.float32,
+                                             shape=(tica_obj.trajectory_length(0, stride=3), 2)),
+                   np.empty((tica_obj.trajectory_length(1, stride=3), 2))]
+            res = tica_obj.get_output(stride=3, out=out)
+            assert res[0] is out[0] and res[1] is out[1]
+            np.testing.assert_allclose(out[0], expected[0])
+            np.testing.assert_allclose(out[1], expected[1], rtol=1e-5)
+            del out, res
+        with self.assertRaises(ValueError):
+            tica_obj.get_output(out=[np.empty((self.T, 2))])
+
+    def test_write_output(self):
+        import tempfile
+        import shutil
+        from pyemma.coordinates.util.output_store import open_output
+        data = [self.X[:3000], self.X[3000:3005], self.X[3005:]]
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for chunksize in (0, 77):
+                in_dir = os.path.join(tmpdir, str(chunksize))
+                os.mkdir(in_dir)
+                files = [os.path.join(in_dir, '%i.npy' % i) for i in range(len(data))]
+                for f, x in zip(files, data):
+                    np.save(f, x)
+                tica_obj = api.tica(data=api.source(files, chunk_size=chunksize), lag=self.lag, dim=2)
+                for stride in (1, 3):
+                    expected = tica_obj.get_output(stride=stride, dimensions=[1, 0])
+                    for n_jobs in (1, 3):
+                        out_dir = os.path.join(in_dir, 'out')
+                        reader = tica_obj.write_output(out_dir, prefix='tica', stride=stride, dimensions=[1, 0],
+                                                       n_jobs=n_jobs, overwrite=True)
+                        for r in (reader, open_output(out_dir, prefix='tica')):
+                            Y = r.get_output()
+                            self.assertEqual(len(Y), len(expected))
+                            for y, ref in zip(Y, expected):
+                                self.assertEqual(y.dtype, np.float32)
+                                np.testing.assert_allclose(y, ref, rtol=1e-5, atol=1e-6)
+                with self.assertRaises(EnvironmentError):
+                    tica_obj.write_output(out_dir, prefix='tica')
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def test_mixed_precision_output(self):
+        data = [self.X.astype(np.float32), self.X[:500].astype(np.float32)]
+        tica_ref = api.tica(data=data, lag=self.lag, dim=2)
+        tica_obj = api.tica(data=data, lag=self.lag, dim=2, precision='mixed')
+        expected = tica_ref.get_output()
+        out = [np.empty((len(X), 2), dtype=np.float32) for X in data]
+        res = tica_obj.get_output(out=out)
+        self.assertIs(res[0], out[0])
+        for Y, Y_ref in zip(res, expected):
+            np.testing.assert_allclose(Y, Y_ref, rtol=1e-3, atol=1e-4)
+        # single components and mapping of arrays
+        np.testing.assert_allclose(tica_obj.get_output(dimensions=[1])[0][:, 0], expected[0][:, 1],
+                                   rtol=1e-3, atol=1e-4)
+        Y = tica_obj.transform(data[1])
+        self.assertEqual(Y.dtype, np.float32)
+        np.testing.assert_allclose(Y, expected[1], rtol=1e-3, atol=1e-4)
+
+    def test_partial_fit(self):
+        data = [self.X[:3000], self.X[3000:7000], self.X[7000:]]
+        for force_eigenvalues_le_one in (False, True):
+            tica_ref = api.tica(data=data, lag=self.lag, force_eigenvalues_le_one=force_eigenvalues_le_one)
+            tica_inc = api.tica(lag=self.lag, force_eigenvalues_le_one=force_eigenvalues_le_one)
+            for X in data:
+                tica_inc.partial_fit(X)
+            np.testing.assert_allclose(tica_inc.mean, tica_ref.mean)
+            np.testing.assert_allclose(tica_inc.cov, tica_ref.cov, atol=1e-12)
+            np.testing.assert_allclose(tica_inc.cov_tau, tica_ref.cov_tau, atol=1e-12)
+            np.testing.assert_allclose(tica_inc.eigenvalues, tica_ref.eigenvalues)
+
+        # continue a parametrized estimate, fit starts from scratch
+        tica_obj = api.tica(data=data[:2], lag=self.lag)
+        tica_obj.partial_fit(data[2])
+        np.testing.assert_allclose(tica_obj.cov, api.tica(data=data, lag=self.lag).cov, atol=1e-12)
+        tica_obj.fit(data[2])
+        np.testing.assert_allclose(tica_obj.cov, api.tica(data=data[2], lag=self.lag).cov, atol=1e-12)
+        # fit takes the chunksize of the data source, like any other transformer
+        tica_obj.partial_fit(data[0])
+        tica_obj.fit(source(data[2], chunk_size=123))
+        self.assertEqual(tica_obj.chunksize, 123)
+        np.testing.assert_allclose(tica_obj.cov, api.tica(data=data[2], lag=self.lag).cov, atol=1e-12)
+
+    def test_fixed_dim_spectrum(self):
+        np.random.seed(0)
+        A = np.random.randn(300, 2)
+        data = np.dot(self.X, A.T) + np.random.randn(len(self.X), 300)
+        tica_full = api.tica(data, lag=self.lag, var_cutoff=1.0)
+        self.assertEqual(len(tica_full.eigenvalues), 300)
+        self.assertAlmostEqual(tica_full.cumvar[-1], 1.0)
+        # a large problem only computes the requested components, the cumulative variance refers to all of them
+        tica_obj = api.tica(data, lag=self.lag, dim=2)
+        self.assertEqual(tica_obj.eigenvalues.shape, (2,))
+        self.assertEqual(tica_obj.eigenvectors.shape, (300, 2))
+        np.testing.assert_allclose(tica_obj.eigenvalues, tica_full.eigenvalues[:2], rtol=1e-6)
+        np.testing.assert_allclose(tica_obj.cumvar, tica_full.cumvar[:2], rtol=1e-6)
+        self.assertLess(tica_obj.cumvar[-1], 1.0)
+        # small problems are solved completely
+        tica_obj = api.tica(self.X, lag=self.lag, dim=1)
+        self.assertEqual(len(tica_obj.eigenvalues), self.X.shape[1])
+        self.assertAlmostEqual(tica_obj.cumvar[-1], 1.0)
+
+    def test_randomized(self):
+        # slow process hidden in high dimensional noise
+        np.random.seed(0)
+        A = np.random.randn(40, 2)
+        data = np.dot(self.X, A.T) + 0.1 * np.random.randn(len(self.X), 40)
+        for force_eigenvalues_le_one in (False, True):
+            tica_ref = api.tica(data, lag=self.lag, dim=1, force_eigenvalues_le_one=force_eigenvalues_le_one)
+            tica_rnd = api.tica(data, lag=self.lag, dim=1, force_eigenvalues_le_one=force_eigenvalues_le_one,
+                                method='randomized')
+            self.assertEqual(tica_rnd.eigenvectors.shape[0], 40)
+            np.testing.assert_allclose(tica_rnd.eigenvalues[0], tica_ref.eigenvalues[0], rtol=1e-2)
+            Y_ref, Y_rnd = tica_ref.get_output()[0][:, 0], tica_rnd.get_output()[0][:, 0]
+            self.assertGreater(np.abs(np.corrcoef(Y_ref, Y_rnd)[0, 1]), 0.99)
+        # the sklearn-like interface goes through the same passes
+        from pyemma.coordinates.transform.tica import TICA
+        tica_fit = TICA(lag=self.lag, dim=1, method='randomized')
+        tica_fit.fit(data[:1000])
+        Y_fit = tica_fit.fit_transform(data)[:, 0]
+        np.testing.assert_allclose(tica_fit.eigenvalues[0], tica_ref.eigenvalues[0], rtol=1e-2)
+        self.assertGreater(np.abs(np.corrcoef(Y_ref, Y_fit)[0, 1]), 0.99)
+        with self.assertRaises(ValueError):
+            api.tica(lag=self.lag, method='randomized')
+
+    def test_combine(self):
+        data = [self.X[:3000], self.X[3000:7000], self.X[7000:]]
+        for force_eigenvalues_le_one in (False, True):
+            tica_ref = api.tica(data=data, lag=self.lag, force_eigenvalues_le_one=force_eigenvalues_le_one)
+            # estimate on each part independently, merge serialized moments
+            parts = [api.tica(data=X, lag=self.lag, force_eigenvalues_le_one=force_eigenvalues_le_one)
+                     for X in data]
+            tica_obj = api.tica(lag=self.lag, force_eigenvalues_le_one=force_eigenvalues_le_one)
+            tica_obj.combine(parts[0])
+            for part in parts[1:]:
+                tica_obj.combine(dict((k, m.to_dict()) for k, m in part.moments.items()))
+            np.testing.assert_allclose(tica_obj.mean, tica_ref.mean)
+            np.testing.assert_allclose(tica_obj.cov, tica_ref.cov, atol=1e-12)
+            np.testing.assert_allclose(tica_obj.cov_tau, tica_ref.cov_tau, atol=1e-12)
+            np.testing.assert_allclose(tica_obj.eigenvalues, tica_ref.eigenvalues)
+
+        with self.assertRaises(ValueError):
+            tica_obj.combine(api.tica(data=data[0], lag=self.lag + 1))
+
+    def test_random_access_lagged(self):
+        import tempfile
+        import shutil
+        data = [self.X[:3000], self.X[3000:3005], self.X[3005:]]
+        # random subset of frames of the first and last trajectory, sorted
+        np.random.seed(42)
+        frames = [np.sort(np.random.choice(len(data[i]), 500, replace=False)) for i in (0, 2)]
+        indices = np.vstack([np.column_stack((np.full(len(f), i, dtype=int), f))
+                             for i, f in zip((0, 2), frames)])
+        X = np.concatenate([data[i][f] for i, f in zip((0, 2), frames)])
+        # pairs reaching beyond the end of a trajectory are dropped
+        pairs = [f[f + self.lag < len(data[i])] for i, f in zip((0, 2), frames)]
+        X0 = np.concatenate([data[i][f] for i, f in zip((0, 2), pairs)])
+        Xt = np.concatenate([data[i][f + self.lag] for i, f in zip((0, 2), pairs)])
+        mean = X.mean(axis=0)
+        cov_tau = np.dot((X0 - mean).T, Xt - mean) / (len(X0) - 1)
+        cov_tau = 0.5 * (cov_tau + cov_tau.T)
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            files = [os.path.join(tmpdir, '%i.npy' % i) for i in range(len(data))]
+            for f, x in zip(files, data):
+                np.save(f, x)
+            for chunksize in (0, 77):
+                for producer in (api.source(data, chunk_size=chunksize), api.source(files, chunk_size=chunksize)):
+                    tica_obj = tica(lag=self.lag)
+                    tica_obj.data_producer = producer
+                    tica_obj.parametrize(stride=indices)
+                    np.testing.assert_allclose(tica_obj.mean, mean)
+                    np.testing.assert_allclose(tica_obj.cov_tau, cov_tau, atol=1e-12)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def test_redundant_dimensions(self):
+        # constant and duplicate columns do not change the result
+        X = np.column_stack((self.X, np.ones(self.T), self.X[:, 0], np.zeros(self.T)))
+        tica_ref = api.tica(data=self.X, lag=self.lag)
+        tica_obj = api.tica(data=X, lag=self.lag)
+        self.assertEqual(tica_obj.eigenvectors.shape[0], 5)
+        np.testing.assert_allclose(tica_obj.eigenvalues, tica_ref.eigenvalues)
+        np.testing.assert_allclose(np.abs(tica_obj.get_output()[0]), np.abs(tica_ref.get_output()[0]),
+                                   rtol=1e-4, atol=1e-5)
+
+    def test_single_precision(self):
+        # single precision input with a large offset, accumulated in chunks
+        data = (self.X + 1000.0).astype(np.float32)
+        tica_ref = api.tica(data=data.astype(np.float64), lag=self.lag)
+        for precision in ('double', 'mixed'):
+            tica_obj = api.tica(data=api.source(data, chunk_size=333), lag=self.lag, precision=precision)
+            np.testing.assert_allclose(tica_obj.mean, tica_ref.mean, rtol=1e-7)
+            np.testing.assert_allclose(tica_obj.cov, tica_ref.cov, rtol=1e-4, atol=1e-5)
+            np.testing.assert_allclose(tica_obj.cov_tau, tica_ref.cov_tau, rtol=1e-4, atol=1e-5)
+            # only the upper triangle is accumulated, the result is symmetric
+            np.testing.assert_equal(tica_obj.cov, tica_obj.cov.T)
+        with self.assertRaises(ValueError):
+            api.tica(lag=self.lag, precision='half')
+
+    def test_moments_buffers_reused(self):
+        # the moments of all chunks are accumulated in place, without d x d temporaries
+        import tracemalloc
+        from pyemma.coordinates.util.moments import RunningMoments
+        d = 200
+        X = np.random.randn(400, d)
+        for dtype, precision in ((np.float64, 'double'), (np.float32, 'mixed')):
+            Xp = X.astype(dtype)
+            m = RunningMoments(compute_XY=True, compute_YY=True, precision=precision)
+            m.add(Xp[:100], Xp[1:101])
+            accumulators = (m._Mxx, m.Mxy, m._Myy)
+            buffers = dict(m._buffers)
+            tracemalloc.start()
+            try:
+                for t in range(100, 300, 100):
+                    m.add(Xp[t:t + 100], Xp[t + 1:t + 101])
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            self.assertLess(peak, d * d * 4)
+            for a, b in zip(accumulators, (m._Mxx, m.Mxy, m._Myy)):
+                self.assertIs(a, b)
+            self.assertEqual(sorted(buffers), sorted(m._buffers))
+            for key in buffers:
+                self.assertIs(buffers[key], m._buffers[key])
+            Xd = Xp.astype(np.float64) - m.shift
+            np.testing.assert_allclose(m.Mxx, np.dot(Xd[:300].T, Xd[:300]), rtol=1e-4, atol=1e-3)
+            np.testing.assert_allclose(m.Mxy, np.dot(Xd[:300].T, Xd[1:301]), rtol=1e-4, atol=1e-3)
+            np.testing.assert_allclose(m.Myy, np.dot(Xd[1:301].T, Xd[1:301]), rtol=1e-4, atol=1e-3)
+
+    def test_tica_its(self):
+        # one trajectory is shorter than the largest lag time
+        data = [self.X[:3000], self.X[3000:3015], self.X[3015:]]
+        lags = [1, 5, 10, 20]
+        for force_eigenvalues_le_one in (False, True):
+            reader = api.source(data, chunk_size=7)
+            its = api.tica_its(reader, lags=lags, force_eigenvalues_le_one=force_eigenvalues_le_one)
+            np.testing.assert_equal(its.lags, lags)
+            self.assertEqual(its.timescales.shape, (len(lags), its.number_of_timescales))
+            for lag, model, ts in zip(lags, its.models, its.timescales):
+                tica_ref = api.tica(data=data, lag=lag, force_eigenvalues_le_one=force_eigenvalues_le_one)
+                np.testing.assert_allclose(model.mean, tica_ref.mean)
+                np.testing.assert_allclose(model.cov, tica_ref.cov, atol=1e-12)
+                np.testing.assert_allclose(model.cov_tau, tica_ref.cov_tau, atol=1e-12)
+                np.testing.assert_allclose(ts, tica_ref.timescales[:len(ts)])
+
+        # with stride, lag times need to be multiples of it
+        its = api.tica_its(data, lags=[2, 4], stride=2)
+        np.testing.assert_allclose(its.models[1].cov_tau, api.tica(data, lag=4, stride=2).cov_tau, atol=1e-12)
+        with self.assertRaises(ValueError):
+            api.tica_its(data, lags=[3], stride=2)
+
+        # nits is an upper bound, the setting of the user is kept when estimating again
+        its = api.tica_its(data, lags=lags, dim=2, nits=10)
+        self.assertEqual(its.nits, 10)
+        self.assertEqual(its.number_of_timescales, 2)
+        self.assertEqual(its.timescales.shape, (len(lags), 2))
+        its.nits = 1
+        its.estimate(data)
+        self.assertEqual(its.number_of_timescales, 1)
+        its.nits = None
+        its.estimate(data)
+        self.assertIsNone(its.nits)
+        self.assertEqual(its.timescales.shape, (len(lags), 2))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
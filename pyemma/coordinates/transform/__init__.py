@@ -28,6 +28,7 @@ transform - Transformation Utilities (:mod:`pyemma.coordinates.transform`)
 
     PCA - principal components
     TICA - time independent components
+    TICAImpliedTimescales - time independent components at multiple lag times
 """
 
 from .transformer import Transformer
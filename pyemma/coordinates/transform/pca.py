@@ -21,8 +21,11 @@ from __future__ import absolute_import
 import numpy as np
 
 from pyemma.util.annotators import doc_inherit
-from pyemma.coordinates.transform.transformer import SkipPassException, Transformer
+from pyemma.coordinates.transform.transformer import Transformer
+from pyemma.coordinates.util.moments import RunningMoments
+from pyemma.coordinates.util.projection import AffineProjection
 from pyemma.util import types
+from pyemma.util.linalg import eigh_dominant, nonredundant_dimensions, submatrix
 from pyemma.util.reflection import get_default_args
 
 __all__ = ['PCA']
@@ -32,7 +35,8 @@ __author__ = 'noe'
 class PCA(Transformer):
     r""" Principal component analysis."""
 
-    def __init__(self, dim=-1, var_cutoff=0.95, mean=None):
+    def __init__(self, dim=-1, var_cutoff=0.95, mean=None, method='full', oversampling=10,
+                 power_iterations=2, precision='double'):
         r""" Principal component analysis.
 
         Given a sequence of multivariate data :math:`X_t`,
@@ -69,6 +73,33 @@ class PCA(Transformer):
             Optionally pass pre-calculated means to avoid their re-computation.
             The shape has to match the input dimension.
 
+        method : str, optional, default 'full'
+            'full' computes the full covariance matrix and all its eigenvectors. 'randomized'
+            only computes the leading dim principal components by randomized subspace iteration
+            [1]_ without forming the covariance matrix, so that the memory scales linearly with
+            the input dimension. This requires a positive dim and power_iterations + 2 passes
+            over the data.
+
+        oversampling : int, optional, default 10
+            number of additional directions sampled in the randomized method.
+
+        power_iterations : int, optional, default 2
+            number of power iterations of the randomized method. More iterations improve
+            the accuracy if the variances decay slowly.
+
+        precision : str, optional, default 'double'
+            precision of the covariance computation. 'double' computes the covariance matrix of
+            every chunk in double precision. 'mixed' keeps single precision input in single
+            precision for the products of every chunk and only accumulates them in double
+            precision (see :class:`RunningMoments <pyemma.coordinates.util.moments.RunningMoments>`).
+            Single precision input is then also projected in single precision.
+
+        References
+        ----------
+        .. [1] Halko, N., P. G. Martinsson and J. A. Tropp. 2011.
+           Finding structure with randomness: Probabilistic algorithms for constructing
+           approximate matrix decompositions. SIAM Rev. 53, 217-288.
+
         """
         super(PCA, self).__init__()
         self._dim = dim
@@ -76,17 +107,33 @@ class PCA(Transformer):
         default_var_cutoff = get_default_args(self.__init__)['var_cutoff']
         if dim != -1 and var_cutoff != default_var_cutoff:
             raise ValueError('Trying to set both the number of dimension and the subspace variance. Use either or.')
-        self._dot_prod_tmp = None
+        if method not in ('full', 'randomized'):
+            raise ValueError("method has to be 'full' or 'randomized', but was '%s'" % method)
+        if method == 'randomized' and dim <= 0:
+            raise ValueError('The randomized method requires a positive number of dimensions.')
+        self._method = method
+        self._oversampling = oversampling
+        self._power_iterations = power_iterations
+        if precision not in ('double', 'mixed'):
+            raise ValueError("precision has to be 'double' or 'mixed', but was '%s'" % precision)
+        self._precision = precision
         self.Y = None
         self._N_mean = 0
         self._N_cov = 0
+        # running first and second moments
+        self._moments = None
 
         self.mu = mean
+        self._given_mean = mean is not None
 
         # set up result variables
         self.eigenvalues = None
         self.eigenvectors = None
         self.cumvar = None
+        # projection onto all output dimensions, see _projection
+        self._full_projection = None
+        # input dimensions which are not constant (None: all)
+        self._input_dimensions = None
 
         # output options
         self._custom_param_progress_handling = True
@@ -128,26 +175,36 @@ class PCA(Transformer):
         self._logger.info("Running PCA on %i dimensional input" % indim)
         assert indim > 0, "Incoming data of PCA has 0 dimension!"
 
-        if self.mu is not None:
+        if self._given_mean:
             self.mu = types.ensure_ndarray(self.mu, shape=(indim,))
-            self._given_mean = True
         else:
             self.mu = np.zeros(indim)
-            self._given_mean = False
-
-        self.cov = np.zeros((indim, indim))
 
         # amount of chunks
         denom = self._n_chunks(self._param_with_stride)
-        self._progress_register(denom, description="calculate mean", stage=0)
-        self._progress_register(denom, description="calculate covariances", stage=1)
+
+        if self._method == 'randomized':
+            # the mean is accumulated in the first of the passes
+            self._moments = RunningMoments(compute_XX=False, shift=self.mu if self._given_mean else None)
+            # random directions, their image under the covariance matrix and its trace
+            self._Q = np.random.randn(indim, min(self._dim + self._oversampling, indim))
+            self._CQ = np.zeros_like(self._Q)
+            self._trace = 0.0
+            self._progress_register(denom * (self._power_iterations + 2),
+                                    description="randomized subspace iteration", stage=0)
+            return
+
+        # mean and covariance are accumulated in a single pass
+        self._moments = RunningMoments(shift=self.mu if self._given_mean else None, precision=self._precision)
+        self._progress_register(denom, description="calculate mean and covariances", stage=0)
 
     def _param_add_data(self, X, itraj, t, first_chunk, last_chunk_in_traj,
                         last_chunk, ipass, Y=None, stride=1):
         r"""
-        Chunk-based parametrization of PCA. Iterates through all data twice. In the first pass, the
-        data means are estimated, in the second pass the covariance matrix is estimated.
-        Finally, the eigenvalue problem is solved to determine the principal components.
+        Chunk-based parametrization of PCA. Iterates through all data once and accumulates the
+        first and second moments of the data, shifted by a constant to avoid a loss of precision.
+        Finally, the eigenvalue problem of the covariance matrix is solved to determine the
+        principal components.
 
         :param X:
             coordinates. axis 0: time, axes 1-..: coordinates
@@ -167,51 +224,162 @@ class PCA(Transformer):
             time-lagged data (if available)
         :return:
         """
-        # pass 1: means
-        if ipass == 0:
-            if t == 0:
-                if self._given_mean:
-                    raise SkipPassException(next_pass_stride=stride)
-                self._sum_tmp = np.empty(X.shape[1])
-            np.sum(X, axis=0, out=self._sum_tmp)
-            self.mu += self._sum_tmp
-            self._N_mean += np.shape(X)[0]
-
-            # counting chunks and log of eta
-            self._progress_update(1, 0)
-
-            if last_chunk:
-                self.mu /= self._N_mean
-
-        # pass 2: covariances
-        if ipass == 1:
-            if t == 0:
-                self._logger.debug("start calculate covariance for traj nr %i" % itraj)
-                self._dot_prod_tmp = np.empty_like(self.cov)
-            Xm = X - self.mu
-            np.dot(Xm.T, Xm, self._dot_prod_tmp)
-            self.cov += self._dot_prod_tmp
-            self._N_cov += np.shape(X)[0]
-
-            self._progress_update(1, stage=1)
-
-            if last_chunk:
-                self.cov /= self._N_cov - 1
-                return True  # finished!
+        if self._method == 'randomized':
+            return self._add_data_randomized(X, ipass, last_chunk)
+
+        if t == 0:
+            self._logger.debug("start calculate covariance for traj nr %i" % itraj)
+        self._moments.add(X)
+
+        # counting chunks and log of eta
+        self._progress_update(1, stage=0)
+
+        if last_chunk:
+            return True  # finished!
 
         # by default, continue
         return False
 
-    def _param_finish(self):
-        (v, R) = np.linalg.eigh(self.cov)
-        # sort
+    def _add_data_randomized(self, X, ipass, last_chunk):
+        # accumulate C Q with the shifted data, the shift is corrected for at the end of the pass
+        if ipass == 0:
+            self._moments.add(X)
+        Xc = X - self._moments.shift
+        self._CQ += np.dot(Xc.T, np.dot(Xc, self._Q))
+        if ipass == 0:
+            self._trace += np.sum(Xc * Xc, dtype=np.float64)
+
+        self._progress_update(1, stage=0)
+
+        if not last_chunk:
+            return False
+
+        n = self._moments.n
+        mu = self.mu if self._given_mean else self._moments.mean_X
+        d = mu - self._moments.shift
+        self._CQ -= n * np.outer(d, np.dot(d, self._Q))
+        if ipass == 0:
+            self._trace -= n * np.dot(d, d)
+        if ipass <= self._power_iterations:
+            # orthonormalize and continue with the next power iteration
+            self._Q, _ = np.linalg.qr(self._CQ)
+            self._CQ = np.zeros_like(self._Q)
+            return False
+        return True  # finished!
+
+    def _finish_randomized(self):
+        if not self._given_mean:
+            self.mu = self._moments.mean_X
+        self._N_mean = self._moments.n
+        self._N_cov = self._moments.n
+        # projection of the covariance matrix onto the sampled subspace
+        B = np.dot(self._Q.T, self._CQ)
+        B = 0.5 * (B + B.T)
+        (v, R) = np.linalg.eigh(B)
         I = np.argsort(v)[::-1]
-        self.eigenvalues = v[I]
-        self.eigenvectors = R[:, I]
+        self.eigenvalues = v[I] / (self._N_cov - 1)
+        self.eigenvectors = np.dot(self._Q, R[:, I])
+        self.cov = None
+        # cumulative variance relative to the total variance (trace of the covariance matrix)
+        self.cumvar = np.cumsum(self.eigenvalues) / (self._trace / (self._N_cov - 1))
+        self._Q = None
+        self._CQ = None
+
+    def _partial_fit(self, data_producer, stride=1):
+        if self._method == 'randomized':
+            raise NotImplementedError('partial_fit is not supported by the randomized method.')
+        if self._moments is None:
+            if self._given_mean:
+                self.mu = types.ensure_ndarray(self.mu, shape=(data_producer.dimension(),))
+            self._moments = RunningMoments(shift=self.mu if self._given_mean else None, precision=self._precision)
+        for _, X in data_producer.iterator(stride=stride):
+            self._moments.add(X)
+        self._param_finish()
+
+    def fit(self, X, **kwargs):
+        r"""Estimates PCA from the given data only.
+
+        In contrast to :func:`partial_fit`, statistics of previously seen data are discarded.
+        """
+        self._moments = None
+        # a previous partial_fit leaves the estimator parametrized with the same data producer
+        self._parametrized = False
+        return super(PCA, self).fit(X, **kwargs)
+
+    @property
+    def moments(self):
+        r""" The running moments (:class:`RunningMoments <pyemma.coordinates.util.moments.RunningMoments>`)
+        accumulated so far. """
+        return self._moments
+
+    def combine(self, other):
+        r""" Merges the statistics of another PCA estimate into this one.
+
+        This allows to estimate PCA in parallel, eg. by fitting subsets of the data in
+        different processes or on different machines and combining the results afterwards.
+        The combination is exact, ie. it gives the same estimate as fitting all data at once.
+
+        Parameters
+        ----------
+        other : PCA, RunningMoments or dict
+            another PCA object, its :attr:`moments` or their dictionary representation (see
+            :meth:`RunningMoments.to_dict <pyemma.coordinates.util.moments.RunningMoments.to_dict>`).
+
+        Returns
+        -------
+        self : the updated PCA object
+        """
+        if self._method == 'randomized':
+            raise NotImplementedError('combine is not supported by the randomized method.')
+        if isinstance(other, PCA):
+            other = other.moments
+        elif isinstance(other, dict):
+            other = RunningMoments.from_dict(other)
+        if other is None:
+            raise ValueError("the given PCA object has not been estimated yet.")
+        if self._moments is None:
+            self._moments = RunningMoments(shift=self.mu if self._given_mean else None, precision=self._precision)
+        self._moments.combine(other)
+        self._param_finish()
+        self._parametrized = True
+        return self
 
-        # compute cumulative variance
+    def _param_finish(self):
+        self._full_projection = None
+        if self._method == 'randomized':
+            return self._finish_randomized()
+        if not self._given_mean:
+            self.mu = self._moments.mean_X
+        self._N_mean = self._moments.n
+        self._N_cov = self._moments.n
+        self.cov = self._moments.sum_XX(self.mu) / (self._N_cov - 1)
+
+        # constant input dimensions are principal components with zero variance, so only the
+        # remaining ones are diagonalized
+        n = self.cov.shape[0]
+        self._input_dimensions = nonredundant_dimensions(self.cov)
+        if len(self._input_dimensions) == n:
+            self._input_dimensions = None
+
+        # sorted eigenvalues, only the requested components if dim is fixed and small
+        k = self._dim if self._dim > 0 else None
+        if self._input_dimensions is None:
+            (self.eigenvalues, self.eigenvectors) = eigh_dominant(self.cov, k=k)
+        else:
+            sel = self._input_dimensions
+            (l, R) = eigh_dominant(submatrix(self.cov, sel), k=k)
+            removed = np.setdiff1d(np.arange(n), sel)
+            if len(l) < len(sel):
+                removed = removed[0:0]
+            # the constant dimensions come last, with zero variance
+            self.eigenvalues = np.concatenate((l, np.zeros(len(removed))))
+            self.eigenvectors = np.zeros((n, len(l) + len(removed)))
+            self.eigenvectors[sel, 0:len(l)] = R
+            self.eigenvectors[removed, len(l) + np.arange(len(removed))] = 1.0
+
+        # compute cumulative variance relative to the total variance
         self.cumvar = np.cumsum(self.eigenvalues)
-        self.cumvar /= self.cumvar[-1]
+        self.cumvar /= np.trace(self.cov)
 
     def _transform_array(self, X):
         r"""
@@ -220,7 +388,31 @@ class PCA(Transformer):
         :param X: the input data
         :return: the projected data
         """
-        # TODO: consider writing an extension to avoid temporary Xmeanfree
-        X_meanfree = X - self.mu
-        Y = np.dot(X_meanfree, self.eigenvectors[:, 0:self.dimension()])
-        return Y
\ No newline at end of file
+        return self._transform_array_dimensions(X, slice(0, None))
+
+    def _transform_array_dimensions(self, X, dimensions, out=None):
+        r"""
+        Projects the data onto the requested dominant principal components only.
+
+        :param X: the input data
+        :param dimensions: indices of the principal components to project onto
+        :param out: optional array to write the projected data into
+        :return: the projected data
+        """
+        return self._projection(dimensions)(X, out=out)
+
+    def _projection(self, dimensions):
+        r""" The projection onto the given principal components as a single affine map, with the
+        mean folded into the bias. """
+        full = isinstance(dimensions, slice) and dimensions == slice(0, None)
+        if full and self._full_projection is not None:
+            return self._full_projection
+        W = self.eigenvectors[:, 0:self.dimension()][:, dimensions]
+        b = -np.dot(self.mu, W)
+        if self._input_dimensions is not None:
+            # constant input dimensions do not contribute, so they are not read at all
+            W = W[self._input_dimensions]
+        projection = AffineProjection(W, b, precision=self._precision, columns=self._input_dimensions)
+        if full:
+            self._full_projection = projection
+        return projection
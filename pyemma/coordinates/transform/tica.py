@@ -24,9 +24,12 @@ Created on 19.01.2015
 
 @author: marscher
 '''
-from .transformer import Transformer, SkipPassException
+from .transformer import Transformer, TransformerIteratorContext
+from .pca import PCA
 
-from pyemma.util.linalg import eig_corr
+from pyemma.coordinates.util.moments import RunningMoments
+from pyemma.coordinates.util.projection import AffineProjection
+from pyemma.util.linalg import eig_corr, nonredundant_dimensions, submatrix
 from pyemma.util.annotators import doc_inherit
 from pyemma.util.reflection import get_default_args
 
@@ -43,7 +46,8 @@ class TICA(Transformer):
     r""" Time-lagged independent component analysis (TICA)"""
 
     def __init__(self, lag, dim=-1, var_cutoff=0.95, kinetic_map=True, epsilon=1e-6,
-                 force_eigenvalues_le_one=False, mean=None):
+                 force_eigenvalues_le_one=False, mean=None, method='full', rank=None,
+                 precision='double'):
         r""" Time-lagged independent component analysis (TICA) [1]_, [2]_, [3]_.
 
         Parameters
@@ -71,6 +75,23 @@ class TICA(Transformer):
         mean : ndarray, optional, default None
             Optionally pass pre-calculated means to avoid their re-computation.
             The shape has to match the input dimension.
+        method : str, optional, default 'full'
+            'full' estimates the full covariance matrices. 'randomized' never forms matrices of the
+            size of the input dimension. Instead, TICA is estimated in the subspace of the leading
+            rank principal components, which are found by randomized PCA (see
+            :class:`PCA <pyemma.coordinates.transform.PCA>`), so that the memory scales linearly
+            with the input dimension. Then :attr:`cov` and :attr:`cov_tau` refer to the basis of
+            these principal components. Requires a positive dim.
+        rank : int, optional, default None
+            dimension of the principal component subspace of the randomized method. None means
+            2 * dim + 10.
+        precision : str, optional, default 'double'
+            precision of the covariance computation. 'double' computes the covariances of every
+            chunk in double precision. 'mixed' keeps single precision input in single precision
+            for the products of every chunk and only accumulates them in double precision, which
+            is about twice as fast, but less accurate for ill-conditioned data (see
+            :class:`RunningMoments <pyemma.coordinates.util.moments.RunningMoments>`). Single
+            precision input is then also projected in single precision.
 
         Notes
         -----
@@ -123,19 +144,44 @@ class TICA(Transformer):
         self._kinetic_map = kinetic_map
         self._epsilon = epsilon
         self._force_eigenvalues_le_one = force_eigenvalues_le_one
+        if method not in ('full', 'randomized'):
+            raise ValueError("method has to be 'full' or 'randomized', but was '%s'" % method)
+        if method == 'randomized':
+            if dim <= 0:
+                raise ValueError('The randomized method requires a positive number of dimensions.')
+            if mean is not None:
+                raise ValueError('The randomized method does not support a given mean.')
+            if rank is not None and rank < dim:
+                raise ValueError('rank (%i) has to be at least dim (%i).' % (rank, dim))
+        self._method = method
+        self._rank = rank
+        if precision not in ('double', 'mixed'):
+            raise ValueError("precision has to be 'double' or 'mixed', but was '%s'" % precision)
+        self._precision = precision
+        # principal components spanning the subspace of the randomized method
+        self._pca = None
 
         # covariances
         self.cov = None
         self.cov_tau = None
         # mean
         self.mu = mean
+        self._given_mean = mean is not None
 
         self._N_mean = 0
         self._N_cov = 0
         self._N_cov_tau = 0
+        # running moments, see _init_moments
+        self._moments_mean = None
+        self._moments_0 = None
+        self._moments_tau = None
         self._eigenvalues = None
         self._eigenvectors = None
         self._cumvar = None
+        # projection onto all output dimensions, see _projection
+        self._full_projection = None
+        # input dimensions which are neither constant nor duplicates (None: all)
+        self._input_dimensions = None
 
         self._custom_param_progress_handling = True
 
@@ -189,40 +235,52 @@ class TICA(Transformer):
         assert indim > 0, "zero dimension from data producer"
         assert self._dim <= indim, ("requested more output dimensions (%i) than dimension"
                                     " of input data (%i)" % (self._dim, indim))
-        if self._force_eigenvalues_le_one and self._lag % self._param_with_stride != 0:
+        if self._force_eigenvalues_le_one and TransformerIteratorContext.is_uniform_stride(self._param_with_stride) \
+                and self._lag % self._param_with_stride != 0:
             raise RuntimeError("When using TICA with force_eigenvalues_le_one, lag must be a multiple of stride.")
 
-        if self.mu is not None:
+        if self._method == 'randomized':
+            # estimate in the subspace of the leading principal components
+            rank = min(indim, self._rank if self._rank is not None else 2 * self._dim + 10)
+            self._pca = PCA(dim=rank, method='randomized')
+            self._pca.data_producer = self.data_producer
+            self._pca.chunksize = self.chunksize
+            self._pca.parametrize(stride=self._param_with_stride)
+            indim = rank
+
+        if self._given_mean:
             self.mu = types.ensure_ndarray(self.mu, shape=(indim,))
-            self._given_mean = True
         else:
             self.mu = np.zeros(indim)
-            self._given_mean = False
 
         self._N_mean = 0
-        self._N_cov = 0
-        self._N_cov_tau = 0
-        # create covariance matrices
-        self.cov = np.zeros((indim, indim))
-        self.cov_tau = np.zeros_like(self.cov)
+        self._init_moments()
+        if self._given_mean:
+            if self._force_eigenvalues_le_one:
+                self._logger.warning("Constraint of eigenvalues <= 1 is active,"
+                                     "so the mean also depends on the lag time!")
+            self._moments_0.shift = self.mu.copy()
+            self._moments_tau.shift = self.mu.copy()
+        self._skipped_trajs = []
 
         self._logger.debug("Running TICA with tau=%i; Estimating two covariance matrices"
                            " with dimension (%i, %i)" % (self._lag, indim, indim))
 
         # amount of chunks
         denom = self._n_chunks(self._param_with_stride)
-        self._progress_register(denom, "calculate mean", 0)
-        self._progress_register(denom, "calculate covariances", 1)
+        self._progress_register(denom, "calculate mean and covariances", 0)
 
-        return 0  # in zero'th pass don't request lagged data
+        # mean and covariances are accumulated in a single pass over lagged data
+        return self._lag
 
     def _param_add_data(self, X, itraj, t, first_chunk, last_chunk_in_traj,
                         last_chunk, ipass, Y=None, stride=1):
         r"""
-        Chunk-based parameterization of TICA. Iterates through all data twice. In the first pass, the
-        data means are estimated, in the second pass the covariance and time-lagged covariance
-        matrices are estimated. Finally, the generalized eigenvalue problem is solved to determine
-        the independent components.
+        Chunk-based parameterization of TICA. Iterates through all data once and accumulates the
+        first and second moments of the data and the time-lagged data, shifted by a constant
+        to avoid a loss of precision. Finally, the mean, covariance and time-lagged covariance
+        matrices are obtained from the moments and the generalized eigenvalue problem is solved
+        to determine the independent components.
 
         :param X:
             coordinates. axis 0: time, axes 1-..: coordinates
@@ -242,115 +300,143 @@ class TICA(Transformer):
             time-lagged data (if available)
         :return:
         """
-        if ipass == 0:
+        if self._method == 'randomized':
+            X = self._pca._transform_array(X)
+            Y = self._pca._transform_array(Y) if Y is not None else None
+        self._add_chunk(self.data_producer, itraj, X, Y)
 
-            # if we have a user-given mean, skip ipass 0 now:
-            if self._given_mean:
-                if self._force_eigenvalues_le_one:
-                    self._logger.warning("Constraint of eigenvalues <= 1 is active,"
-                                         "so the mean also depends on the lag time!")
-                raise SkipPassException(self._lag, stride)
+        # counting chunks and log of eta
+        self._progress_update(1, stage=0)
 
-            if self._force_eigenvalues_le_one:
-                # MSM-like counting
-                if self.trajectory_length(itraj, stride=1) - self._lag > 0:
-                    # find the "tails" of the trajectory relative to the current chunk
-                    Zptau = self._lag//stride - t  # zero plus tau
-                    Nmtau = self.trajectory_length(itraj, stride=stride)-t-self._lag//stride  # N minus tau
-
-                    # restrict them to valid block indices
-                    size = X.shape[0]
-                    Zptau = min(max(Zptau, 0), size)
-                    Nmtau = min(max(Nmtau, 0), size)
-
-                    # find start and end of double-counting region
-                    start2 = min(Zptau, Nmtau)
-                    end2 = max(Zptau, Nmtau)
-
-                    # update mean
-                    self.mu += np.sum(X[0:start2, :], axis=0, dtype=np.float64)
-                    self._N_mean += start2
-
-                    if Nmtau > Zptau: # only if trajectory length > 2*tau, there is double-counting
-                        self.mu += 2.0 * np.sum(X[start2:end2, :], axis=0, dtype=np.float64)
-                        self._N_mean += 2.0 * (end2 - start2)
-
-                    self.mu += np.sum(X[end2:, :], axis=0, dtype=np.float64)
-                    self._N_mean += (size - end2)
-            else:
-                # traditional counting
-                self.mu += np.sum(X, axis=0, dtype=np.float64)
-                self._N_mean += np.shape(X)[0]
-
-            # counting chunks and log of eta
-            self._progress_update(1, stage=0)
-
-            if last_chunk:
-                self.mu /= self._N_mean
-
-                # now we request real lagged data, since we are finished
-                # with first pass
-                return False, self._lag
-
-        elif ipass == 1:
-
-            if self.trajectory_length(itraj, stride=1) - self._lag > 0:
-                self._N_cov_tau += 2.0 * np.shape(Y)[0]
-                # _N_cov_tau is muliplied by 2, because we later symmetrize
-                # cov_tau, so we are actually using twice the number of samples
-                # for every element.
-                X_meanfree = X - self.mu
-                Y_meanfree = Y - self.mu
-                # update the time-lagged covariance matrix
-                end = min(X_meanfree.shape[0], Y_meanfree.shape[0])
-                self.cov_tau += 2.0 * np.dot(X_meanfree[0:end].T,
-                                             Y_meanfree[0:end])
-
-                # update the instantaneous covariance matrix
-                if self._force_eigenvalues_le_one:
-                    # MSM-like counting
-                    Zptau = self._lag//stride-t  # zero plus tau
-                    Nmtau = self.trajectory_length(itraj, stride=stride)-t-self._lag//stride  # N minus tau
-
-                    # restrict to valid block indices
-                    size = X_meanfree.shape[0]
-                    Zptau = min(max(Zptau, 0), size)
-                    Nmtau = min(max(Nmtau, 0), size)
-
-                    # update covariance matrix
-                    start2 = min(Zptau, Nmtau)
-                    end2 = max(Zptau, Nmtau)
-                    self.cov += np.dot(X_meanfree[0:start2, :].T,
-                                       X_meanfree[0:start2, :])
-                    self._N_cov += start2
-
-                    if Nmtau > Zptau:
-                        self.cov += 2.0 * np.dot(X_meanfree[start2:end2, :].T,
-                                                 X_meanfree[start2:end2, :])
-                        self._N_cov += 2.0 * (end2 - start2)
-
-                    self.cov += np.dot(X_meanfree[end2:, :].T,
-                                       X_meanfree[end2:, :])
-                    self._N_cov += (size - end2)
-                else:
-                    # traditional counting
-                    self.cov += 2.0 * np.dot(X_meanfree.T, X_meanfree)
-                    self._N_cov += 2.0 * np.shape(X)[0]
-
-                self._progress_update(1,stage=1)
-
-            else:
-                self._skipped_trajs.append(itraj)
-
-            if last_chunk:
-                return True  # finished!
+        if last_chunk:
+            return True  # finished!
 
         return False  # not finished yet.
 
+    def _init_moments(self):
+        # frames of all trajectories (mean with traditional counting)
+        self._moments_mean = RunningMoments(compute_XX=False, precision=self._precision)
+        # frames of trajectories longer than the lag time (C0 with traditional counting)
+        self._moments_0 = RunningMoments(compute_XX=True, precision=self._precision)
+        # time-lagged pairs (C_tau; with MSM-like counting also C0 and the mean)
+        self._moments_tau = RunningMoments(compute_XX=self._force_eigenvalues_le_one, compute_XY=True,
+                                           compute_YY=self._force_eigenvalues_le_one, precision=self._precision)
+
+    def _add_chunk(self, data_producer, itraj, X, Y):
+        # X and Y of the lagged iteration, Y may be shorter at the end of a trajectory
+        if not self._force_eigenvalues_le_one:
+            self._moments_mean.add(X)
+        if data_producer.trajectory_length(itraj, stride=1) - self._lag > 0:
+            end = min(X.shape[0], Y.shape[0])
+            self._moments_tau.add(X[0:end], Y[0:end])
+            if not self._force_eigenvalues_le_one:
+                self._moments_0.add(X)
+        elif itraj not in self._skipped_trajs:
+            self._skipped_trajs.append(itraj)
+
+    def _partial_fit(self, data_producer, stride=1):
+        if self._method == 'randomized':
+            raise NotImplementedError('partial_fit is not supported by the randomized method.')
+        if self._force_eigenvalues_le_one and TransformerIteratorContext.is_uniform_stride(stride) \
+                and self._lag % stride != 0:
+            raise RuntimeError("When using TICA with force_eigenvalues_le_one, lag must be a multiple of stride.")
+        if self._moments_tau is None:
+            if self._given_mean:
+                self.mu = types.ensure_ndarray(self.mu, shape=(data_producer.dimension(),))
+            self._init_moments()
+
+        # indexes of skipped trajectories refer to the given data
+        self._skipped_trajs = []
+        for itraj, X, Y in data_producer.iterator(stride=stride, lag=self._lag):
+            self._add_chunk(data_producer, itraj, X, Y)
+
+        self._param_finish()
+
+    def fit(self, X, **kwargs):
+        r"""Estimates TICA from the given data only.
+
+        In contrast to :func:`partial_fit`, statistics of previously seen data are discarded.
+        """
+        self._moments_tau = None
+        # a previous partial_fit leaves the estimator parametrized with the same data producer
+        self._parametrized = False
+        return super(TICA, self).fit(X, **kwargs)
+
+    @property
+    def moments(self):
+        r""" The running moments accumulated so far.
+
+        Returns
+        -------
+        moments : dict of :class:`RunningMoments <pyemma.coordinates.util.moments.RunningMoments>`
+            the moments of all frames ('mean'), of the frames of trajectories longer than the
+            lag time ('C0') and of the time-lagged pairs ('Ctau'). Moments which are not needed
+            with the chosen way of counting remain empty.
+        """
+        return {'mean': self._moments_mean, 'C0': self._moments_0, 'Ctau': self._moments_tau}
+
+    def combine(self, other):
+        r""" Merges the statistics of another TICA estimate into this one.
+
+        This allows to estimate TICA in parallel, eg. by fitting subsets of the trajectories
+        in different processes or on the machines which produced them and combining the
+        results afterwards. The combination is exact, ie. it gives the same estimate as
+        fitting all data at once.
+
+        Parameters
+        ----------
+        other : TICA or dict
+            a TICA object with the same lag time and way of counting (force_eigenvalues_le_one),
+            or its :attr:`moments`. The moments may also be given as dictionaries (see
+            :meth:`RunningMoments.to_dict <pyemma.coordinates.util.moments.RunningMoments.to_dict>`),
+            eg. when they have been stored on another machine.
+
+        Returns
+        -------
+        self : the updated TICA object
+        """
+        if self._method == 'randomized':
+            raise NotImplementedError('combine is not supported by the randomized method.')
+        if isinstance(other, TICA):
+            if other.lag != self.lag or other._force_eigenvalues_le_one != self._force_eigenvalues_le_one:
+                raise ValueError("can only combine TICA estimates with the same lag time and"
+                                 " force_eigenvalues_le_one setting.")
+            other = other.moments
+        if self._moments_tau is None:
+            self._init_moments()
+        for key, m in self.moments.items():
+            o = other.get(key, None)
+            if o is None:
+                continue
+            if isinstance(o, dict):
+                o = RunningMoments.from_dict(o)
+            m.combine(o)
+        self._param_finish()
+        self._parametrized = True
+        return self
+
     def _param_finish(self):
+        self._full_projection = None
+        m = self._moments_tau
+        if m.n <= 1:
+            raise RuntimeError("Not enough time-lagged pairs to estimate TICA. Are all trajectories"
+                               " shorter than the lag time %i?" % self._lag)
         if self._force_eigenvalues_le_one:
-            assert self._N_mean == self._N_cov, 'inconsistency in C(0) and mu'
-            assert self._N_cov == self._N_cov_tau, 'inconsistency in C(0) and C(tau)'
+            # C0 and the mean are estimated from both ends of the time-lagged pairs
+            if not self._given_mean:
+                self.mu = 0.5 * (m.mean_X + m.mean_Y)
+            self.cov = m.sum_XX(self.mu) + m.sum_YY(self.mu)
+            self._N_cov = 2.0 * m.n
+        else:
+            if not self._given_mean:
+                self.mu = self._moments_mean.mean_X
+            self.cov = 2.0 * self._moments_0.sum_XX(self.mu)
+            self._N_cov = 2.0 * self._moments_0.n
+        self._N_mean = self._N_cov if self._force_eigenvalues_le_one else self._moments_mean.n
+        self.cov_tau = 2.0 * m.sum_XY(self.mu, self.mu)
+        # _N_cov_tau is muliplied by 2, because we symmetrize cov_tau,
+        # so we are actually using twice the number of samples for every element.
+        self._N_cov_tau = 2.0 * m.n
 
         # symmetrize covariance matrices
         self.cov = self.cov + self.cov.T
@@ -363,15 +449,40 @@ class TICA(Transformer):
         self.cov /= self._N_cov - 2
         self.cov_tau /= self._N_cov_tau - 2
 
-        # diagonalize with low rank approximation
+        # constant and duplicate input dimensions do not contribute to the solution, so the eigenvalue
+        # problem is solved for the remaining ones only
+        self._input_dimensions = nonredundant_dimensions(self.cov, self.mu)
+        reduced = len(self._input_dimensions) < self.cov.shape[0]
+        if reduced:
+            self._logger.debug("removed %i constant or duplicate input dimensions."
+                               % (self.cov.shape[0] - len(self._input_dimensions)))
+            cov, cov_tau = submatrix(self.cov, self._input_dimensions), submatrix(self.cov_tau, self._input_dimensions)
+        else:
+            self._input_dimensions = None
+            cov, cov_tau = self.cov, self.cov_tau
+
+        # diagonalize with low rank approximation, only the requested components if dim is fixed
         self._logger.debug("diagonalize Cov and Cov_tau.")
-        self._eigenvalues, self._eigenvectors = \
-            eig_corr(self.cov, self.cov_tau, self._epsilon)
+        self._eigenvalues, self._eigenvectors, norm = \
+            eig_corr(cov, cov_tau, self._epsilon, k=self._dim if self._dim > 0 else None, return_norm=True)
         self._logger.debug("finished diagonalisation.")
 
-        # compute cumulative variance
+        if reduced:
+            # removed dimensions have zero weight
+            R = np.zeros((self.cov.shape[0], self._eigenvectors.shape[1]))
+            R[self._input_dimensions] = self._eigenvectors
+            self._eigenvectors = R
+
+        if self._method == 'randomized':
+            # express mean and eigenvectors in terms of the input coordinates
+            V = self._pca.eigenvectors[:, 0:self._pca.dimension()]
+            self.mu = self._pca.mean + np.dot(V, self.mu)
+            self._eigenvectors = np.dot(V, self._eigenvectors)
+            self._input_dimensions = None
+
+        # compute cumulative variance relative to all eigenvalues, including those not computed
         self._cumvar = np.cumsum(self._eigenvalues ** 2)
-        self._cumvar /= self._cumvar[-1]
+        self._cumvar /= norm
 
         if len(self._skipped_trajs) >= 1:
             self._skipped_trajs = np.asarray(self._skipped_trajs)
@@ -391,12 +502,44 @@ class TICA(Transformer):
         Y : ndarray(n,)
             the projected data
         """
-        # TODO: consider writing an extension to avoid temporary Xmeanfree
-        X_meanfree = X - self.mu
-        Y = np.dot(X_meanfree, self._eigenvectors[:, 0:self.dimension()])
+        return self._transform_array_dimensions(X, slice(0, None))
+
+    def _transform_array_dimensions(self, X, dimensions, out=None):
+        r"""Projects the data onto the requested dominant independent components only.
+
+        Parameters
+        ----------
+        X : ndarray(n, m)
+            the input data
+        dimensions : list-like of indexes or slice
+            indices of the independent components to project onto.
+        out : ndarray(n, d), optional
+            array to write the projected data into.
+
+        Returns
+        -------
+        Y : ndarray(n, d)
+            the projected data
+        """
+        return self._projection(dimensions)(X, out=out)
+
+    def _projection(self, dimensions):
+        r""" The projection onto the given independent components as a single affine map, with the
+        mean and the kinetic map scaling folded into the projection matrix and bias. """
+        full = isinstance(dimensions, slice) and dimensions == slice(0, None)
+        if full and self._full_projection is not None:
+            return self._full_projection
+        W = self._eigenvectors[:, 0:self.dimension()][:, dimensions]
         if self._kinetic_map:  # scale by eigenvalues
-            Y *= self._eigenvalues[0:self.dimension()]
-        return Y
+            W = W * self._eigenvalues[0:self.dimension()][dimensions]
+        b = -np.dot(self.mu, W)
+        if self._input_dimensions is not None:
+            # removed input dimensions have zero weight, so they are not read at all
+            W = W[self._input_dimensions]
+        projection = AffineProjection(W, b, precision=self._precision, columns=self._input_dimensions)
+        if full:
+            self._full_projection = projection
+        return projection
 
     @property
     def feature_TIC_correlation(self):
@@ -418,6 +561,8 @@ class TICA(Transformer):
             correlation matrix between input features and TICs. There is a row for each feature and a column
             for each TIC.
         """
+        if self._method == 'randomized':
+            raise NotImplementedError('feature_TIC_correlation is not available with the randomized method.')
         feature_sigma = np.sqrt(np.diag(self.cov))
         return np.dot(self.cov, self._eigenvectors[:, : self.dimension()]) / feature_sigma[:, np.newaxis]
 
@@ -450,6 +595,10 @@ class TICA(Transformer):
     def eigenvalues(self):
         r"""Eigenvalues of the TICA problem (usually denoted :math:`\lambda`
 
+        If a small fixed number of dimensions of a high dimensional problem has
+        been requested, only the dim dominant eigenvalues are computed and
+        returned, otherwise all of them.
+
         Returns
         -------
         eigenvalues: 1D np.array
@@ -464,6 +613,10 @@ class TICA(Transformer):
     def eigenvectors(self):
         r"""Eigenvectors of the TICA problem, columnwise
 
+        If a small fixed number of dimensions of a high dimensional problem has
+        been requested, only the dim dominant eigenvectors are computed and
+        returned, otherwise all of them.
+
         Returns
         -------
         eigenvectors: (N,M) ndarray
@@ -478,6 +631,12 @@ class TICA(Transformer):
     def cumvar(self):
         r"""Cumulative sum of the the TICA eigenvalues
 
+        The sum of the squared eigenvalues is normalized by the sum over all
+        eigenvalues. If only the dim dominant eigenvalues have been computed
+        (see :attr:`eigenvalues`), the cumulative variance has dim entries
+        and the last one is the fraction of the kinetic variance they capture,
+        which is smaller than one.
+
         Returns
         -------
         cumvar: 1D np.array
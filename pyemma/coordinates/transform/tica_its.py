@@ -0,0 +1,234 @@
+
+# This file is part of PyEMMA.
+#
+# Copyright (c) 2015, 2014 Computational Molecular Biology Group, Freie Universitaet Berlin (GER)
+#
+# PyEMMA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+TICA at a series of lag times, estimated in a single pass over the data.
+'''
+
+from __future__ import absolute_import
+
+import numpy as np
+
+from pyemma._base.progress import ProgressReporter
+from pyemma.coordinates.transform.tica import TICA
+from pyemma.coordinates.transform.transformer import _to_data_producer
+from pyemma.coordinates.util.moments import RunningMoments
+from pyemma.util import types as _types
+from pyemma.util.log import getLogger
+
+__all__ = ['TICAImpliedTimescales']
+
+
+class TICAImpliedTimescales(ProgressReporter):
+    r"""TICA models and implied timescales for a series of lag times."""
+
+    def __init__(self, lags, dim=-1, var_cutoff=0.95, kinetic_map=True, epsilon=1e-6,
+                 force_eigenvalues_le_one=False, nits=None, precision='double'):
+        r"""TICA models and implied timescales for a series of lag times.
+
+        The covariance matrices for all lag times are accumulated in a single
+        pass over the data. For every trajectory the last frames are kept in a
+        sliding window, so that the time-lagged pairs of all lag times can be
+        formed from the current chunk and the window. For every lag time a
+        :class:`TICA <pyemma.coordinates.transform.TICA>` object is constructed
+        which is identical to the one obtained by estimating TICA at this lag
+        time alone.
+
+        Parameters
+        ----------
+        lags : array-like of int
+            the lag times, in multiples of the input time step.
+        dim, var_cutoff, kinetic_map, epsilon, force_eigenvalues_le_one, precision :
+            passed to the :class:`TICA <pyemma.coordinates.transform.TICA>`
+            objects, see there.
+        nits : int, optional
+            maximum number of implied timescales to be stored. None means the
+            number of timescales available at all lag times.
+
+        """
+        lags = _types.ensure_int_vector(lags)
+        if np.any(lags <= 0):
+            raise ValueError('lag times need to be positive, got %s' % lags)
+        self._lags = np.unique(lags)
+        self.dim = dim
+        self.var_cutoff = var_cutoff
+        self.kinetic_map = kinetic_map
+        self.epsilon = epsilon
+        self.force_eigenvalues_le_one = force_eigenvalues_le_one
+        self.nits = nits
+        self.precision = precision
+        self._logger = getLogger('%s[%s]' % (self.__class__.__name__, hex(id(self))))
+
+        self._models = None
+        self._its = None
+        self._nits = None
+        self._successful_lag_indexes = []
+
+    def estimate(self, data, stride=1):
+        r""" Estimates TICA at all lag times.
+
+        Parameters
+        ----------
+        data : ndarray(T, n) or list of ndarray(T_i, n) or Transformer
+            the input data, either in memory or a data source (eg. a reader).
+        stride : int, optional, default = 1
+            only take every n'th frame into account. All lag times need to be
+            multiples of the stride.
+
+        Returns
+        -------
+        self : the estimated object
+        """
+        lags = self._lags
+        if np.any(lags % stride != 0):
+            raise ValueError('all lag times need to be multiples of the stride %i' % stride)
+        producer = _to_data_producer(data)
+        steps = lags // stride
+        window = int(steps.max())
+        force = self.force_eigenvalues_le_one
+
+        # all frames (mean with traditional counting)
+        moments_mean = RunningMoments(compute_XX=False, precision=self.precision)
+        # frames of trajectories longer than the lag time (C0 with traditional counting)
+        moments_0 = [RunningMoments(precision=self.precision) for _ in lags]
+        # time-lagged pairs
+        moments_tau = [RunningMoments(compute_XX=force, compute_XY=True, compute_YY=force, precision=self.precision)
+                       for _ in lags]
+
+        def finish_trajectory(moments_traj, length):
+            if not force:
+                for i, lag in enumerate(lags):
+                    if length - lag > 0:
+                        moments_0[i].combine(moments_traj)
+
+        self._progress_register(producer._n_chunks(stride), description='calculate covariances', stage=0)
+        current, length, moments_traj, buf = None, 0, None, None
+        for itraj, X in producer.iterator(stride=stride):
+            if itraj != current:
+                if current is not None:
+                    finish_trajectory(moments_traj, length)
+                current = itraj
+                length = producer.trajectory_length(itraj, stride=1)
+                moments_traj = RunningMoments(precision=self.precision)
+                buf = X[0:0]
+            moments_mean.add(X)
+            if not force:
+                moments_traj.add(X)
+            # the window holds the last frames of the previous chunks of this trajectory
+            Z = np.concatenate((buf, X))
+            n = len(buf)
+            for i, k in enumerate(steps):
+                if length - lags[i] <= 0:
+                    continue
+                start = max(0, k - n)
+                if start < len(X):
+                    moments_tau[i].add(Z[n + start - k:n + len(X) - k], X[start:])
+            buf = Z[max(len(Z) - window, 0):]
+            self._progress_update(1, stage=0)
+        if current is not None:
+            finish_trajectory(moments_traj, length)
+        self._progress_force_finish(stage=0)
+
+        # construct TICA objects
+        self._models = []
+        self._successful_lag_indexes = []
+        for i, lag in enumerate(lags):
+            model = TICA(lag, dim=self.dim, var_cutoff=self.var_cutoff, kinetic_map=self.kinetic_map,
+                         epsilon=self.epsilon, force_eigenvalues_le_one=force, precision=self.precision)
+            try:
+                model.combine({'mean': moments_mean, 'C0': moments_0[i], 'Ctau': moments_tau[i]})
+            except RuntimeError as e:
+                self._logger.warning('Could not estimate TICA at lag time %i: %s' % (lag, e))
+                model = None
+            else:
+                self._successful_lag_indexes.append(i)
+            self._models.append(model)
+
+        # sort timescales into matrix
+        timescales = [m.timescales for m in self._models if m is not None]
+        maxnts = min(len(ts) for ts in timescales) if timescales else 0
+        self._nits = maxnts if self.nits is None else min(self.nits, maxnts)
+        self._its = np.empty((len(lags), self._nits))
+        self._its[:] = np.nan
+        for i in self._successful_lag_indexes:
+            self._its[i, :] = self._models[i].timescales[:self._nits]
+
+        return self
+
+    @property
+    def lagtimes(self):
+        r"""Return the list of lag times for which TICA could be estimated.
+
+        """
+        return self.lags
+
+    @property
+    def lags(self):
+        r"""Return the list of lag times for which TICA could be estimated.
+
+        """
+        return self._lags[self._successful_lag_indexes]
+
+    @property
+    def models(self):
+        r"""Return the :class:`TICA <pyemma.coordinates.transform.TICA>` objects for all lag times in :attr:`lags`.
+
+        """
+        return [self._models[i] for i in self._successful_lag_indexes]
+
+    @property
+    def number_of_timescales(self):
+        r"""Return the number of timescales.
+
+        """
+        return self._nits
+
+    @property
+    def timescales(self):
+        r"""Returns the implied timescale estimates
+
+        Returns
+        -------
+        timescales : ndarray((l x k), dtype=float)
+            timescales for all processes and lag times.
+            l is the number of lag times and k is the number of computed timescales.
+
+        """
+        return self.get_timescales()
+
+    def get_timescales(self, process=None):
+        r"""Returns the implied timescale estimates
+
+        Parameters
+        ----------
+        process : int or None, default = None
+            index in [0:n-1] referring to the process whose timescale will be returned.
+            By default, process = None and all computed process timescales will be returned.
+
+        Returns
+        --------
+        if process is None, will return a (l x k) array, where l is the number of lag times
+        and k is the number of computed timescales.
+        if process is an integer, will return a (l) array with the selected process time scale
+        for every lag time
+
+        """
+        if process is None:
+            return self._its[self._successful_lag_indexes, :]
+        else:
+            return self._its[self._successful_lag_indexes, process]
@@ -30,7 +30,7 @@ from abc import ABCMeta, abstractmethod
 from pyemma.util.exceptions import NotConvergedWarning
 from pyemma._base.logging import create_logger, instance_name
 
-from six.moves import range
+from six.moves import range, zip
 import six
 
 __all__ = ['Transformer']
@@ -56,10 +56,36 @@ class SkipPassException(Exception):
 
 
 class TransformerIteratorContext(object):
+    r""" Configuration and state of a single pass over the data.
 
-    def __init__(self, stride=1, lag=0):
+    Each iterator owns its own context, so several iterators (with different
+    strides or lag times) can traverse the same pipeline concurrently. The stage
+    which provides the data (a reader or a transformer holding its output in
+    memory) keeps its position in :attr:`itraj` and :attr:`t` and may attach
+    further per-pass state (eg. open file handles) to this object.
+
+    With an integer stride, the pass can be restricted to a single trajectory,
+    which is read sequentially from its first frame to its end.
+    """
+
+    def __init__(self, stride=1, lag=0, trajectory=None):
         self._lag = lag
         self.__init_stride(stride)
+        if trajectory is not None and not self.uniform_stride:
+            raise ValueError('a single trajectory can only be iterated with an integer stride')
+        self._trajectory = trajectory
+        # position of the data source
+        self.itraj = self.first_trajectory
+        self.t = 0
+
+    @property
+    def first_trajectory(self):
+        r""" index of the trajectory the pass starts with """
+        return 0 if self._trajectory is None else self._trajectory
+
+    def trajectory_stop(self, n_trajectories):
+        r""" index after the last trajectory of the pass over n_trajectories trajectories """
+        return n_trajectories if self._trajectory is None else min(self._trajectory + 1, n_trajectories)
 
     def __init_stride(self, stride):
         self._stride = stride
@@ -81,6 +107,18 @@ class TransformerIteratorContext(object):
         assert not self.uniform_stride, "requested random access indices, but is in uniform stride mode"
         return self._stride[self._stride[:, 0] == traj][:, 1] if traj in self.traj_keys else np.array([])
 
+    def ra_lagged_indices_for_traj(self, traj, traj_len):
+        """
+        Gives the indices of the time-lagged frames for a trajectory file index in random access mode, ie. the
+        random access indices shifted by the lag time. Frames beyond the end of the trajectory are dropped, so that
+        (as the indices are sorted) the lagged indices can be shorter than the random access indices at the end.
+        :param traj: a trajectory file index
+        :param traj_len: the number of frames of the trajectory
+        :return: a np.array of the indices of the time-lagged frames
+        """
+        indices = self.ra_indices_for_traj(traj) + self.lag
+        return indices[indices < traj_len]
+
     def ra_trajectory_length(self, traj):
         assert not self.uniform_stride, "requested random access trajectory length, but is in uniform stride mode"
         return int(self._trajectory_lengths[np.where(self.traj_keys == traj)]) if traj in self.traj_keys else 0
@@ -128,34 +166,40 @@ class TransformerIteratorContext(object):
 
 class TransformerIterator(object):
 
-    def __init__(self, transformer, stride=1, lag=0):
+    def __init__(self, transformer, stride=1, lag=0, trajectory=None):
         # reset transformer iteration
         self._transformer = transformer
 
-        self._ctx = TransformerIteratorContext(stride=stride, lag=lag)
+        self._ctx = TransformerIteratorContext(stride=stride, lag=lag, trajectory=trajectory)
         self._transformer._reset(self._ctx)
 
         # for random access stride mode: skip the first empty trajectories
         if not self._ctx.uniform_stride:
-            self._transformer._itraj = min(self._ctx.traj_keys)
+            self._ctx.itraj = min(self._ctx.traj_keys)
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        if self._transformer._itraj >= self._transformer.number_of_trajectories():
+        if self._ctx.itraj >= self._ctx.trajectory_stop(self._transformer.number_of_trajectories()):
+            self.close()
             raise StopIteration
 
-        last_itraj = self._transformer._itraj
+        last_itraj = self._ctx.itraj
         if self._ctx.lag == 0:
-            X = self._transformer._next_chunk(self._ctx)
+            X = self._transformer._next_chunk_profiled(self._ctx)
             return (last_itraj, X)
         else:
-            X, Y = self._transformer._next_chunk(self._ctx)
+            X, Y = self._transformer._next_chunk_profiled(self._ctx)
             return (last_itraj, X, Y)
+
     def next(self):
         return self.__next__()
 
+    def close(self):
+        r""" release resources (eg. open files) held by this iteration """
+        self._transformer._close(self._ctx)
+
 
 class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
 
@@ -169,6 +213,11 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
     """
     # counting transformer instances, incremented by name property.
     _ids = count(0)
+    # instrumentation (see pyemma.coordinates.util.profiling), disabled by default
+    _profiler = None
+    # buffer for upstream output replayed in multi-pass parametrizations
+    # (see pyemma.coordinates.util.pass_cache), disabled by default
+    param_cache = None
 
     def __init__(self, chunksize=100):
         self.chunksize = chunksize
@@ -232,9 +281,9 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
             chunks = 1
         return int(chunks)
 
-    def _close(self):
+    def _close(self, context=None):
         if self.data_producer is not self:
-            self.data_producer._close()
+            self.data_producer._close(context)
 
     @property
     def in_memory(self):
@@ -352,6 +401,41 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
             self.parametrize()
         return self
 
+    def partial_fit(self, X, stride=1):
+        r""" Updates the parametrization with additional data.
+
+        In contrast to :func:`fit`, the statistics accumulated from previously
+        seen data are kept and only the given data is processed. This allows to
+        incorporate new trajectories without reading all data again.
+
+        Parameters
+        ----------
+        X : ndarray(T, n) or list of ndarray(T_i, n) or Transformer
+            the additional data, either in memory or a data source (eg. a reader).
+        stride : int, optional, default = 1
+            only take every n'th frame of X into account.
+
+        Returns
+        -------
+        self : the updated transformer
+        """
+        data_producer = _to_data_producer(X)
+        self._partial_fit(data_producer, stride=stride)
+        # the parametrization now reflects all data seen so far. Avoid the setter
+        # of data_producer, which would invalidate it.
+        self._data_producer = data_producer
+        self._param_with_stride = stride
+        self._parametrized = True
+        if self.in_memory:
+            # discard the output of the previous parametrization
+            self._Y = []
+            self._map_to_memory()
+        return self
+
+    def _partial_fit(self, data_producer, stride=1):
+        r""" update the parametrization with the data of the given data producer. """
+        raise NotImplementedError("%s does not support partial_fit" % self.__class__.__name__)
+
     def fit_transform(self, X, **kwargs):
         r"""For compatibility with sklearn"""
         self.fit(X, **kwargs)
@@ -368,8 +452,9 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
                                ' yet set. Ensure "data_producer" attribute is set!')
 
         # if stride is not equal to one and does not match to a previous call
-        # retrigger parametrization (but not for readers).
-        if stride != self._param_with_stride and self._data_producer is not self:
+        # retrigger parametrization (but not for readers). The stride may be an array of
+        # random access indices.
+        if self._data_producer is not self and not np.array_equal(stride, self._param_with_stride):
             self._parametrized = False
 
         self._param_with_stride = stride
@@ -390,6 +475,12 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
         # create iterator context
         ctx = TransformerIteratorContext(stride, lag)
 
+        # buffer upstream output for subsequent passes?
+        cache = self.param_cache
+        if cache is not None and (self.data_producer is self
+                                  or not cache.prepare(self.data_producer, stride)):
+            cache = None
+
         # feed data, until finished
         add_data_finished = False
         ipass = 0
@@ -402,7 +493,15 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
         try:
             while not add_data_finished:
                 first_chunk = True
-                self.data_producer._reset(ctx)
+                if cache is not None and ipass > 0:
+                    producer, pctx = cache.source(self.data_producer, ctx)
+                else:
+                    producer, pctx = self.data_producer, ctx
+                record = cache is not None and ipass == 0 and cache.can_record(ctx)
+                passed_frames = 0
+                producer._reset(pctx)
+                if self._profiler is not None:
+                    self._profiler.new_pass(self)
                 # iterate over trajectories
                 last_chunk = False
                 itraj = 0
@@ -418,11 +517,14 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
                     while not last_chunk_in_traj:
                         # iterate over times within trajectory
                         if ctx.lag == 0:
-                            X = self.data_producer._next_chunk(ctx)
+                            X = producer._next_chunk_profiled(pctx)
                             Y = None
                         else:
-                            X, Y = self.data_producer._next_chunk(ctx)
+                            X, Y = producer._next_chunk_profiled(pctx)
                         L = np.shape(X)[0]
+                        if record:
+                            cache.record(itraj, t, X)
+                            passed_frames += L
 
                         # last chunk in traj?
                         last_chunk_in_traj = (t + L >= self.trajectory_length(itraj, stride=ctx.stride))
@@ -432,9 +534,14 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
                         # pass chunks to algorithm and respect its return values
                         # and possible SkipPassException
                         try:
-                            return_value = self._param_add_data(
-                                X, itraj, t, first_chunk, last_chunk_in_traj,
-                                last_chunk, ipass, Y=Y, stride=stride)
+                            if self._profiler is None:
+                                return_value = self._param_add_data(
+                                    X, itraj, t, first_chunk, last_chunk_in_traj,
+                                    last_chunk, ipass, Y=Y, stride=stride)
+                            else:
+                                return_value = self._profiler.param_add_data(
+                                    self, X, itraj, t, first_chunk, last_chunk_in_traj,
+                                    last_chunk, ipass, Y=Y, stride=stride)
                         except SkipPassException as spe:
                             self._logger.debug("got skip pass exception."
                                                " Skipping pass %i" % ipass)
@@ -465,10 +572,15 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
                     if not ctx.uniform_stride:
                         while itraj not in ctx.traj_keys and itraj < self.number_of_trajectories():
                             itraj += 1
+                if record:
+                    cache.finish_recording(passed_frames)
                 ipass += 1
         except NotConvergedWarning:
             self._logger.info("presumely finished parameterization.")
-            self._close()
+            self._close(ctx)
+        finally:
+            if cache is not None:
+                cache.release()
 
         # finish parametrization
         if not self._custom_param_progress_handling:
@@ -546,6 +658,35 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
         """
         pass
 
+    def _transform_array_dimensions(self, X, dimensions, out=None):
+        r"""
+        Maps the input data and only returns the requested output dimensions.
+
+        Transformers which are able to compute a subset of their output more efficiently
+        than the full output, or to write it into a given array directly, should override
+        this method.
+
+        Parameters
+        ----------
+        X : ndarray(T, n)
+            The input data, where T is the number of time steps and n is the number of dimensions.
+        dimensions : list-like of indexes or slice
+            indices of the output dimensions to compute.
+        out : ndarray(T, d), optional, default = None
+            array to write the output into.
+
+        Returns
+        -------
+        Y : ndarray(T, d)
+            The projected data restricted to the given output dimensions (out, if given).
+
+        """
+        Y = self._transform_array(X)[:, dimensions]
+        if out is None:
+            return Y
+        out[...] = Y
+        return out
+
     def _param_init(self):
         r"""
         Initializes the parametrization.
@@ -578,8 +719,10 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
         if not self._parametrized:
             self._logger.warning("reset(): not yet parametrized! Performing now.")
             self.parametrize()
-        self._itraj = 0
-        self._t = 0
+        if context is None:
+            return
+        context.itraj = context.first_trajectory
+        context.t = 0
         if not self.in_memory and self.data_producer is not self:
             # operate in pipeline
             self.data_producer._reset(context)
@@ -600,59 +743,63 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
             mapped (transformed) data
         """
         if self.in_memory and not self._mapping_to_mem_active:
-            if self._itraj >= self.number_of_trajectories():
+            if ctx.itraj >= self.number_of_trajectories():
                 return None
             # operate in memory, implement iterator here
-            traj_len = self.trajectory_length(self._itraj, stride=ctx.stride)
-            traj = self._Y[self._itraj]
+            traj_len = self.trajectory_length(ctx.itraj, stride=ctx.stride)
+            traj = self._Y[ctx.itraj]
             if ctx.lag == 0:
                 if not ctx.uniform_stride:
-                    Y = traj[ctx.ra_indices_for_traj(self._itraj)[self._t:min(self._t + self.chunksize, traj_len)]]
-                    self._t += self.chunksize
-                    while (self._itraj not in ctx.traj_keys
-                           or ctx.ra_indices_for_traj(self._itraj)[self._t:min(self._t + self.chunksize, traj_len)].size == 0) \
-                            and self._itraj < self.number_of_trajectories():
-                        self._itraj += 1
-                        self._t = 0
+                    Y = traj[ctx.ra_indices_for_traj(ctx.itraj)[ctx.t:min(ctx.t + self.chunksize, traj_len)]]
+                    ctx.t += self.chunksize
+                    while (ctx.itraj not in ctx.traj_keys
+                           or ctx.ra_indices_for_traj(ctx.itraj)[ctx.t:min(ctx.t + self.chunksize, traj_len)].size == 0) \
+                            and ctx.itraj < self.number_of_trajectories():
+                        ctx.itraj += 1
+                        ctx.t = 0
                 else:
-                    Y = traj[self._t:min(self._t + self.chunksize * ctx.stride, traj_len):ctx.stride]
+                    Y = traj[ctx.t:min(ctx.t + self.chunksize * ctx.stride, traj_len):ctx.stride]
                     # increment counters
-                    self._t += self.chunksize * ctx.stride
-                    if self._t >= traj_len:
-                        self._itraj += 1
-                        self._t = 0
+                    ctx.t += self.chunksize * ctx.stride
+                    if ctx.t >= traj_len:
+                        ctx.itraj += 1
+                        ctx.t = 0
                 return Y
+            elif not ctx.uniform_stride:
+                chunk = slice(ctx.t, min(ctx.t + self.chunksize, ctx.ra_trajectory_length(ctx.itraj)))
+                Y0 = traj[ctx.ra_indices_for_traj(ctx.itraj)[chunk]]
+                Ytau = traj[ctx.ra_lagged_indices_for_traj(ctx.itraj, len(traj))[chunk]]
+                ctx.t += self.chunksize
+                while (ctx.itraj not in ctx.traj_keys or ctx.t >= ctx.ra_trajectory_length(ctx.itraj)) \
+                        and ctx.itraj < self.number_of_trajectories():
+                    ctx.itraj += 1
+                    ctx.t = 0
+                return Y0, Ytau
             else:
-                Y0 = traj[self._t:min(self._t + self.chunksize * ctx.stride, traj_len):ctx.stride]
-                Ytau = traj[self._t + ctx.lag * ctx.stride:min(self._t + (self.chunksize + ctx.lag) * ctx.stride, traj_len):ctx.stride]
+                Y0 = traj[ctx.t:min(ctx.t + self.chunksize * ctx.stride, traj_len):ctx.stride]
+                Ytau = traj[ctx.t + ctx.lag * ctx.stride:min(ctx.t + (self.chunksize + ctx.lag) * ctx.stride, traj_len):ctx.stride]
                 # increment counters
-                self._t += self.chunksize * ctx.stride
-                if self._t >= traj_len:
-                    self._itraj += 1
-                    self._t = 0
+                ctx.t += self.chunksize * ctx.stride
+                if ctx.t >= traj_len:
+                    ctx.itraj += 1
+                    ctx.t = 0
                 return Y0, Ytau
         else:
-            if not ctx.uniform_stride:
-                while self._itraj not in ctx.traj_keys and self._itraj < self.number_of_trajectories():
-                    self._itraj += 1
-                    self._t = 0
-            # operate in pipeline
+            # operate in pipeline, the data source maintains the position in ctx
             if ctx.lag == 0:
-                X = self.data_producer._next_chunk(ctx)
-                self._t += X.shape[0]
-                if self._t >= self.trajectory_length(self._itraj, stride=ctx.stride):
-                    self._itraj += 1
-                    self._t = 0
+                X = self.data_producer._next_chunk_profiled(ctx)
                 return self.transform(X)
             # TODO: this seems to be a dead branch of code
             else:
-                (X0, Xtau) = self.data_producer._next_chunk(ctx)
-                self._t += X0.shape[0]
-                if self._t >= self.trajectory_length(self._itraj, stride=ctx.stride):
-                    self._itraj += 1
-                    self._t = 0
+                (X0, Xtau) = self.data_producer._next_chunk_profiled(ctx)
                 return self.transform(X0), self.transform(Xtau)
 
+    def _next_chunk_profiled(self, ctx):
+        r""" same as _next_chunk, but timed by the attached profiler (if any) """
+        if self._profiler is None:
+            return self._next_chunk(ctx)
+        return self._profiler.produce(self, self._next_chunk, ctx)
+
     def __iter__(self):
         r"""
         Returns an iterator that allows to access the transformed data.
@@ -666,23 +813,28 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
             and X is the transformed data, n = chunksize or n < chunksize at end
             of input.
         """
-        self._reset()
         return TransformerIterator(self, stride=1, lag=0)
 
-    def iterator(self, stride=1, lag=0):
+    def iterator(self, stride=1, lag=0, trajectory=None):
         r"""
         Returns an iterator that allows to access the transformed data.
 
         Parameters
         ----------
-        stride : int
-            Only transform every N'th frame, default = 1
+        stride : int or ndarray(n, 2)
+            Only transform every N'th frame, default = 1. An array of (trajectory index, frame index)
+            pairs (sorted) selects the given frames only (random access).
         lag : int
             Configure the iterator such that it will return time-lagged data
             with a lag time of `lag`. If `lag` is used together with `stride`
             the operation will work as if the striding operation is applied
             before the time-lagged trajectory is shifted by `lag` steps.
-            Therefore the effective lag time will be stride*lag.
+            Therefore the effective lag time will be stride*lag. In random access
+            mode, the pairs (X_t, X_{t+lag}) of the selected frames t are returned,
+            where pairs reaching beyond the end of a trajectory are omitted from Y.
+        trajectory : int, optional, default = None
+            only iterate over the trajectory with this index (requires an integer
+            stride). By default, all trajectories are iterated.
 
         Returns
         -------
@@ -700,9 +852,9 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
             where itraj and X are the same as above and Y contain the time-lagged
             data.
         """
-        return TransformerIterator(self, stride=stride, lag=lag)
+        return TransformerIterator(self, stride=stride, lag=lag, trajectory=trajectory)
 
-    def get_output(self, dimensions=slice(0, None), stride=1):
+    def get_output(self, dimensions=slice(0, None), stride=1, out=None):
         r""" Maps all input data of this transformer and returns it as an array or list of arrays.
 
         Parameters
@@ -711,6 +863,11 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
             indices of dimensions you like to keep, default = all
         stride : int
             only take every n'th frame, default = 1
+        out : list of ndarray (T_i, d), optional, default = None
+            preallocated output arrays, one per trajectory. The output is written
+            into these arrays instead of newly allocated ones. Memory mapped arrays
+            (e.g. created by :func:`numpy.lib.format.open_memmap`) can be used to
+            map data which does not fit into main memory.
 
         Returns
         -------
@@ -722,7 +879,8 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
         Notes
         -----
         * This function may be RAM intensive if stride is too large or
-          too many dimensions are selected.
+          too many dimensions are selected. Consider passing memory mapped
+          arrays as `out` argument in this case.
         * if in_memory attribute is True, then results of this methods are cached.
 
         Example
@@ -742,20 +900,7 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
 
         """
 
-        if isinstance(dimensions, int):
-            ndim = 1
-            dimensions = slice(dimensions, dimensions + 1)
-        elif isinstance(dimensions, list):
-            ndim = len(np.zeros(self.dimension())[dimensions])
-        elif isinstance(dimensions, np.ndarray):
-            assert dimensions.ndim == 1, 'dimension indices can\'t have more than one dimension'
-            ndim = len(np.zeros(self.dimension())[dimensions])
-        elif isinstance(dimensions, slice):
-            ndim = len(np.zeros(self.dimension())[dimensions])
-        else:
-            raise ValueError('unsupported type (%s) of \"dimensions\"' % type(dimensions))
-
-        assert ndim > 0, "ndim was zero in %s" % self.__class__.__name__
+        dimensions, ndim = self._output_dimensions(dimensions)
 
         if not self._parametrized:
             self._logger.warning("has to be parametrized before getting output!"
@@ -763,25 +908,44 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
             self.parametrize(stride)
 
         # if we are in memory and have results already computed, return them
-        if self._in_memory:
+        if self._in_memory and out is None:
             # ensure stride and dimensions are same of cached result
             if self._Y and all(self._Y[i].shape == (self.trajectory_length(i, stride=stride), ndim)
                                for i in range(self.number_of_trajectories())):
                 return self._Y
 
-        # allocate memory
-        try:
-            trajs = [np.empty((l, ndim), dtype=self.output_type())
-                     for l in self.trajectory_lengths(stride=stride)]
-        except MemoryError:
-            self._logger.exception("Could not allocate enough memory to map all data."
-                                   " Consider using a larger stride.")
-            return
+        if out is not None:
+            trajs = self._check_output_arrays(out, ndim, stride)
+        else:
+            # allocate memory
+            try:
+                trajs = [np.empty((l, ndim), dtype=self.output_type())
+                         for l in self.trajectory_lengths(stride=stride)]
+            except MemoryError:
+                self._logger.exception("Could not allocate enough memory to map all data."
+                                       " Consider using a larger stride or passing memory"
+                                       " mapped output arrays.")
+                return
 
         if __debug__:
             self._logger.debug("get_output(): dimensions=%s" % str(dimensions))
             self._logger.debug("get_output(): created output trajs with shapes: %s"
                                % [x.shape for x in trajs])
+
+        if self._in_memory or self.data_producer is self:
+            # data is already mapped (or this is a data source), so select the dimensions afterwards.
+            it = self.iterator(stride=stride)
+            select = lambda X, out: X[:, dimensions]
+        else:
+            # only compute the requested dimensions while mapping the input chunks,
+            # writing them into the output arrays directly.
+            it = self.data_producer.iterator(stride=stride)
+            if self._profiler is None:
+                select = lambda X, out: self._transform_array_dimensions(X, dimensions, out=out)
+            else:
+                select = lambda X, out: self._profiler.produce(self, self._transform_array_dimensions,
+                                                               X, dimensions, out=out)
+
         # fetch data
         last_itraj = -1
         t = 0  # first time point
@@ -789,19 +953,90 @@ class Transformer(six.with_metaclass(ABCMeta, ProgressReporter)):
         self._progress_register(self._n_chunks(stride), description=
                        'getting output of ' + self.__class__.__name__, stage=1)
 
-        for itraj, chunk in self.iterator(stride=stride):
+        for itraj, chunk in it:
             if itraj != last_itraj:
                 last_itraj = itraj
                 t = 0  # reset time to 0 for new trajectory
             L = chunk.shape[0]
             if L > 0:
-                trajs[itraj][t:t + L, :] = chunk[:, dimensions]
+                target = trajs[itraj][t:t + L]
+                Y = select(chunk, target)
+                if Y is not target:
+                    target[...] = Y
             t += L
 
             # update progress
             self._progress_update(1, stage=1)
 
-        if self._in_memory:
+        if self._in_memory and out is None:
             self._Y = trajs
 
         return trajs
+
+    def _output_dimensions(self, dimensions):
+        r""" normalizes the requested output dimensions and returns them with their number. """
+        if isinstance(dimensions, int):
+            ndim = 1
+            dimensions = slice(dimensions, dimensions + 1)
+        elif isinstance(dimensions, list):
+            ndim = len(np.zeros(self.dimension())[dimensions])
+        elif isinstance(dimensions, np.ndarray):
+            assert dimensions.ndim == 1, 'dimension indices can\'t have more than one dimension'
+            ndim = len(np.zeros(self.dimension())[dimensions])
+        elif isinstance(dimensions, slice):
+            ndim = len(np.zeros(self.dimension())[dimensions])
+        else:
+            raise ValueError('unsupported type (%s) of \"dimensions\"' % type(dimensions))
+
+        assert ndim > 0, "ndim was zero in %s" % self.__class__.__name__
+        return dimensions, ndim
+
+    def write_output(self, output_dir, prefix='', dimensions=slice(0, None), stride=1,
+                     n_jobs=1, overwrite=False, chunksize=None):
+        r""" Maps all input data of this transformer into memory mapped .npy files on disk.
+
+        Unlike :meth:`get_output`, the output is streamed into the files chunk by
+        chunk and never has to fit into main memory. One file is written per
+        trajectory, together with an index file, so that the output can be opened
+        again later by :func:`open_output <pyemma.coordinates.util.output_store.open_output>`.
+
+        Parameters
+        ----------
+        output_dir : str
+            directory to write the files to. Is created if it does not exist.
+        prefix : str, optional, default=''
+            prefix of the file names.
+        dimensions : list-like of indexes or slice, optional, default=all
+            indices of the output dimensions to write.
+        stride : int, optional, default=1
+            only write every n'th frame.
+        n_jobs : int, optional, default=1
+            number of trajectories mapped in parallel.
+        overwrite : bool, optional, default=False
+            whether to overwrite existing files.
+        chunksize : int, optional, default=None
+            chunk size of the returned reader, by default the one of this transformer.
+
+        Returns
+        -------
+        reader : NumPyFileReader
+            memory mapped reader of the written output, eg. to be used as input
+            of a clustering.
+
+        """
+        from pyemma.coordinates.util.output_store import write_output
+        return write_output(self, output_dir, prefix=prefix, dimensions=dimensions, stride=stride,
+                            n_jobs=n_jobs, overwrite=overwrite, chunksize=chunksize)
+
+    def _check_output_arrays(self, out, ndim, stride):
+        r""" ensures the given output arrays match the shape of the requested output. """
+        if isinstance(out, np.ndarray):
+            out = [out]
+        lengths = self.trajectory_lengths(stride=stride)
+        if len(out) != len(lengths):
+            raise ValueError("got %i output arrays, but have %i trajectories" % (len(out), len(lengths)))
+        for i, (o, l) in enumerate(zip(out, lengths)):
+            if not isinstance(o, np.ndarray) or o.shape != (l, ndim):
+                raise ValueError("output array for trajectory %i has shape %s, but expected %s"
+                                 % (i, str(np.shape(o)), str((l, ndim))))
+        return out
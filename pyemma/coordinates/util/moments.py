@@ -0,0 +1,322 @@
+
+# This file is part of PyEMMA.
+#
+# Copyright (c) 2015, 2014 Computational Molecular Biology Group, Freie Universitaet Berlin (GER)
+#
+# PyEMMA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Running (time-lagged) first and second moments of data chunks.
+
+The moments are stored as sums of the data shifted by a constant vector (by
+default the mean of the first chunk), which avoids the loss of precision of
+raw second moments. Moments of different chunks or data sets can be combined
+exactly, so that estimators can be updated with additional data, and moments
+accumulated independently (eg. per trajectory, in different processes or on
+different machines) can be merged afterwards:
+
+>>> import numpy as np
+>>> from pyemma.coordinates.util.moments import RunningMoments
+>>> X = np.random.randn(1000, 3)
+>>> m1 = RunningMoments(); m1.add(X[:300])
+>>> m2 = RunningMoments(); m2.add(X[300:])
+>>> m = RunningMoments.from_dict(m1.to_dict()).combine(m2)
+>>> np.allclose(m.mean_X, X.mean(axis=0))
+True
+'''
+
+from __future__ import absolute_import
+
+import numpy as np
+from scipy.linalg import blas
+
+__all__ = ['RunningMoments']
+
+
+def _syrk(A, C, beta=1.0):
+    r""" C = A^T A + beta C in place for the upper triangle of C (C in the precision of A) """
+    syrk = blas.ssyrk if A.dtype == np.float32 else blas.dsyrk
+    # A is C-contiguous, so A^T is Fortran-contiguous and is passed without a copy.
+    # The same holds for C^T, whose lower triangle is the upper triangle of C.
+    Ct = C.T
+    res = syrk(1.0, A.T, beta=beta, c=Ct, trans=0, lower=1, overwrite_c=True)
+    if res is not Ct:
+        C[...] = res.T
+
+
+def _gemm(A, B, C, beta=1.0):
+    r""" C = A^T B + beta C in place (C in the precision of A and B) """
+    gemm = blas.sgemm if A.dtype == np.float32 else blas.dgemm
+    # C^T = B^T A + beta C^T with Fortran-contiguous views of all arrays
+    Ct = C.T
+    res = gemm(1.0, B.T, A.T, beta=beta, c=Ct, trans_a=0, trans_b=1, overwrite_c=True)
+    if res is not Ct:
+        C[...] = res.T
+
+
+def _symmetrize_upper(M):
+    return np.triu(M) + np.triu(M, 1).T
+
+
+class RunningMoments(object):
+    r""" Running sums of first and second moments of data X and time-lagged data Y.
+
+    Every chunk is centered into buffers which are reused for all chunks. The
+    second moments of a chunk are computed by BLAS (symmetric rank-k updates for
+    XX and YY, which only compute one triangle) and added to the double
+    precision sums in place. With precision='mixed', single precision data is
+    centered and multiplied in single precision, which halves the memory traffic
+    and is about twice as fast, at the cost of a relative error of the moments
+    of about the single precision round-off times the square root of the chunk
+    size.
+
+    Parameters
+    ----------
+    compute_XX : bool, optional, default=True
+        accumulate :math:`\sum_t (x_t - s)(x_t - s)^T`
+    compute_XY : bool, optional, default=False
+        accumulate :math:`\sum_t (x_t - s)(y_t - s)^T`
+    compute_YY : bool, optional, default=False
+        accumulate :math:`\sum_t (y_t - s)(y_t - s)^T`
+    shift : ndarray(n,), optional, default=None
+        the shift s. If None, the mean of the first chunk of X added is used.
+    precision : str, optional, default='double'
+        'double' computes the moments of every chunk in double precision.
+        'mixed' computes the moments of single precision chunks in single
+        precision and accumulates them in double precision.
+    """
+
+    def __init__(self, compute_XX=True, compute_XY=False, compute_YY=False, shift=None, precision='double'):
+        if precision not in ('double', 'mixed'):
+            raise ValueError("precision has to be 'double' or 'mixed', but was '%s'" % precision)
+        self.compute_XX = compute_XX
+        self.compute_XY = compute_XY
+        self.compute_YY = compute_YY
+        self.precision = precision
+        self.shift = None if shift is None else np.array(shift, dtype=np.float64)
+        # number of samples
+        self.n = 0
+        # shifted sums. Only the upper triangles of _Mxx and _Myy are accumulated.
+        self.sx = None
+        self.sy = None
+        self._Mxx = None
+        self.Mxy = None
+        self._Myy = None
+        # buffers for centered data
+        self._buffers = {}
+
+    @property
+    def Mxx(self):
+        return None if self._Mxx is None else _symmetrize_upper(self._Mxx)
+
+    @Mxx.setter
+    def Mxx(self, value):
+        self._Mxx = value
+
+    @property
+    def Myy(self):
+        return None if self._Myy is None else _symmetrize_upper(self._Myy)
+
+    @Myy.setter
+    def Myy(self, value):
+        self._Myy = value
+
+    def _init(self, dim):
+        if self.shift is None:
+            self.shift = np.zeros(dim)
+        self.sx = np.zeros(dim)
+        self.sy = np.zeros(dim)
+        if self.compute_XX:
+            self._Mxx = np.zeros((dim, dim))
+        if self.compute_XY:
+            self.Mxy = np.zeros((dim, dim))
+        if self.compute_YY:
+            self._Myy = np.zeros((dim, dim))
+
+    def _reshift(self, shift):
+        r""" expresses the accumulated sums with respect to a new shift """
+        d = self.shift - shift
+        n = self.n
+        if self.compute_XX:
+            self._Mxx += np.outer(self.sx, d) + np.outer(d, self.sx) + n * np.outer(d, d)
+        if self.compute_XY:
+            self.Mxy += np.outer(self.sx, d) + np.outer(d, self.sy) + n * np.outer(d, d)
+        if self.compute_YY:
+            self._Myy += np.outer(self.sy, d) + np.outer(d, self.sy) + n * np.outer(d, d)
+        self.sx += n * d
+        self.sy += n * d
+        self.shift = shift
+
+    def _center(self, X, key):
+        # X - shift in the working precision, written into a reusable buffer
+        if X.dtype == np.float32 and self.precision == 'mixed':
+            shift = self.shift.astype(np.float32)
+            if np.any(shift != self.shift):
+                # use a shift which is exactly representable in single precision
+                self._reshift(shift.astype(np.float64))
+        else:
+            shift = self.shift
+        buf = self._buffers.get(key, None)
+        if buf is None or buf.dtype != shift.dtype or buf.shape[0] < X.shape[0] or buf.shape[1] != X.shape[1]:
+            buf = np.empty(X.shape, dtype=shift.dtype)
+            self._buffers[key] = buf
+        Xc = buf[0:X.shape[0]]
+        np.subtract(X, shift, out=Xc, casting='unsafe')
+        return Xc
+
+    def _add_product(self, M, key, A, B=None):
+        # adds A^T A (upper triangle only) or A^T B to the double precision sum M in place
+        if A.dtype == np.float64:
+            buf, beta = M, 1.0
+        else:
+            # single precision products are computed into a reusable buffer first
+            buf, beta = self._buffers.get(key, None), 0.0
+            if buf is None or buf.shape != M.shape:
+                buf = np.zeros(M.shape, dtype=A.dtype)
+                self._buffers[key] = buf
+        if B is None:
+            _syrk(A, buf, beta=beta)
+        else:
+            _gemm(A, B, buf, beta=beta)
+        if buf is not M:
+            M += buf
+
+    def add(self, X, Y=None):
+        r""" adds a chunk of data X (and time-lagged data Y of the same length) """
+        if X.shape[0] == 0:
+            return
+        if self.sx is None:
+            if self.shift is None:
+                self.shift = np.mean(X, axis=0, dtype=np.float64)
+            self._init(X.shape[1])
+        Xc = self._center(X, 'X')
+        self.sx += np.sum(Xc, axis=0, dtype=np.float64)
+        if self.compute_XX:
+            self._add_product(self._Mxx, 'XX', Xc)
+        if Y is not None:
+            assert Y.shape[0] == X.shape[0], 'X and Y need to have the same number of samples'
+            Yc = self._center(Y, 'Y')
+            self.sy += np.sum(Yc, axis=0, dtype=np.float64)
+            if self.compute_XY:
+                self._add_product(self.Mxy, 'XY', Xc, Yc)
+            if self.compute_YY:
+                self._add_product(self._Myy, 'YY', Yc)
+        elif self.compute_XY or self.compute_YY:
+            raise ValueError('time-lagged data Y is required to compute XY or YY moments')
+        self.n += X.shape[0]
+
+    def combine(self, other):
+        r""" adds the moments accumulated by another RunningMoments object to this one """
+        if other.n == 0:
+            return self
+        if self.sx is not None and len(self.sx) != len(other.sx):
+            raise ValueError('can not combine moments of dimension %i and %i' % (len(self.sx), len(other.sx)))
+        for name, mine, theirs in (('XX', self.compute_XX, other._Mxx), ('XY', self.compute_XY, other.Mxy),
+                                   ('YY', self.compute_YY, other._Myy)):
+            if mine and theirs is None:
+                raise ValueError('can not combine moments: %s moments have not been accumulated' % name)
+        if self.n == 0 and self.sx is None:
+            if self.shift is None:
+                self.shift = other.shift.copy()
+            self._init(len(other.sx))
+        # express the sums of other with respect to our shift
+        d = other.shift - self.shift
+        n = other.n
+        self.sx += other.sx + n * d
+        self.sy += other.sy + n * d
+        if self.compute_XX:
+            self._Mxx += other.Mxx + np.outer(other.sx, d) + np.outer(d, other.sx) + n * np.outer(d, d)
+        if self.compute_XY:
+            self.Mxy += other.Mxy + np.outer(other.sx, d) + np.outer(d, other.sy) + n * np.outer(d, d)
+        if self.compute_YY:
+            self._Myy += other.Myy + np.outer(other.sy, d) + np.outer(d, other.sy) + n * np.outer(d, d)
+        self.n += n
+        return self
+
+    @property
+    def mean_X(self):
+        return self.sx / self.n + self.shift
+
+    @property
+    def mean_Y(self):
+        return self.sy / self.n + self.shift
+
+    def sum_XX(self, mean):
+        r""" :math:`\sum_t (x_t - \mu)(x_t - \mu)^T` for the given mean :math:`\mu` """
+        d = mean - self.shift
+        return self.Mxx - np.outer(self.sx, d) - np.outer(d, self.sx) + self.n * np.outer(d, d)
+
+    def sum_XY(self, mean_X, mean_Y):
+        r""" :math:`\sum_t (x_t - \mu_x)(y_t - \mu_y)^T` for the given means """
+        dx = mean_X - self.shift
+        dy = mean_Y - self.shift
+        return self.Mxy - np.outer(self.sx, dy) - np.outer(dx, self.sy) + self.n * np.outer(dx, dy)
+
+    def sum_YY(self, mean):
+        r""" :math:`\sum_t (y_t - \mu)(y_t - \mu)^T` for the given mean :math:`\mu` """
+        d = mean - self.shift
+        return self.Myy - np.outer(self.sy, d) - np.outer(d, self.sy) + self.n * np.outer(d, d)
+
+    def copy(self):
+        r""" an independent copy of this object """
+        return RunningMoments.from_dict(self.to_dict())
+
+    def to_dict(self):
+        r""" The state of this object as a dictionary of numbers and arrays.
+
+        Moments which have not been accumulated are omitted. The dictionary can
+        be stored (see :meth:`save`) and turned into a RunningMoments object
+        again by :meth:`from_dict`.
+        """
+        d = {'compute_XX': self.compute_XX, 'compute_XY': self.compute_XY,
+             'compute_YY': self.compute_YY, 'precision': self.precision, 'n': self.n}
+        for key in ('shift', 'sx', 'sy', 'Mxx', 'Mxy', 'Myy'):
+            value = getattr(self, key)
+            if value is not None:
+                d[key] = value.copy()
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        r""" creates a RunningMoments object from the output of :meth:`to_dict` """
+        m = cls(compute_XX=bool(d['compute_XX']), compute_XY=bool(d['compute_XY']),
+                compute_YY=bool(d['compute_YY']), shift=d.get('shift', None),
+                precision=str(d.get('precision', 'double')))
+        m.n = int(d['n'])
+        for key in ('sx', 'sy', 'Mxx', 'Mxy', 'Myy'):
+            if key in d:
+                setattr(m, key, np.array(d[key], dtype=np.float64))
+        return m
+
+    def save(self, file):
+        r""" Writes the moments to a numpy .npz file.
+
+        Parameters
+        ----------
+        file : str or file
+            file name or open file, see :func:`numpy.savez`.
+        """
+        np.savez(file, **self.to_dict())
+
+    @classmethod
+    def load(cls, file):
+        r""" Reads moments written by :meth:`save`.
+
+        Parameters
+        ----------
+        file : str or file
+            file name or open file, see :func:`numpy.load`.
+        """
+        with np.load(file) as f:
+            return cls.from_dict(dict((key, f[key]) for key in f.files))
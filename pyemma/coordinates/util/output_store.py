@@ -0,0 +1,179 @@
+
+# This file is part of PyEMMA.
+#
+# Copyright (c) 2015, 2014 Computational Molecular Biology Group, Freie Universitaet Berlin (GER)
+#
+# PyEMMA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+On-disk stores of the output of a transformer.
+
+A store is a directory holding one NumPy .npy file per trajectory and an index
+file (json) listing the files, their lengths, the dimension and the data type.
+The output is streamed into memory mapped arrays, so that it never has to fit
+into main memory, and the store is read back by a memory mapped
+:class:`NumPyFileReader <pyemma.coordinates.data.NumPyFileReader>`, eg. as
+input for clustering.
+'''
+
+from __future__ import absolute_import
+
+import json
+import os
+
+import numpy as np
+from six.moves import range, zip
+
+from pyemma.util.files import mkdir_p
+from pyemma.util.types import is_int
+
+__all__ = ['write_output', 'open_output']
+
+INDEX_FILE = 'index.json'
+
+
+def _index_path(output_dir, prefix):
+    return os.path.join(output_dir, '%s_%s' % (prefix, INDEX_FILE) if prefix else INDEX_FILE)
+
+
+def _write_trajectory(transformer, itraj, out, dimensions, stride):
+    r""" maps one trajectory of the transformer into the given array, reading it sequentially """
+    if transformer.in_memory or transformer.data_producer is transformer:
+        it = transformer.iterator(stride=stride, trajectory=itraj)
+        select = lambda X, target: X[:, dimensions]
+    else:
+        it = transformer.data_producer.iterator(stride=stride, trajectory=itraj)
+        if transformer._profiler is None:
+            select = lambda X, target: transformer._transform_array_dimensions(X, dimensions, out=target)
+        else:
+            select = lambda X, target: transformer._profiler.produce(
+                transformer, transformer._transform_array_dimensions, X, dimensions, out=target)
+    t = 0
+    for _, X in it:
+        L = X.shape[0]
+        if L > 0:
+            target = out[t:t + L]
+            Y = select(X, target)
+            if Y is not target:
+                target[...] = Y
+        t += L
+    out.flush()
+    return itraj
+
+
+def write_output(transformer, output_dir, prefix='', dimensions=slice(0, None), stride=1,
+                 n_jobs=1, overwrite=False, chunksize=None):
+    r""" Writes the output of a transformer into a store of memory mapped .npy files.
+
+    Parameters
+    ----------
+    transformer : Transformer
+        the (parametrized) transformer
+    output_dir : str
+        directory of the store. Is created if it does not exist.
+    prefix : str, optional, default=''
+        prefix of the file names, so that several stores can share a directory.
+    dimensions : list-like of indexes or slice, optional, default=all
+        indices of the output dimensions to write.
+    stride : int, optional, default=1
+        only write every n'th frame.
+    n_jobs : int, optional, default=1
+        number of trajectories mapped in parallel (by threads). With n_jobs=1 the
+        data is read in a single sequential pass.
+    overwrite : bool, optional, default=False
+        whether existing files of the store may be overwritten.
+    chunksize : int, optional, default=None
+        chunk size of the returned reader, by default the one of the transformer.
+
+    Returns
+    -------
+    reader : NumPyFileReader
+        memory mapped reader of the written output.
+    """
+    if not is_int(stride) or stride < 1:
+        raise ValueError('stride has to be a positive integer, but was %s' % str(stride))
+    if not transformer._parametrized:
+        transformer.parametrize(stride)
+    dimensions, ndim = transformer._output_dimensions(dimensions)
+
+    name = prefix + '_%i.npy' if prefix else '%i.npy'
+    files = [name % i for i in range(transformer.number_of_trajectories())]
+    index = _index_path(output_dir, prefix)
+    if not overwrite:
+        for f in [index] + [os.path.join(output_dir, f) for f in files]:
+            if os.path.exists(f):
+                raise EnvironmentError('Attempted to write "%s" which already existed. To overwrite existing'
+                                       ' files, pass overwrite=True.' % f)
+    if not os.path.exists(output_dir):
+        mkdir_p(output_dir)
+
+    lengths = transformer.trajectory_lengths(stride=stride)
+    dtype = np.dtype(transformer.output_type())
+    out = [np.lib.format.open_memmap(os.path.join(output_dir, f), mode='w+', dtype=dtype, shape=(l, ndim))
+           for f, l in zip(files, lengths)]
+
+    if n_jobs == 1 or len(out) < 2:
+        transformer.get_output(dimensions=dimensions, stride=stride, out=out)
+        for o in out:
+            o.flush()
+    else:
+        from multiprocessing.pool import ThreadPool
+        transformer._progress_register(len(out), description='writing output of '
+                                       + transformer.__class__.__name__, stage=1)
+        pool = ThreadPool(processes=n_jobs)
+        try:
+            jobs = pool.imap_unordered(lambda i: _write_trajectory(transformer, i, out[i], dimensions, stride),
+                                       range(len(out)))
+            for _ in jobs:
+                transformer._progress_update(1, stage=1)
+        finally:
+            pool.close()
+            pool.join()
+    del out
+
+    with open(index, 'w') as fh:
+        json.dump({'files': files, 'lengths': [int(l) for l in lengths], 'dimension': ndim,
+                   'dtype': dtype.str, 'stride': stride, 'source': transformer.describe()}, fh, indent=1)
+
+    return open_output(output_dir, prefix=prefix,
+                       chunksize=transformer.chunksize if chunksize is None else chunksize)
+
+
+def open_output(output_dir, prefix='', chunksize=1000):
+    r""" Opens a store written by :func:`write_output`.
+
+    Parameters
+    ----------
+    output_dir : str
+        directory of the store.
+    prefix : str, optional, default=''
+        prefix the store has been written with.
+    chunksize : int, optional, default=1000
+        chunk size of the reader.
+
+    Returns
+    -------
+    reader : NumPyFileReader
+        reader of the stored output. The files are memory mapped, ie. the data
+        is not copied into main memory.
+    """
+    from pyemma.coordinates.data.numpy_filereader import NumPyFileReader
+
+    with open(_index_path(output_dir, prefix)) as fh:
+        index = json.load(fh)
+    files = [os.path.join(output_dir, f) for f in index['files']]
+    reader = NumPyFileReader(files, chunksize=chunksize, mmap_mode='r')
+    if not np.array_equal(reader.trajectory_lengths(), index['lengths']) or reader.dimension() != index['dimension']:
+        raise ValueError('files of the store in "%s" do not match its index' % output_dir)
+    return reader
@@ -0,0 +1,236 @@
+
+# This file is part of PyEMMA.
+#
+# Copyright (c) 2015, 2014 Computational Molecular Biology Group, Freie Universitaet Berlin (GER)
+#
+# PyEMMA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Caching of upstream output during multi-pass parametrization.
+
+Algorithms like TICA or mini-batch k-means iterate several times over the
+output of their data producer. If the producer is expensive (eg. a
+FeatureReader, which has to decode and featurize every frame), a
+:class:`PassCache` attached to a transformer materializes the upstream output
+once and replays it for the subsequent passes of
+:meth:`Transformer.parametrize <pyemma.coordinates.transform.transformer.Transformer.parametrize>`.
+
+>>> from pyemma.coordinates import tica
+>>> from pyemma.coordinates.util.pass_cache import PassCache
+>>> t = tica(lag=10)
+>>> t.param_cache = PassCache(max_memory=2**30)  # doctest: +SKIP
+'''
+
+from __future__ import absolute_import
+
+import os
+import tempfile
+
+import numpy as np
+
+from pyemma.util.log import getLogger
+
+__all__ = ['PassCache']
+
+_logger = getLogger('pyemma.coordinates.util.pass_cache')
+
+
+class PassCache(object):
+    r""" Bounded buffer for the upstream output of a parametrization.
+
+    The output of the data producer is recorded during the first pass, if this
+    pass reads all frames with a uniform stride and without lag. Otherwise it is
+    read once in an additional pass before the second pass. All later passes
+    are served from the buffer, as long as their stride and lag can be
+    expressed in terms of the buffered frames (a multiple of the buffered
+    stride for uniform strides, random access only for a buffered stride of
+    one). Passes which can not be served read from the data producer as usual.
+
+    Parameters
+    ----------
+    max_memory : int, optional, default=1 GiB
+        maximum size of the buffer in bytes to be held in main memory.
+    max_disk : int, optional, default=0
+        maximum size of the buffer in bytes to be written to a temporary
+        memory mapped file, if it does not fit into main memory. If the output
+        does not fit into either, nothing is cached.
+    directory : str, optional, default=None
+        directory for the temporary file. If None, the default of
+        :func:`tempfile.mkstemp` is used.
+
+    """
+
+    def __init__(self, max_memory=2**30, max_disk=0, directory=None):
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.directory = directory
+        self._clear()
+
+    def _clear(self):
+        self._stride = 1
+        self._lengths = None
+        self._dim = None
+        self._arrays = None
+        self._data = None
+        self._filename = None
+        self._complete = False
+        self._failed = False
+
+    @property
+    def complete(self):
+        r""" whether the buffer holds the complete upstream output """
+        return self._complete
+
+    @property
+    def stride(self):
+        r""" the stride of the buffered frames """
+        return self._stride
+
+    @property
+    def nbytes(self):
+        r""" size of the buffer in bytes """
+        if self._arrays is None:
+            return 0
+        return sum(a.nbytes for a in self._arrays)
+
+    @property
+    def on_disk(self):
+        r""" whether the buffer is a memory mapped file """
+        return self._filename is not None
+
+    def prepare(self, producer, stride):
+        r""" Prepares buffering of the output of producer for a parametrization
+        with the given stride (called before the first pass).
+
+        Returns
+        -------
+        useful : bool
+            False, if the producer already holds its output in memory.
+        """
+        from pyemma.coordinates.data.data_in_memory import DataInMemory
+        from pyemma.coordinates.transform.transformer import TransformerIteratorContext
+
+        self.release()
+        if isinstance(producer, DataInMemory) or producer.in_memory:
+            return False
+        # in random access mode, all frames are buffered
+        self._stride = stride if TransformerIteratorContext.is_uniform_stride(stride) else 1
+        self._lengths = producer.trajectory_lengths(self._stride)
+        self._dim = producer.dimension()
+        return True
+
+    def _allocate(self, dtype):
+        dtype = np.dtype(dtype)
+        total = sum(self._lengths)
+        nbytes = total * self._dim * dtype.itemsize
+        if total == 0:
+            self._failed = True
+        elif nbytes <= self.max_memory:
+            self._arrays = [np.empty((l, self._dim), dtype=dtype) for l in self._lengths]
+        elif nbytes <= self.max_disk:
+            fd, self._filename = tempfile.mkstemp(suffix='.dat', dir=self.directory)
+            os.close(fd)
+            buf = np.memmap(self._filename, dtype=dtype, mode='w+', shape=(total, self._dim))
+            offsets = np.cumsum([0] + list(self._lengths))
+            self._arrays = [buf[offsets[i]:offsets[i + 1]] for i in range(len(self._lengths))]
+        else:
+            _logger.info("upstream output (%i bytes) exceeds the limits of the pass cache"
+                         " (memory: %i bytes, disk: %i bytes). Not caching."
+                         % (nbytes, self.max_memory, self.max_disk))
+            self._failed = True
+
+    def can_record(self, ctx):
+        r""" whether a pass with the given iterator context reads exactly the
+        frames to be buffered """
+        return (not self._failed and self._lengths is not None and not self._complete
+                and ctx.uniform_stride and ctx.stride == self._stride and ctx.lag == 0)
+
+    def record(self, itraj, t, X):
+        r""" stores chunk X, which starts at (strided) frame t of trajectory itraj """
+        if self._failed:
+            return
+        if self._arrays is None:
+            self._allocate(X.dtype)
+            if self._failed:
+                return
+        self._arrays[itraj][t:t + X.shape[0]] = X
+
+    def finish_recording(self, passed_frames):
+        r""" marks the buffer as complete, if the recorded pass covered all frames """
+        if not self._failed and self._arrays is not None and passed_frames == sum(self._lengths):
+            self._complete = True
+
+    def fill(self, producer):
+        r""" reads the output of producer in a dedicated pass """
+        from pyemma.coordinates.transform.transformer import TransformerIteratorContext
+
+        ctx = TransformerIteratorContext(stride=self._stride)
+        producer._reset(ctx)
+        frames = 0
+        try:
+            for itraj, l in enumerate(self._lengths):
+                t = 0
+                while t < l:
+                    X = producer._next_chunk_profiled(ctx)
+                    if X.shape[0] == 0:
+                        break
+                    self.record(itraj, t, X)
+                    if self._failed:
+                        return
+                    t += X.shape[0]
+                    frames += X.shape[0]
+        finally:
+            producer._close(ctx)
+        self.finish_recording(frames)
+
+    def source(self, producer, ctx):
+        r""" Determines where to read a pass with the given iterator context from.
+
+        Returns
+        -------
+        (producer, ctx) : the data producer and iterator context to use. Either
+            the given ones or the buffer with an equivalent context.
+        """
+        from pyemma.coordinates.data.data_in_memory import DataInMemory
+        from pyemma.coordinates.transform.transformer import TransformerIteratorContext
+
+        if self._lengths is None or self._failed:
+            return producer, ctx
+        s = self._stride
+        if ctx.uniform_stride:
+            if ctx.stride % s != 0 or ctx.lag % s != 0:
+                return producer, ctx
+            stride, lag = ctx.stride // s, ctx.lag // s
+        else:
+            if s != 1:
+                return producer, ctx
+            stride, lag = ctx.stride, ctx.lag
+
+        if not self._complete:
+            self.fill(producer)
+            if not self._complete:
+                return producer, ctx
+        if self._data is None:
+            self._data = DataInMemory(self._arrays, chunksize=producer.chunksize)
+        return self._data, TransformerIteratorContext(stride=stride, lag=lag)
+
+    def release(self):
+        r""" frees the buffer """
+        filename = self._filename
+        self._clear()
+        if filename is not None:
+            try:
+                os.remove(filename)
+            except OSError:
+                _logger.warning("could not remove temporary file %s" % filename)
@@ -0,0 +1,225 @@
+
+# This file is part of PyEMMA.
+#
+# Copyright (c) 2015, 2014 Computational Molecular Biology Group, Freie Universitaet Berlin (GER)
+#
+# PyEMMA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Instrumentation of pipeline stages.
+
+A :class:`PipelineProfiler` is attached to the stages of a pipeline and records
+for each stage the (exclusive) wall time spent in producing chunks and in
+parametrization, the number of chunks, frames and bytes processed, the number
+of parametrization passes and the size of the largest chunk.
+'''
+
+from __future__ import absolute_import
+from timeit import default_timer
+import threading
+
+import numpy as np
+
+__all__ = ['PipelineProfiler', 'StageStatistics']
+
+
+class StageStatistics(object):
+    r""" Statistics gathered for a single pipeline stage.
+
+    Attributes
+    ----------
+    name : str
+        name of the stage
+    time_chunks : float
+        wall time in seconds spent producing output chunks, excluding the time
+        spent in upstream stages
+    time_param : float
+        wall time in seconds spent in parametrization (_param_add_data)
+    n_chunks : int
+        number of chunks produced
+    frames : int
+        number of frames produced
+    bytes : int
+        number of bytes produced
+    passes : int
+        number of passes over the data during parametrization
+    peak_chunk_bytes : int
+        size of the largest chunk produced in bytes
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.time_chunks = 0.0
+        self.time_param = 0.0
+        self.n_chunks = 0
+        self.frames = 0
+        self.bytes = 0
+        self.passes = 0
+        self.peak_chunk_bytes = 0
+
+    @property
+    def time_total(self):
+        return self.time_chunks + self.time_param
+
+    @property
+    def throughput(self):
+        r""" produced frames per second (0 if no time was recorded) """
+        return self.frames / self.time_chunks if self.time_chunks > 0 else 0.0
+
+    def _add_chunk(self, chunk):
+        # chunks of lagged iteration are tuples (X, Y)
+        if isinstance(chunk, tuple):
+            arrays = chunk
+        else:
+            arrays = (chunk, )
+        nbytes = sum(getattr(a, 'nbytes', 0) for a in arrays)
+        self.n_chunks += 1
+        self.frames += np.shape(arrays[0])[0] if len(np.shape(arrays[0])) > 0 else 0
+        self.bytes += nbytes
+        self.peak_chunk_bytes = max(self.peak_chunk_bytes, nbytes)
+
+    def as_dict(self):
+        return {'stage': self.name,
+                'time_chunks': self.time_chunks,
+                'time_param': self.time_param,
+                'time_total': self.time_total,
+                'n_chunks': self.n_chunks,
+                'frames': self.frames,
+                'bytes': self.bytes,
+                'passes': self.passes,
+                'peak_chunk_bytes': self.peak_chunk_bytes,
+                'throughput': self.throughput,
+                }
+
+    def __repr__(self):
+        return ("%s: chunks=%.3fs param=%.3fs n_chunks=%i frames=%i bytes=%i passes=%i"
+                " peak_chunk_bytes=%i throughput=%.1f frames/s"
+                % (self.name, self.time_chunks, self.time_param, self.n_chunks, self.frames,
+                   self.bytes, self.passes, self.peak_chunk_bytes, self.throughput))
+
+
+class PipelineProfiler(object):
+    r""" Records per-stage timings and data volumes of a pipeline.
+
+    Stages being profiled hold a reference to the profiler in their ``_profiler``
+    attribute. Since a stage pulls its input from its data producer while its own
+    timer is running, the time spent in nested (upstream) calls is subtracted,
+    so that the reported times of the stages add up to the overall time.
+
+    Stages may be iterated from several threads at once (eg. by
+    :meth:`write_output <pyemma.coordinates.transform.transformer.Transformer.write_output>`
+    with n_jobs > 1). Nested calls are tracked per thread and the statistics are
+    updated under a lock, so the times of concurrent iterations add up.
+    """
+
+    def __init__(self):
+        self._stats = []
+        self._index = {}
+        self._lock = threading.Lock()
+        # per thread: stack of [start time, time spent in nested calls]
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def register(self, stage):
+        r""" starts profiling the given stage """
+        with self._lock:
+            if id(stage) not in self._index:
+                self._index[id(stage)] = len(self._stats)
+                self._stats.append(StageStatistics(stage.name))
+        stage._profiler = self
+
+    def unregister(self, stage):
+        r""" stops profiling the given stage; already gathered statistics are kept """
+        if getattr(stage, '_profiler', None) is self:
+            stage._profiler = None
+
+    def stats(self, stage):
+        r""" the :class:`StageStatistics` of the given stage """
+        return self._stats[self._index[id(stage)]]
+
+    def reset(self):
+        r""" discards all gathered statistics """
+        with self._lock:
+            for s in self._stats:
+                s.reset()
+
+    def _enter(self):
+        self._stack.append([default_timer(), 0.0])
+
+    def _exit(self):
+        stack = self._stack
+        start, nested = stack.pop()
+        elapsed = default_timer() - start
+        if stack:
+            stack[-1][1] += elapsed
+        return elapsed - nested
+
+    def produce(self, stage, func, *args, **kwargs):
+        r""" calls func(*args, **kwargs), which produces an output chunk of the
+        given stage (eg. stage._next_chunk), and records time and chunk size """
+        self._enter()
+        try:
+            chunk = func(*args, **kwargs)
+        finally:
+            elapsed = self._exit()
+        with self._lock:
+            s = self.stats(stage)
+            s.time_chunks += elapsed
+            s._add_chunk(chunk)
+        return chunk
+
+    def param_add_data(self, stage, *args, **kwargs):
+        r""" calls stage._param_add_data(*args, **kwargs) and records its time """
+        self._enter()
+        try:
+            return stage._param_add_data(*args, **kwargs)
+        finally:
+            elapsed = self._exit()
+            with self._lock:
+                self.stats(stage).time_param += elapsed
+
+    def new_pass(self, stage):
+        with self._lock:
+            self.stats(stage).passes += 1
+
+    def report(self):
+        r""" Structured report of the gathered statistics.
+
+        Returns
+        -------
+        report : list of dict
+            one dictionary per stage (in order of registration) with the keys
+            'stage', 'time_chunks', 'time_param', 'time_total', 'n_chunks',
+            'frames', 'bytes', 'passes', 'peak_chunk_bytes' and 'throughput'.
+        """
+        with self._lock:
+            return [s.as_dict() for s in self._stats]
+
+    def log(self, logger):
+        r""" writes a summary line per stage to the given logger """
+        for s in self._stats:
+            logger.info(repr(s))
+
+    def __repr__(self):
+        return '\n'.join(repr(s) for s in self._stats)
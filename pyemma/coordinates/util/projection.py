@@ -0,0 +1,138 @@
+
+# This file is part of PyEMMA.
+#
+# Copyright (c) 2015, 2014 Computational Molecular Biology Group, Freie Universitaet Berlin (GER)
+#
+# PyEMMA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+r'''
+Affine projections of data chunks, as used by linear transformers (TICA, PCA).
+
+A projection :math:`(X - \mu) V S` onto (scaled) components is evaluated as
+:math:`X W + b` with the precomputed matrix :math:`W = V S` and bias
+:math:`b = -\mu W`, ie. by a single matrix product without a mean-free copy of
+the input. If an output array is given, the product is written into it.
+Input dimensions with zero weight (eg. constant ones) can be skipped by
+restricting the projection to the remaining input columns.
+'''
+
+from __future__ import absolute_import
+
+import threading
+
+import numpy as np
+
+__all__ = ['AffineProjection']
+
+
+class AffineProjection(object):
+    r""" Evaluates :math:`Y = X W + b` for chunks of data X.
+
+    Parameters
+    ----------
+    W : ndarray(n, d)
+        projection matrix
+    b : ndarray(d,)
+        bias added to every projected frame
+    precision : str, optional, default='double'
+        'double' projects all input in double precision. 'mixed' projects
+        single precision input in single precision (the matrix and bias are
+        rounded to single precision), so that single precision data is
+        projected without being converted.
+    columns : ndarray(n,) of int, optional, default=None
+        input columns the rows of W refer to. If None, all columns are used.
+    """
+
+    def __init__(self, W, b, precision='double', columns=None):
+        self.W = np.ascontiguousarray(W, dtype=np.float64)
+        self.b = np.asarray(b, dtype=np.float64)
+        self.precision = precision
+        self.columns = None if columns is None else np.asarray(columns, dtype=np.intp)
+        self._W32 = None
+        self._b32 = None
+        # buffers for the selected columns and for input converted to double precision.
+        # They are kept per thread, so that chunks can be projected concurrently.
+        self._buffers = threading.local()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_buffers']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._buffers = threading.local()
+
+    @property
+    def dimension(self):
+        return self.W.shape[1]
+
+    @staticmethod
+    def _reuse(buf, shape, dtype):
+        if buf is None or buf.dtype != dtype or buf.shape[0] < shape[0] or buf.shape[1] != shape[1]:
+            buf = np.empty(shape, dtype=dtype)
+        return buf
+
+    def _operands(self, X):
+        buffers = self._buffers
+        if self.columns is not None:
+            buffers.columns = self._reuse(getattr(buffers, 'columns', None), (X.shape[0], len(self.columns)), X.dtype)
+            buf = buffers.columns[0:X.shape[0]]
+            np.take(X, self.columns, axis=1, out=buf)
+            X = buf
+        if X.dtype == np.float32 and self.precision == 'mixed':
+            if self._W32 is None:
+                self._b32 = self.b.astype(np.float32)
+                self._W32 = self.W.astype(np.float32)
+            return X, self._W32, self._b32
+        if X.dtype != np.float64:
+            # convert into a buffer which is reused for all chunks
+            buffers.converted = self._reuse(getattr(buffers, 'converted', None), X.shape, np.float64)
+            buf = buffers.converted[0:X.shape[0]]
+            np.copyto(buf, X, casting='unsafe')
+            X = buf
+        return X, self.W, self.b
+
+    def __call__(self, X, out=None):
+        r""" Projects X.
+
+        Parameters
+        ----------
+        X : ndarray(T, n)
+            the input data
+        out : ndarray(T, d), optional, default=None
+            array to write the result into. If it is C-contiguous and of the
+            working precision, the matrix product is written into it directly.
+
+        Returns
+        -------
+        Y : ndarray(T, d)
+            the projected data (out, if given)
+        """
+        X, W, b = self._operands(X)
+        if out is None:
+            Y = np.dot(X, W)
+            Y += b
+            return Y
+        if out.shape != (X.shape[0], W.shape[1]):
+            raise ValueError('output array has shape %s, but expected %s'
+                             % (str(out.shape), str((X.shape[0], W.shape[1]))))
+        if out.dtype == W.dtype and out.flags.c_contiguous:
+            np.dot(X, W, out=out)
+            out += b
+        else:
+            Y = np.dot(X, W)
+            Y += b
+            out[...] = Y
+        return out
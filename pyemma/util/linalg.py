@@ -21,6 +21,7 @@ from __future__ import absolute_import
 import numpy as np
 import scipy.linalg
 import scipy.sparse
+import scipy.sparse.linalg
 import copy
 import math
 from six.moves import range
@@ -86,6 +87,56 @@ def submatrix(M, sel):
         return C_cc
 
 
+def nonredundant_dimensions(C, mean=None, tol=1e-10, blocksize=256):
+    r""" Dimensions of a covariance matrix which are neither constant nor duplicates
+
+    A dimension i is constant, if its variance is zero up to round-off, ie.
+    :math:`C_{ii} \leq tol^2 \max_k C_{kk}`. If the mean is given, a dimension
+    j is a duplicate of a dimension i < j, if both have the same mean and
+    variance and are perfectly correlated (all up to the relative tolerance).
+    Removing constant dimensions and all but the first of every set of
+    duplicates does not change the space spanned by the data (apart from
+    the mean).
+
+    Parameters
+    ----------
+    C : ndarray(n,n)
+        covariance matrix
+    mean : ndarray(n), optional, default=None
+        mean. If None, only constant dimensions are detected.
+    tol : float, optional, default=1e-10
+        relative tolerance
+    blocksize : int, optional, default=256
+        number of rows of the correlation matrix formed at once
+
+    Returns
+    -------
+    sel : ndarray(m, dtype=int)
+        sorted indices of the remaining dimensions
+
+    """
+    var = np.diag(C).copy()
+    n = len(var)
+    keep = var > tol * tol * max(var.max(), 0.0) if n > 0 else np.ones(0, dtype=bool)
+    if mean is not None and np.count_nonzero(keep) > 1:
+        sel = np.where(keep)[0]
+        std = np.sqrt(var[sel])
+        mu = mean[sel]
+        duplicate = np.zeros(len(sel), dtype=bool)
+        for start in range(0, len(sel), blocksize):
+            rows = slice(start, min(start + blocksize, len(sel)))
+            # correlations, variances and means of the rows compared to all later columns
+            corr = C[np.ix_(sel[rows], sel)] / np.outer(std[rows], std)
+            same = corr >= 1.0 - tol
+            same &= np.abs(std[rows, None] - std[None, :]) <= tol * np.maximum(std[rows, None], std[None, :])
+            same &= np.abs(mu[rows, None] - mu[None, :]) <= tol * np.maximum(np.abs(mu[rows, None]), std[rows, None])
+            # a duplicate of a duplicate is a duplicate of the first one as well
+            same = np.triu(same, k=start + 1)
+            duplicate |= same.any(axis=0)
+        keep[sel[duplicate]] = False
+    return np.where(keep)[0]
+
+
 def _sort_by_norm(evals, evecs):
     """
     Sorts the eigenvalues and eigenvectors by descending norm of the eigenvalues
@@ -114,7 +165,44 @@ def _sort_by_norm(evals, evecs):
     return (evals2, evecs2)
 
 
-def eig_corr(C0, Ct, epsilon=1e-6):
+def eigh_dominant(A, k=None, by_norm=False):
+    r""" Dominant eigenvalues and eigenvectors of a symmetric matrix
+
+    If only a few eigenpairs of a large matrix are requested, they are computed
+    iteratively (Lanczos iteration, see :func:`scipy.sparse.linalg.eigsh`).
+    Otherwise a full symmetric eigendecomposition is computed and all
+    eigenpairs are returned, since they come at no additional cost.
+
+    Parameters
+    ----------
+    A : ndarray (n,n)
+        symmetric matrix
+    k : int or None
+        minimum number of eigenpairs to compute. None means all.
+    by_norm : bool
+        if True, the eigenvalues with the largest norm are dominant, otherwise
+        the largest (algebraic) eigenvalues.
+
+    Returns
+    -------
+    l : ndarray (k) or ndarray (n)
+        The eigenvalues, sorted in descending order (of their norm if by_norm is True)
+    R : ndarray (n,k) or ndarray (n,n)
+        The eigenvectors, as a column matrix.
+
+    """
+    n = A.shape[0]
+    if k is not None and n > 200 and 3 * k < n:
+        (l, R) = scipy.sparse.linalg.eigsh(A, k=k, which='LM' if by_norm else 'LA')
+    else:
+        (l, R) = scipy.linalg.eigh(A)
+    if by_norm:
+        return _sort_by_norm(l, R)
+    I = np.argsort(l)[::-1]
+    return (l[I], R[:, I])
+
+
+def eig_corr(C0, Ct, epsilon=1e-6, k=None, return_norm=False):
     r""" Solve generalized eigenvalues problem with correlation matrices C0 and Ct
 
     Numerically robust solution of a generalized eigenvalue problem of the form
@@ -123,7 +211,7 @@ def eig_corr(C0, Ct, epsilon=1e-6):
         \mathbf{C}_t \mathbf{r}_i = \mathbf{C}_0 \mathbf{r}_i l_i
 
     Computes :math:`m` dominant eigenvalues :math:`l_i` and eigenvectors :math:`\mathbf{r}_i`, where
-    :math:`m` is the numerical rank of the problem. This is done by first conducting a Schur decomposition
+    :math:`m` is the numerical rank of the problem. This is done by first conducting an eigendecomposition
     of the symmetric positive matrix :math:`\mathbf{C}_0`, then truncating its spectrum to retain only eigenvalues
     that are numerically greater than zero, then using this decomposition to define an ordinary eigenvalue
     Problem for :math:`\mathbf{C}_t` of size :math:`m`, and then solving this eigenvalue problem.
@@ -138,24 +226,32 @@ def eig_corr(C0, Ct, epsilon=1e-6):
         eigenvalue norm cutoff. Eigenvalues of C0 with norms <= epsilon will be
         cut off. The remaining number of Eigenvalues define the size of
         the output.
+    k : int or None
+        number of dominant eigenvalues and eigenvectors needed. None means all
+        m. If k is much smaller than m, only k eigenpairs of the transformed
+        eigenvalue problem are computed iteratively, otherwise all are
+        returned (see :func:`eigh_dominant`).
+    return_norm : bool
+        if True, also return the sum of the squares of all m eigenvalues,
+        including those which have not been computed.
 
     Returns
     -------
     l : ndarray (m)
-        The first m generalized eigenvalues, sorted by descending norm
+        The first m (or k) generalized eigenvalues, sorted by descending norm
     R : ndarray (n,m)
-        The first m generalized eigenvectors, as a column matrix.
+        The first m (or k) generalized eigenvectors, as a column matrix.
+    norm : float
+        The sum of the squares of all m eigenvalues. Only returned if return_norm is True.
 
     """
     # check input
     assert np.allclose(C0.T, C0), 'C0 is not a symmetric matrix'
     assert np.allclose(Ct.T, Ct), 'Ct is not a symmetric matrix'
 
-    # compute the Eigenvalues of C0 using Schur factorization
-    (S, V) = scipy.linalg.schur(C0)
-    s = np.diag(S)
+    # compute the Eigenvalues of C0
+    (s, V) = scipy.linalg.eigh(C0)
     (s, V) = _sort_by_norm(s, V) # sort them
-    S = np.diag(s)
 
     # determine the cutoff. We know that C0 is an spd matrix,
     # so we select the truncation threshold such that everything that is negative vanishes
@@ -170,19 +266,23 @@ def eig_corr(C0, Ct, epsilon=1e-6):
     Vm = V[:, 0:m]
     sm = s[0:m]
 
-    # transform Ct to orthogonal basis given by the eigenvectors of C0
-    Sinvhalf = 1.0 / np.sqrt(sm)
-    T = np.dot(np.diag(Sinvhalf), Vm.T)
-    Ct_trans = np.dot(np.dot(T, Ct), T.T)
+    # transform Ct to orthogonal basis given by the eigenvectors of C0,
+    # scaling the columns instead of multiplying with a diagonal matrix
+    L = Vm / np.sqrt(sm)
+    Ct_trans = np.dot(L.T, np.dot(Ct, L))
+    Ct_trans = 0.5 * (Ct_trans + Ct_trans.T)
 
     # solve the symmetric eigenvalue problem in the new basis
-    (l, R_trans) = scipy.linalg.eigh(Ct_trans)
-    (l, R_trans) = _sort_by_norm(l, R_trans)
+    (l, R_trans) = eigh_dominant(Ct_trans, k=k, by_norm=True)
 
     # transform the eigenvectors back to the old basis
-    R = np.dot(T.T, R_trans)
+    R = np.dot(L, R_trans)
 
     # return result
+    if return_norm:
+        # the squared Frobenius norm of the symmetric matrix is the sum of its squared eigenvalues
+        norm = np.sum(l ** 2) if len(l) == m else np.sum(Ct_trans ** 2)
+        return (l, R, norm)
     return (l, R)
 
 
@@ -0,0 +1,73 @@
+
+# This file is part of PyEMMA.
+#
+# Copyright (c) 2015, 2014 Computational Molecular Biology Group, Freie Universitaet Berlin (GER)
+#
+# PyEMMA is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+from __future__ import absolute_import
+import unittest
+
+import numpy as np
+
+from pyemma.util.linalg import eig_corr, eigh_dominant, nonredundant_dimensions
+
+
+class TestEigCorr(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        np.random.seed(0)
+        n = 300
+        X = np.random.randn(5 * n, n)
+        Y = 0.9 * X + 0.1 * np.random.randn(5 * n, n)
+        cls.C0 = np.dot(X.T, X) / len(X)
+        Ct = np.dot(X.T, Y) / len(X)
+        cls.Ct = 0.5 * (Ct + Ct.T)
+
+    def test_partial(self):
+        l_full, R_full = eig_corr(self.C0, self.Ct)
+        l, R = eig_corr(self.C0, self.Ct, k=5)
+        self.assertEqual(R.shape, (self.C0.shape[0], 5))
+        np.testing.assert_allclose(l, l_full[:5])
+        # eigenvectors agree up to the sign
+        np.testing.assert_allclose(np.abs(np.sum(R * R_full[:, :5], axis=0) /
+                                          np.sum(R_full[:, :5] * R_full[:, :5], axis=0)), 1, rtol=1e-6)
+        # the norm covers the eigenvalues which have not been computed
+        norm = eig_corr(self.C0, self.Ct, k=5, return_norm=True)[2]
+        np.testing.assert_allclose(norm, np.sum(l_full ** 2), rtol=1e-8)
+
+    def test_eigh_dominant(self):
+        l_full, R_full = eigh_dominant(self.C0)
+        self.assertTrue(np.all(np.diff(l_full) <= 0))
+        l, R = eigh_dominant(self.C0, k=3)
+        np.testing.assert_allclose(l, l_full[:3])
+        np.testing.assert_allclose(np.abs(np.sum(R * R_full[:, :3], axis=0)), 1, rtol=1e-6)
+        # small problems are solved completely
+        self.assertEqual(len(eigh_dominant(self.C0[:10, :10], k=3)[0]), 10)
+
+    def test_nonredundant_dimensions(self):
+        X = np.random.randn(1000, 4)
+        # constant, duplicate of 0, shifted copy of 1, duplicate of a duplicate
+        X = np.column_stack((X, np.ones(1000), X[:, 0], X[:, 1] + 1, X[:, 0], 2 * X[:, 2]))
+        C = np.cov(X.T)
+        np.testing.assert_equal(nonredundant_dimensions(C), [0, 1, 2, 3, 5, 6, 7, 8])
+        np.testing.assert_equal(nonredundant_dimensions(C, X.mean(axis=0)), [0, 1, 2, 3, 6, 8])
+        np.testing.assert_equal(nonredundant_dimensions(C, X.mean(axis=0), blocksize=2), [0, 1, 2, 3, 6, 8])
+
+
+if __name__ == "__main__":
+    unittest.main()